@@ -0,0 +1,204 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import click
+from lxml import etree
+from synthetic import NotebookSpec, write_notebook
+
+from presentpy.__main__ import process
+from presentpy.profiling import Profiler
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+SCENARIOS = {
+    "code": NotebookSpec(code_cells=200, code_lines=20, highlight_steps=3),
+    "markdown": NotebookSpec(markdown_cells=200),
+    "tables": NotebookSpec(tables=10, table_shape=(300, 8)),
+    "table-schema": NotebookSpec(tables=10, table_shape=(300, 8), table_schema=True),
+    "images": NotebookSpec(images=10, image_size=(1600, 1200)),
+    "mixed": NotebookSpec(code_cells=50, code_lines=15, highlight_steps=2, markdown_cells=50, tables=5, images=5),
+}
+
+# How much worse than the baseline a measurement may be, as a fraction of the baseline. Differences under
+# the minimums are ignored, short stages are too noisy to compare.
+DEFAULT_TOLERANCES = {
+    "seconds": 0.3,
+    "peak_memory": 0.2,
+    "counts": 0.01,
+    "min_seconds": 0.02,
+    "min_memory": 1024 * 1024,
+}
+
+
+def calibrate() -> float:
+    """
+    Times a fixed mix of Python, lxml and zlib work, the timings of a run are compared with the baseline relative
+    to it, so a busy or slower machine does not show up as a regression.
+    """
+    start = time.perf_counter()
+    root = etree.Element("root")
+    for number in range(20000):
+        etree.SubElement(root, "item", name=f"item{number}").text = str(number * number)
+    data = etree.tostring(root)
+    zlib.compress(data, 6)
+    sorted(str(number)[::-1] for number in range(50000))
+    return time.perf_counter() - start
+
+
+def run_process(notebook: Path, output: Path, profiler: Profiler):
+    with profiler:
+        process.main([str(notebook), "--output", str(output)], standalone_mode=False)
+
+
+def measure(notebook: Path, output: Path, repeat: int) -> Dict[str, Any]:
+    """
+    Converts ``notebook`` with ``process`` after a warm-up run, keeping the fastest time of each stage over
+    ``repeat`` runs. Memory is measured in a separate run, as tracing it slows the conversion down.
+    """
+    run_process(notebook, output, Profiler(trace_memory=False))
+
+    timings = []
+    calibration = []
+    for _ in range(repeat):
+        calibration.append(calibrate())
+        profiler = Profiler(trace_memory=False)
+        run_process(notebook, output, profiler)
+        timings.append(profiler)
+
+    # The whole run is a stage of its own, so its peak memory includes every stage
+    memory = Profiler()
+    with memory:
+        with memory.stage("process"):
+            process.main([str(notebook), "--output", str(output)], standalone_mode=False)
+
+    stages = {}
+    for name, stats in memory.stages.items():
+        if name == "process":
+            continue
+        stages[name] = {
+            "seconds": min(profiler.stages[name].seconds for profiler in timings),
+            "peak_memory": stats.peak_memory,
+        }
+    return {
+        "calibration": min(calibration),
+        "seconds": min(profiler.seconds for profiler in timings),
+        "peak_memory": memory.stages["process"].peak_memory,
+        "stages": stages,
+        "counts": timings[0].counts,
+    }
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerances: Dict[str, float]
+) -> List[Tuple[str, float, float, bool]]:
+    """
+    Compares ``results`` with ``baseline``, returning the measurements that changed by more than the tolerances
+    as ``(name, baseline, result, regressed)``. Baseline timings are scaled by how much slower the calibration ran.
+    """
+    limits = {
+        "seconds": (tolerances["seconds"], tolerances["min_seconds"]),
+        "peak memory": (tolerances["peak_memory"], tolerances["min_memory"]),
+        "count": (tolerances["counts"], 0),
+    }
+    changes = []
+
+    def check(name, kind, expected, actual):
+        tolerance, minimum = limits[kind]
+        if abs(actual - expected) > max(expected * tolerance, minimum):
+            changes.append((name, expected, actual, actual > expected))
+
+    for scenario, result in results.items():
+        expected = baseline.get(scenario)
+        if expected is None:
+            continue
+        speed = result["calibration"] / expected["calibration"]
+        check(f"{scenario} seconds", "seconds", expected["seconds"] * speed, result["seconds"])
+        check(f"{scenario} peak memory", "peak memory", expected["peak_memory"], result["peak_memory"])
+        for stage, stats in result["stages"].items():
+            if stage in expected["stages"]:
+                stage_expected = expected["stages"][stage]
+                name = f"{scenario} {stage}"
+                check(f"{name} seconds", "seconds", stage_expected["seconds"] * speed, stats["seconds"])
+                check(f"{name} peak memory", "peak memory", stage_expected["peak_memory"], stats["peak_memory"])
+        for name, amount in result["counts"].items():
+            if name in expected["counts"]:
+                check(f"{scenario} {name}", "count", expected["counts"][name], amount)
+    return changes
+
+
+@click.command()
+@click.option(
+    "--scenario",
+    "scenarios",
+    type=click.Choice(list(SCENARIOS)),
+    multiple=True,
+    help="Scenario to run, can be repeated. Defaults to every scenario.",
+)
+@click.option("--repeat", type=click.IntRange(min=1), default=3, show_default=True, help="Timed runs per scenario.")
+@click.option(
+    "--baseline",
+    "baseline_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=BASELINE,
+    show_default=True,
+    help="Baseline to compare the results with.",
+)
+@click.option("--update", is_flag=True, default=False, help="Write the results to the baseline instead of comparing.")
+@click.option(
+    "--output", type=click.Path(dir_okay=False, path_type=Path), default=None, help="Also write the results here."
+)
+def main(scenarios, repeat, baseline_path, update, output):
+    """
+    Converts synthetic notebooks with presentpy and compares the time and memory of each stage, along with
+    the number of slides, elements and bytes written, against a baseline.
+
+    Exits with an error when a measurement is worse than the baseline by more than its tolerance. Timings
+    depend on the machine, regenerate the baseline with --update before making changes.
+    """
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    tolerances = {**DEFAULT_TOLERANCES, **baseline.get("tolerances", {})}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        # Themes are compiled into a cache of their own, the warm-up run of each scenario fills it
+        os.environ["PRESENTPY_CACHE_DIR"] = str(directory / "cache")
+        for name in scenarios or SCENARIOS:
+            notebook = write_notebook(SCENARIOS[name], directory / f"{name}.ipynb")
+            results[name] = measure(notebook, directory / f"{name}.odp", repeat)
+            seconds, peak_memory = results[name]["seconds"], results[name]["peak_memory"]
+            click.echo(f"{name}: {seconds:.3f}s, {peak_memory / 1024 / 1024:.1f} MB peak")
+
+    if output is not None:
+        output.write_text(json.dumps({"scenarios": results}, indent=2) + "\n")
+
+    if update:
+        scenarios_baseline = {**baseline.get("scenarios", {}), **results}
+        baseline = {"tolerances": tolerances, "scenarios": scenarios_baseline}
+        baseline_path.write_text(json.dumps(baseline, indent=2) + "\n")
+        click.echo(f"Baseline written to {baseline_path}")
+        return
+
+    changes = compare(results, baseline.get("scenarios", {}), tolerances)
+    regressions = [change for change in changes if change[3]]
+    for name, expected, actual, regressed in changes:
+        label = "slower" if regressed else "faster"
+        if not name.endswith("seconds"):
+            label = "worse" if regressed else "better"
+        change = (actual - expected) / expected if expected else float("inf")
+        click.echo(f"[{label}] {name}: {expected:g} -> {actual:g} ({change:+.1%})")
+
+    if regressions:
+        click.echo(f"{len(regressions)} measurements regressed past the baseline tolerances.", err=True)
+        sys.exit(1)
+    click.echo("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import base64
+import random
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Tuple
+
+import click
+import nbformat
+from nbformat import NotebookNode
+from PIL import Image, ImageDraw
+
+CODE_LINES = [
+    "import numpy as np",
+    "values = np.linspace(0, {n}, {m})",
+    "total = sum(value * {n} for value in values)  # running total",
+    'label = f"step {{total:.2f}}"',
+    "if total > {n}:",
+    "    total = total - {m}",
+    "def scale(x, factor={n}):",
+    '    """Scales x by factor."""',
+    "    return [item * factor for item in x]",
+    "results = {{'mean': np.mean(values), 'max': {n}.5}}",
+    'print("result", results["mean"], {m})',
+    "for i in range({m}):",
+    "    values[i] += i ** 2",
+]
+
+WORDS = "the quick brown fox jumps over lazy dogs while code runs in every notebook cell".split()
+
+
+@dataclass(frozen=True)
+class NotebookSpec:
+    """
+    The cells of a synthetic notebook, generated the same for the same ``seed``.
+
+    There are ``code_cells`` code cells of ``code_lines`` lines, the first ``highlight_steps`` lines of which
+    are highlighted one at a time, ``markdown_cells`` markdown cells, ``tables`` DataFrame outputs of
+    ``table_shape`` rows and columns, and ``images`` PNG outputs of ``image_size`` pixels.
+    """
+
+    code_cells: int = 0
+    code_lines: int = 10
+    highlight_steps: int = 0
+    markdown_cells: int = 0
+    tables: int = 0
+    table_shape: Tuple[int, int] = (20, 5)
+    table_schema: bool = False
+    images: int = 0
+    image_size: Tuple[int, int] = (800, 600)
+    seed: int = 0
+
+
+def code_source(rng: random.Random, lines: int, highlight_steps: int = 0) -> str:
+    source = [rng.choice(CODE_LINES).format(n=rng.randint(1, 999), m=rng.randint(1, 99)) for _ in range(lines)]
+    if highlight_steps:
+        steps = ",".join(str(line) for line in range(1, min(highlight_steps, lines) + 1))
+        source.append(f'#% highlights="{steps}"')
+    return "\n".join(source)
+
+
+def markdown_source(rng: random.Random) -> str:
+    def sentence():
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 12)))
+
+    items = "\n".join(f" - **{rng.choice(WORDS)}** {sentence()}" for _ in range(3))
+    return f"## {sentence().capitalize()}\n\n{sentence()} with `inline code`.\n\n{items}"
+
+
+def table_html(rng: random.Random, rows: int, columns: int) -> str:
+    """
+    Writes a table the way ``DataFrame.to_html`` does, with an index column.
+    """
+    header = "".join(f"<th>column_{column}</th>" for column in range(columns))
+    body = "".join(
+        f"<tr><th>{row}</th>" + "".join(f"<td>{rng.uniform(-100, 100):.6f}</td>" for _ in range(columns)) + "</tr>"
+        for row in range(rows)
+    )
+    return (
+        '<table border="1" class="dataframe">'
+        f'<thead><tr style="text-align: right;"><th></th>{header}</tr></thead>'
+        f"<tbody>{body}</tbody></table>"
+    )
+
+
+def table_resource(rng: random.Random, rows: int, columns: int) -> dict:
+    """
+    Writes a table the way pandas does with ``display.html.table_schema`` enabled.
+    """
+    fields = [{"name": "index", "type": "integer"}]
+    fields.extend({"name": f"column_{column}", "type": "number"} for column in range(columns))
+    data = [
+        {"index": row, **{f"column_{column}": rng.uniform(-100, 100) for column in range(columns)}}
+        for row in range(rows)
+    ]
+    return {"schema": {"fields": fields, "primaryKey": ["index"]}, "data": data}
+
+
+def image_png(rng: random.Random, size: Tuple[int, int]) -> str:
+    """
+    Draws a line chart, mostly flat colour like a plot, as a base64 PNG.
+    """
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    width, height = size
+    for _ in range(5):
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        points = [(x, rng.randrange(height)) for x in range(0, width, max(1, width // 50))]
+        draw.line(points, fill=colour, width=3)
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def generate_notebook(spec: NotebookSpec) -> NotebookNode:
+    """
+    Generates a notebook following ``spec``, its markdown, code, table and image cells are interleaved.
+    """
+    rng = random.Random(spec.seed)
+    code = [
+        nbformat.v4.new_code_cell(code_source(rng, spec.code_lines, spec.highlight_steps))
+        for _ in range(spec.code_cells)
+    ]
+    markdown = [nbformat.v4.new_markdown_cell(markdown_source(rng)) for _ in range(spec.markdown_cells)]
+
+    tables = []
+    for _ in range(spec.tables):
+        cell = nbformat.v4.new_code_cell(code_source(rng, 3))
+        data = {"text/html": table_html(rng, *spec.table_shape), "text/plain": "DataFrame"}
+        if spec.table_schema:
+            data["application/vnd.dataresource+json"] = table_resource(rng, *spec.table_shape)
+        cell.outputs = [nbformat.v4.new_output("execute_result", data=data, execution_count=1)]
+        tables.append(cell)
+
+    images = []
+    for _ in range(spec.images):
+        cell = nbformat.v4.new_code_cell(code_source(rng, 3))
+        data = {"image/png": image_png(rng, spec.image_size), "text/plain": "<Figure>"}
+        cell.outputs = [nbformat.v4.new_output("display_data", data=data)]
+        images.append(cell)
+
+    groups = [code, markdown, tables, images]
+    notebook = nbformat.v4.new_notebook()
+    # Round robin over the kinds of cells, so the slides alternate like in a real deck
+    while any(groups):
+        for group in groups:
+            if group:
+                notebook.cells.append(group.pop(0))
+    return notebook
+
+
+def write_notebook(spec: NotebookSpec, path: Path) -> Path:
+    nbformat.write(generate_notebook(spec), path)
+    return path
+
+
+@click.command()
+@click.argument("output", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--code-cells", type=click.IntRange(min=0), default=0)
+@click.option("--code-lines", type=click.IntRange(min=1), default=10)
+@click.option("--highlight-steps", type=click.IntRange(min=0), default=0)
+@click.option("--markdown-cells", type=click.IntRange(min=0), default=0)
+@click.option("--tables", type=click.IntRange(min=0), default=0)
+@click.option("--table-shape", type=(click.IntRange(min=1), click.IntRange(min=1)), default=(20, 5))
+@click.option("--table-schema", is_flag=True, default=False)
+@click.option("--images", type=click.IntRange(min=0), default=0)
+@click.option("--image-size", type=(click.IntRange(min=1), click.IntRange(min=1)), default=(800, 600))
+@click.option("--seed", type=int, default=0)
+def main(output: Path, **spec):
+    """
+    Writes a synthetic notebook to OUTPUT.
+    """
+    write_notebook(NotebookSpec(**spec), output)
+
+
+if __name__ == "__main__":
+    main()
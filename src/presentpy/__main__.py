@@ -1,38 +1,78 @@
+import sys
+import time
 from pathlib import Path
 
 import click
-import mistletoe
-import nbformat
-
-from presentpy.code_slide_source import CodeSlideSource
-from presentpy.namespaces import Namespaces
-from presentpy.writer.presentation import Presentation
-from presentpy.writer.theme import Theme
-
-odf_namespaces = {
-    "dom": "http://www.w3.org/2001/xml-events",
-    "draw": "urn:oasis:names:tc:opendocument:xmlns:drawing:1.0",
-    "fo": "urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0",
-    "loext": "urn:org:documentfoundation:names:experimental:office:xmlns:loext:1.0",
-    "manifest": "urn:oasis:names:tc:opendocument:xmlns:manifest:1.0",
-    "office": "urn:oasis:names:tc:opendocument:xmlns:office:1.0",
-    "presentation": "urn:oasis:names:tc:opendocument:xmlns:presentation:1.0",
-    "script": "urn:oasis:names:tc:opendocument:xmlns:script:1.0",
-    "smil": "urn:oasis:names:tc:opendocument:xmlns:smil-compatible:1.0",
-    "style": "urn:oasis:names:tc:opendocument:xmlns:style:1.0",
-    "svg": "urn:oasis:names:tc:opendocument:xmlns:svg-compatible:1.0",
-    "table": "urn:oasis:names:tc:opendocument:xmlns:table:1.0",
-    "text": "urn:oasis:names:tc:opendocument:xmlns:text:1.0",
-    "xlink": "http://www.w3.org/1999/xlink",
-}
+from nbformat import ValidationError
+from pygments.styles import get_style_by_name
+from pygments.util import ClassNotFound
+
+from presentpy.batch import DeckResult, expand_sources, plan_outputs, run_batch
+from presentpy.cache import default_cache_directory
+from presentpy.conversion import convert
+from presentpy.namespaces import Namespaces, odf_namespaces
+from presentpy.profiling import PROFILE_FORMATS, Profiler
+from presentpy.watch import watch
+from presentpy.writer.archive import DEFAULT_COMPRESSION_LEVEL, ArchiveOptions
+from presentpy.writer.images import ImageOptions
+from presentpy.writer.render_cache import DEFAULT_RENDER_CACHE_SIZE, RenderCache
+from presentpy.writer.tables import TableOptions
+from presentpy.writer.theme_bundle import load_theme
+
+
+def echo_result(result: DeckResult):
+    if result.ok:
+        click.echo(f"[ok]   {result.notebook} -> {result.output} ({result.slides} slides, {result.seconds:.2f}s)")
+    else:
+        click.echo(f"[fail] {result.notebook}: {result.error}", err=True)
+
+
+def echo_profile(profiler: Profiler, profile_format: str):
+    click.echo(profiler.to_json() if profile_format == "json" else profiler.to_table(), err=True)
+
+
+def watch_notebook(
+    notebook,
+    output,
+    theme,
+    namespaces,
+    with_outputs,
+    prettify,
+    render_cache,
+    image_options,
+    table_options,
+    archive_options,
+    validate,
+):
+    click.echo(f"Watching {notebook} for changes, press Ctrl+C to stop.")
+    try:
+        for result in watch(
+            notebook,
+            output,
+            theme,
+            namespaces,
+            with_outputs=with_outputs,
+            prettify=prettify,
+            render_cache=render_cache,
+            image_options=image_options,
+            table_options=table_options,
+            archive_options=archive_options,
+            validate=validate,
+        ):
+            echo_result(result)
+    except KeyboardInterrupt:
+        click.echo("Stopped watching.")
 
 
 @click.command()
-@click.argument("notebook", type=click.Path(exists=True))
+@click.argument("notebooks", nargs=-1, required=True)
 @click.option(
     "--output",
     default=".",
-    help="Directory or file path where the output ODP file will be saved. Defaults to the current directory.",
+    help=(
+        "Directory or file path where the output ODP file will be saved, or '-' to write it to stdout. "
+        "Defaults to the current directory. Must be a directory when converting more than one notebook."
+    ),
 )
 @click.option(
     "--theme",
@@ -62,32 +102,260 @@ odf_namespaces = {
     default=False,
     help="Include code cell outputs in the presentation.",
 )
-def process(notebook, output, theme, prettify, keep_intermediate, outputs):
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of worker processes used when converting several notebooks. Defaults to the number of CPUs.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="Do not read or write the on-disk cache of compiled themes.",
+)
+@click.option(
+    "--cell-cache",
+    is_flag=True,
+    default=False,
+    help="Cache rendered cells on disk and reuse them for cells that did not change since an earlier run.",
+)
+@click.option(
+    "--cell-cache-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_RENDER_CACHE_SIZE // (1024 * 1024),
+    show_default=True,
+    help="Size in megabytes the cell cache is trimmed to, least recently used cells are evicted first.",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    default=False,
+    help="Rebuild the deck every time the notebook is saved, reusing the cells that did not change.",
+)
+@click.option(
+    "--image-dpi",
+    type=click.FloatRange(min=1),
+    default=None,
+    help="Downscale images to at most this many pixels per inch of the area they take on the slide.",
+)
+@click.option(
+    "--image-quantize",
+    is_flag=True,
+    default=False,
+    help="Reduce images to a 256 colour palette when that makes them smaller.",
+)
+@click.option(
+    "--image-recompress",
+    is_flag=True,
+    default=False,
+    help="Recompress images losslessly when that makes them smaller.",
+)
+@click.option(
+    "--max-size",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    help="Size budget of each deck in megabytes, image settings are tightened until the deck fits.",
+)
+@click.option(
+    "--table-rows",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of rows of a DataFrame shown on each slide. Defaults to as many as fit on the slide.",
+)
+@click.option(
+    "--table-elide",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Only show this many rows from the start and the end of each DataFrame.",
+)
+@click.option(
+    "--compression-level",
+    type=click.IntRange(min=0, max=9),
+    default=DEFAULT_COMPRESSION_LEVEL,
+    show_default=True,
+    help="Deflate level of the XML files in the deck, from 1 for the fastest to 9 for the smallest, 0 stores them.",
+)
+@click.option(
+    "--validate",
+    is_flag=True,
+    default=False,
+    help=(
+        "Check notebooks against the nbformat schema before converting them. Notebooks are trusted by default, "
+        "skipping the check makes reading them faster."
+    ),
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    envvar="PRESENTPY_PROFILE",
+    help=(
+        "Print the time and peak memory of each stage of the conversion to stderr, also enabled by setting "
+        "PRESENTPY_PROFILE=1. Notebooks are then converted one at a time in this process, and tracing memory "
+        "slows the conversion down."
+    ),
+)
+@click.option(
+    "--profile-format",
+    type=click.Choice(PROFILE_FORMATS),
+    default="text",
+    show_default=True,
+    envvar="PRESENTPY_PROFILE_FORMAT",
+    help="Print the profile as a table or as JSON.",
+)
+def process(
+    notebooks,
+    output,
+    theme,
+    prettify,
+    keep_intermediate,
+    outputs,
+    jobs,
+    no_cache,
+    cell_cache,
+    cell_cache_size,
+    watch,
+    image_dpi,
+    image_quantize,
+    image_recompress,
+    max_size,
+    table_rows,
+    table_elide,
+    compression_level,
+    validate,
+    profile,
+    profile_format,
+):
     """
     A CLI tool to convert Jupyter Notebooks to slides.
+
+    NOTEBOOKS can be notebook files, directories (searched recursively for .ipynb files) or glob patterns.
     """
-    namespaces = Namespaces(odf_namespaces)
-    theme = Theme(theme, namespaces)
-    presentation = Presentation(theme, namespaces)
-    notebook = Path(notebook)
-    output = Path(output) / f"{notebook.stem}.odp" if Path(output).is_dir() else Path(output)
-
-    if notebook.suffix == ".ipynb":
-        with open(notebook) as f:
-            nb = nbformat.read(f, as_version=4)
-
-        for cell in nb.cells:
-            if cell.cell_type == "code":
-                code_slide = CodeSlideSource.from_code_cell(cell)
-                presentation.add_source_code(code_slide, with_output=outputs)
-            elif cell.cell_type == "markdown":
-                document = mistletoe.Document(cell.source)
-                presentation.add_content(document)
-
-    elif notebook.suffix == ".py":
-        with open(notebook) as f:
-            source = f.read()
-            code_slide = CodeSlideSource.from_source_code(source)
-            presentation.add_source_code(code_slide)
-
-    presentation.write(output, prettify=prettify, keep_intermediate=keep_intermediate)
+    try:
+        get_style_by_name(theme)
+    except ClassNotFound as e:
+        raise click.BadParameter(str(e), param_hint="'--theme'") from e
+
+    if cell_cache and no_cache:
+        raise click.UsageError("--cell-cache cannot be combined with --no-cache")
+
+    if profile:
+        # Resources are released in reverse, the profiler stops before its report is printed
+        context = click.get_current_context()
+        context.call_on_close(lambda: echo_profile(profiler, profile_format))
+        profiler = context.with_resource(Profiler())
+
+    cache_directory = None if no_cache else default_cache_directory()
+    render_cache = None
+    if cell_cache:
+        render_cache = RenderCache(cache_directory / "cells", max_size=cell_cache_size * 1024 * 1024)
+
+    image_options = None
+    if image_dpi or image_quantize or image_recompress or max_size:
+        image_options = ImageOptions(
+            dpi=image_dpi,
+            quantize=image_quantize,
+            recompress=image_recompress,
+            max_deck_size=int(max_size * 1024 * 1024) if max_size else None,
+        )
+
+    table_options = None
+    if table_rows or table_elide:
+        table_options = TableOptions(rows_per_slide=table_rows, elide=table_elide)
+
+    archive_options = ArchiveOptions(compression_level=compression_level)
+
+    if len(notebooks) == 1 and Path(notebooks[0]).is_file():
+        namespaces = Namespaces(odf_namespaces)
+        theme = load_theme(theme, namespaces, cache_directory=cache_directory)
+        notebook = Path(notebooks[0])
+        if watch:
+            if output == "-" or keep_intermediate:
+                raise click.UsageError("--watch writes the deck to a file and cannot keep intermediate files")
+            output = Path(output) / f"{notebook.stem}.odp" if Path(output).is_dir() else Path(output)
+            output = output.parent / f"{output.stem}.odp"
+            watch_notebook(
+                notebook,
+                output,
+                theme,
+                namespaces,
+                outputs,
+                prettify,
+                render_cache,
+                image_options,
+                table_options,
+                archive_options,
+                validate,
+            )
+            return
+        if output == "-":
+            if keep_intermediate:
+                raise click.BadParameter(
+                    "cannot keep intermediate files when writing to stdout", param_hint="'--output'"
+                )
+            output = sys.stdout.buffer
+        else:
+            output = Path(output) / f"{notebook.stem}.odp" if Path(output).is_dir() else Path(output)
+        try:
+            convert(
+                notebook,
+                output,
+                theme,
+                namespaces,
+                with_outputs=outputs,
+                prettify=prettify,
+                keep_intermediate=keep_intermediate,
+                render_cache=render_cache,
+                image_options=image_options,
+                table_options=table_options,
+                archive_options=archive_options,
+                validate=validate,
+            )
+        except ValidationError as e:
+            raise click.ClickException(f"{notebook} is not a valid notebook: {e.message}") from e
+        return
+
+    if watch:
+        raise click.UsageError("--watch needs a single notebook file")
+
+    output_directory = Path(output)
+    if output == "-" or (output_directory.exists() and not output_directory.is_dir()):
+        raise click.BadParameter("must be a directory when converting more than one notebook", param_hint="'--output'")
+
+    try:
+        batch_jobs = plan_outputs(expand_sources(notebooks), output_directory)
+    except ValueError as e:
+        raise click.UsageError(str(e)) from e
+
+    # Compile the theme bundle once up front so every worker finds it in the cache
+    load_theme(theme, Namespaces(odf_namespaces), cache_directory=cache_directory)
+
+    start = time.perf_counter()
+    failed = 0
+    results = run_batch(
+        batch_jobs,
+        theme,
+        outputs,
+        prettify,
+        keep_intermediate,
+        workers=1 if profile else jobs,
+        cache_directory=cache_directory,
+        render_cache=render_cache,
+        image_options=image_options,
+        table_options=table_options,
+        archive_options=archive_options,
+        validate=validate,
+    )
+    for result in results:
+        echo_result(result)
+        if not result.ok:
+            failed += 1
+
+    click.echo(
+        f"Converted {len(batch_jobs) - failed} of {len(batch_jobs)} notebooks "
+        f"in {time.perf_counter() - start:.2f}s, {failed} failed."
+    )
+    if failed:
+        sys.exit(1)
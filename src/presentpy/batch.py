@@ -0,0 +1,176 @@
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from presentpy.conversion import convert
+from presentpy.namespaces import Namespaces, odf_namespaces
+from presentpy.templates import Content, Styles
+from presentpy.templates.xml_file import read_template, template_files
+from presentpy.writer.archive import ArchiveOptions
+from presentpy.writer.images import ImageOptions
+from presentpy.writer.render_cache import RenderCache
+from presentpy.writer.tables import TableOptions
+from presentpy.writer.theme import Theme
+from presentpy.writer.theme_bundle import load_theme
+
+NOTEBOOK_SUFFIXES = (".ipynb", ".py")
+CHECKPOINTS_DIRECTORY = ".ipynb_checkpoints"
+
+
+@dataclass
+class DeckResult:
+    notebook: Path
+    output: Path
+    slides: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def expand_sources(patterns: Iterable[str]) -> List[Tuple[Path, Path]]:
+    """
+    Expands files, directories and glob patterns into a list of ``(notebook, relative_output)`` pairs.
+
+    Directories are searched recursively for ``.ipynb`` files and keep their structure in the output,
+    files and glob matches are written using only their stem.
+    """
+    sources = []
+    seen = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = [
+                (notebook, notebook.relative_to(path).with_suffix(".odp"))
+                for notebook in sorted(path.rglob("*.ipynb"))
+                if CHECKPOINTS_DIRECTORY not in notebook.parts
+            ]
+        elif path.is_file():
+            matches = [(path, Path(f"{path.stem}.odp"))]
+        else:
+            matches = [
+                (Path(match), Path(f"{Path(match).stem}.odp"))
+                for match in sorted(glob.glob(pattern, recursive=True))
+                if Path(match).is_file() and Path(match).suffix in NOTEBOOK_SUFFIXES
+            ]
+
+        if not matches:
+            raise ValueError(f"No notebooks found for {pattern!r}")
+
+        for notebook, relative_output in matches:
+            if notebook.resolve() in seen:
+                continue
+            seen.add(notebook.resolve())
+            sources.append((notebook, relative_output))
+
+    return sources
+
+
+def plan_outputs(sources: List[Tuple[Path, Path]], output_directory: Path) -> List[Tuple[Path, Path]]:
+    jobs = []
+    claimed = {}
+    for notebook, relative_output in sources:
+        output = output_directory / relative_output
+        if output in claimed:
+            raise ValueError(f"Both {claimed[output]} and {notebook} would be written to {output}")
+        claimed[output] = notebook
+        jobs.append((notebook, output))
+    return jobs
+
+
+_worker_namespaces: Optional[Namespaces] = None
+_worker_theme: Optional[Theme] = None
+_worker_render_cache: Optional[RenderCache] = None
+
+
+def _init_worker(theme_name: str, cache_directory: Optional[Path], render_cache: Optional[RenderCache] = None):
+    global _worker_namespaces, _worker_theme, _worker_render_cache
+    _worker_render_cache = render_cache
+    _worker_namespaces = Namespaces(odf_namespaces)
+    _worker_theme = load_theme(theme_name, _worker_namespaces, cache_directory=cache_directory)
+    for name in template_files():
+        read_template(name)
+    Content.for_theme(_worker_theme)
+    Styles.for_theme(_worker_theme)
+
+
+def _convert_in_worker(
+    notebook: Path,
+    output: Path,
+    with_outputs: bool,
+    prettify: bool,
+    keep_intermediate: bool,
+    image_options: Optional[ImageOptions],
+    table_options: Optional[TableOptions],
+    archive_options: Optional[ArchiveOptions],
+    validate: bool,
+):
+    start = time.perf_counter()
+    try:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        presentation = convert(
+            notebook,
+            output,
+            _worker_theme,
+            _worker_namespaces,
+            with_outputs=with_outputs,
+            prettify=prettify,
+            keep_intermediate=keep_intermediate,
+            render_cache=_worker_render_cache,
+            image_options=image_options,
+            table_options=table_options,
+            archive_options=archive_options,
+            validate=validate,
+        )
+    except Exception as e:
+        return DeckResult(notebook, output, seconds=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+    return DeckResult(notebook, output, slides=presentation.current_slide_count, seconds=time.perf_counter() - start)
+
+
+def run_batch(
+    jobs: List[Tuple[Path, Path]],
+    theme: str,
+    with_outputs: bool = False,
+    prettify: bool = False,
+    keep_intermediate: bool = False,
+    workers: Optional[int] = None,
+    cache_directory: Optional[Path] = None,
+    render_cache: Optional[RenderCache] = None,
+    image_options: Optional[ImageOptions] = None,
+    table_options: Optional[TableOptions] = None,
+    archive_options: Optional[ArchiveOptions] = None,
+    validate: bool = False,
+) -> Iterator[DeckResult]:
+    """
+    Converts every ``(notebook, output)`` pair, yielding a :class:`DeckResult` as each deck finishes.
+
+    Each worker process builds the theme and loads the templates once, reusing them for every notebook it is handed,
+    with ``workers=1`` the conversion runs in the current process. The theme is loaded from the compiled bundle
+    in ``cache_directory`` when one is given, and unchanged cells are reused from ``render_cache`` when one is given.
+    """
+    options = (with_outputs, prettify, keep_intermediate, image_options, table_options, archive_options, validate)
+
+    if workers == 1:
+        _init_worker(theme, cache_directory, render_cache)
+        for notebook, output in jobs:
+            yield _convert_in_worker(notebook, output, *options)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(theme, cache_directory, render_cache)
+    ) as executor:
+        futures = {
+            executor.submit(_convert_in_worker, notebook, output, *options): (notebook, output)
+            for notebook, output in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                notebook, output = futures[future]
+                yield DeckResult(notebook, output, error=f"{type(e).__name__}: {e}")
@@ -0,0 +1,36 @@
+import os
+import tempfile
+from pathlib import Path
+
+CACHE_DIRECTORY_ENVIRONMENT_VARIABLE = "PRESENTPY_CACHE_DIR"
+
+
+def default_cache_directory() -> Path:
+    """
+    Directory where presentpy keeps its on-disk caches, ``$PRESENTPY_CACHE_DIR`` takes precedence when set.
+    """
+    if directory := os.environ.get(CACHE_DIRECTORY_ENVIRONMENT_VARIABLE):
+        return Path(directory)
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "presentpy"
+
+
+def write_atomically(path: Path, data: bytes):
+    """
+    Writes ``data`` to ``path`` through a temporary file so concurrent readers never see a partial file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
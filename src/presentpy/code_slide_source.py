@@ -1,17 +1,27 @@
 import shlex
 from dataclasses import dataclass, field
-from typing import Any, List, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
-from nbformat import NotebookNode
 from pygments import lex
 from pygments.lexers import get_lexer_by_name
 from pygments.token import Token
 
+from presentpy.profiling import profiled
+from presentpy.readers import Cell
+from presentpy.table_schema import DATARESOURCE_MIME_TYPE
 
+
+@lru_cache(maxsize=None)
+def get_lexer(language: str):
+    return get_lexer_by_name(language)
+
+
+@profiled("lexing")
 def get_parsed_lines(source: str, language: str = "python") -> List[List[Tuple[Any, str]]]:
     lines = []
     line = []
-    lexer = get_lexer_by_name(language)
+    lexer = get_lexer(language)
     for token, value in lex(source, lexer):
         if token is Token.Text.Whitespace and value == "\n":
             lines.append(line)
@@ -68,9 +78,10 @@ class CodeOutputs:
     image_png: Optional[str] = None
     text_plain: Optional[str] = None
     text_html: Optional[str] = None
+    table_data: Optional[Dict[str, Any]] = None
 
     def __bool__(self):
-        return any([self.stream, self.image_png, self.text_plain, self.text_html])
+        return any([self.stream, self.image_png, self.text_plain, self.text_html, self.table_data])
 
     def get_text_lines(self):
         if self.text_plain:
@@ -107,7 +118,7 @@ class CodeSlideSource:
         )
 
     @classmethod
-    def from_code_cell(cls, cell: NotebookNode):
+    def from_code_cell(cls, cell: Cell):
         source_code, config = extract_config_from_source_code(cell.source)
 
         dataclass_attributes = {"title": config.get("title")}
@@ -116,19 +127,22 @@ class CodeSlideSource:
         if highlights := config.get("highlights"):
             dataclass_attributes["highlights"].extend(parse_highlights(highlights))
 
-        stream = [output for output in cell.outputs if output.output_type == "stream"]
-        execute_result = [output for output in cell.outputs if output.output_type == "execute_result"]
-        display_data = [output for output in cell.outputs if output.output_type == "display_data"]
+        # Outputs are read as mappings, they are plain dictionaries in a NotebookCell
+        stream = [output for output in cell.outputs if output["output_type"] == "stream"]
+        execute_result = [output for output in cell.outputs if output["output_type"] == "execute_result"]
+        display_data = [output for output in cell.outputs if output["output_type"] == "display_data"]
 
         outputs = {}
 
         if stream:
-            outputs["stream"] = stream[0].text.strip()
+            outputs["stream"] = stream[0].get("text", "").strip()
         if execute_result:
-            outputs["text_plain"] = execute_result[0].data.get("text/plain", "").strip()
-            outputs["text_html"] = execute_result[0].data.get("text/html", "").strip()
+            data = execute_result[0].get("data", {})
+            outputs["text_plain"] = data.get("text/plain", "").strip()
+            outputs["text_html"] = data.get("text/html", "").strip()
+            outputs["table_data"] = data.get(DATARESOURCE_MIME_TYPE)
         if display_data:
-            outputs["image_png"] = display_data[0].data.get("image/png")
+            outputs["image_png"] = display_data[0].get("data", {}).get("image/png")
 
         dataclass_attributes["output"] = CodeOutputs(**outputs)
 
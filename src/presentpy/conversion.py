@@ -0,0 +1,116 @@
+import time
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+import mistletoe
+
+from presentpy.code_slide_source import CodeSlideSource
+from presentpy.namespaces import Namespaces
+from presentpy.profiling import count, profiled, stage
+from presentpy.readers import Cell, iter_notebook_cells
+from presentpy.writer.archive import ArchiveOptions
+from presentpy.writer.images import ImageOptions
+from presentpy.writer.observer import PresentationObserver
+from presentpy.writer.presentation import Presentation
+from presentpy.writer.render_cache import CACHED_CELL_TYPES, RenderCache
+from presentpy.writer.tables import TableOptions
+from presentpy.writer.theme import Theme
+
+
+@profiled("slides")
+def render_cell(presentation: Presentation, cell: Cell, with_outputs: bool = False):
+    if cell.cell_type == "code":
+        code_slide = CodeSlideSource.from_code_cell(cell)
+        presentation.add_source_code(code_slide, with_output=with_outputs)
+    elif cell.cell_type == "markdown":
+        with stage("markdown"):
+            document = mistletoe.Document(cell.source)
+        presentation.add_content(document)
+
+
+def build_presentation(
+    notebook: Path,
+    theme: Theme,
+    namespaces: Namespaces,
+    with_outputs: bool = False,
+    render_cache: Optional[RenderCache] = None,
+    image_options: Optional[ImageOptions] = None,
+    table_options: Optional[TableOptions] = None,
+    archive_options: Optional[ArchiveOptions] = None,
+    observer: Optional[PresentationObserver] = None,
+    validate: bool = False,
+):
+    presentation = Presentation(
+        theme,
+        namespaces,
+        image_options=image_options,
+        table_options=table_options,
+        archive_options=archive_options,
+        observer=observer,
+    )
+
+    if notebook.suffix == ".ipynb":
+        # Cells are rendered as they are read, so large outputs are not all held in memory at once
+        for cell in iter_notebook_cells(notebook, validate=validate):
+            start = time.perf_counter()
+            cached = False
+            if render_cache is None or cell.cell_type not in CACHED_CELL_TYPES:
+                render_cell(presentation, cell, with_outputs=with_outputs)
+            else:
+                key = render_cache.key(cell, theme, with_outputs=with_outputs, table_options=table_options)
+                fragment = render_cache.get(key)
+                if fragment is None:
+                    presentation.start_fragment()
+                    render_cell(presentation, cell, with_outputs=with_outputs)
+                    render_cache.put(key, presentation.finish_fragment())
+                else:
+                    presentation.add_fragment(fragment)
+                    cached = True
+            presentation.observer.cell_rendered(cell.cell_type, time.perf_counter() - start, cached)
+
+        if render_cache is not None:
+            render_cache.prune()
+
+    elif notebook.suffix == ".py":
+        with stage("read"), open(notebook) as f:
+            source = f.read()
+        start = time.perf_counter()
+        with stage("slides"):
+            code_slide = CodeSlideSource.from_source_code(source)
+            presentation.add_source_code(code_slide)
+        presentation.observer.cell_rendered("code", time.perf_counter() - start, False)
+
+    count("slides", presentation.current_slide_count)
+    return presentation
+
+
+def convert(
+    notebook: Path,
+    output: Union[Path, BinaryIO],
+    theme: Theme,
+    namespaces: Namespaces,
+    with_outputs: bool = False,
+    prettify: bool = False,
+    keep_intermediate: bool = False,
+    render_cache: Optional[RenderCache] = None,
+    image_options: Optional[ImageOptions] = None,
+    table_options: Optional[TableOptions] = None,
+    archive_options: Optional[ArchiveOptions] = None,
+    observer: Optional[PresentationObserver] = None,
+    validate: bool = False,
+):
+    presentation = build_presentation(
+        notebook,
+        theme,
+        namespaces,
+        with_outputs=with_outputs,
+        render_cache=render_cache,
+        image_options=image_options,
+        table_options=table_options,
+        archive_options=archive_options,
+        observer=observer,
+        validate=validate,
+    )
+    with presentation:
+        presentation.write(output, prettify=prettify, keep_intermediate=keep_intermediate)
+    return presentation
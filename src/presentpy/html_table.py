@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Dict, Iterator, List
+
+from lxml import etree
+
+
+@dataclass
+class TableCell:
+    text: str = ""
+    header: bool = False
+    row_span: int = 1
+    column_span: int = 1
+    covered: bool = False
+
+
+@dataclass
+class TableRow:
+    cells: List[TableCell]
+    header: bool = False
+
+
+def _span(element: etree._Element, attribute: str) -> int:
+    try:
+        return max(1, int(element.get(attribute, 1)))
+    except ValueError:
+        return 1
+
+
+def iter_table_rows(html: str) -> Iterator[TableRow]:
+    """
+    Yields the rows of the first ``table.dataframe`` in ``html``, as they are parsed and in document order.
+
+    Every row has one cell per column: positions taken by a ``rowspan`` or ``colspan`` from another cell,
+    like the index levels and column groups of a MultiIndex, are filled with covered cells. Rows in ``thead``
+    are header rows.
+    """
+    in_table = False
+    in_header = False
+    # Column -> number of rows still covered by a rowspan from a row above
+    spans: Dict[int, int] = {}
+
+    def covered(column):
+        spans[column] -= 1
+        if not spans[column]:
+            del spans[column]
+        return TableCell(covered=True)
+
+    events = etree.iterparse(
+        BytesIO(html.encode()), events=("start", "end"), html=True, encoding="utf-8", tag=("table", "thead", "tr")
+    )
+    for event, element in events:
+        if element.tag == "table":
+            if event == "start" and "dataframe" in element.get("class", "").split():
+                in_table = True
+            elif event == "end" and in_table:
+                return
+            continue
+        if not in_table:
+            continue
+        if element.tag == "thead":
+            in_header = event == "start"
+            continue
+        if event == "start":
+            continue
+
+        cells = []
+        for cell in element.iterchildren("th", "td"):
+            while len(cells) in spans:
+                cells.append(covered(len(cells)))
+            column = len(cells)
+            row_span = _span(cell, "rowspan")
+            column_span = _span(cell, "colspan")
+            text = "".join(cell.itertext())
+            cells.append(TableCell(text, cell.tag == "th", row_span, column_span))
+            cells.extend(TableCell(covered=True) for _ in range(column_span - 1))
+            if row_span > 1:
+                for spanned_column in range(column, column + column_span):
+                    spans[spanned_column] = row_span - 1
+        while len(cells) in spans:
+            cells.append(covered(len(cells)))
+
+        yield TableRow(cells, header=in_header)
+
+        # Parsed rows are dropped so only the row being read is kept in memory
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
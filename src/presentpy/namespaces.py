@@ -1,12 +1,47 @@
+import sys
 from collections import UserDict
 
+odf_namespaces = {
+    "dom": "http://www.w3.org/2001/xml-events",
+    "draw": "urn:oasis:names:tc:opendocument:xmlns:drawing:1.0",
+    "fo": "urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0",
+    "loext": "urn:org:documentfoundation:names:experimental:office:xmlns:loext:1.0",
+    "manifest": "urn:oasis:names:tc:opendocument:xmlns:manifest:1.0",
+    "office": "urn:oasis:names:tc:opendocument:xmlns:office:1.0",
+    "presentation": "urn:oasis:names:tc:opendocument:xmlns:presentation:1.0",
+    "script": "urn:oasis:names:tc:opendocument:xmlns:script:1.0",
+    "smil": "urn:oasis:names:tc:opendocument:xmlns:smil-compatible:1.0",
+    "style": "urn:oasis:names:tc:opendocument:xmlns:style:1.0",
+    "svg": "urn:oasis:names:tc:opendocument:xmlns:svg-compatible:1.0",
+    "table": "urn:oasis:names:tc:opendocument:xmlns:table:1.0",
+    "text": "urn:oasis:names:tc:opendocument:xmlns:text:1.0",
+    "xlink": "http://www.w3.org/1999/xlink",
+}
+
 
 class Namespaces(UserDict):
+    def __init__(self, *args, **kwargs):
+        self._resolved = {}
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, key, value):
+        self._resolved.clear()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._resolved.clear()
+        super().__delitem__(key)
+
     def __call__(self, tag, *args, **kwargs):
         return self.resolve(tag)
 
     def resolve(self, tag):
-        ns, _, tag = tag.rpartition(":")
-        if ns == "":
-            return tag
-        return f"{{{self[ns]}}}{tag}"
+        try:
+            return self._resolved[tag]
+        except KeyError:
+            pass
+
+        ns, _, name = tag.rpartition(":")
+        resolved = name if ns == "" else sys.intern(f"{{{self[ns]}}}{name}")
+        self._resolved[tag] = resolved
+        return resolved
@@ -0,0 +1,177 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from functools import wraps
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+PROFILE_FORMATS = ("text", "json")
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    seconds: float = 0.0
+    peak_memory: int = 0
+
+
+@dataclass
+class _Frame:
+    start: float
+    memory: int
+    peak: int
+    nested_seconds: float = 0.0
+
+
+class Profiler:
+    """
+    Times the stages of a conversion, e.g. lexing or zipping, and counts what they produce while it is active.
+
+    The time of a stage excludes the stages nested in it, so the stages add up to the time spent in any of them.
+    The peak memory of a stage is the most memory traced by :mod:`tracemalloc` on top of what was allocated
+    when it started, nested stages included.
+    """
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, StageStats] = {}
+        self.counts: Dict[str, int] = {}
+        self.seconds = 0.0
+        self._stack: List[_Frame] = []
+        self._started_tracing = False
+        self._token = None
+        self._start = 0.0
+
+    def __enter__(self) -> "Profiler":
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._token = _active_profiler.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.seconds += time.perf_counter() - self._start
+        _active_profiler.reset(self._token)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _traced_memory(self):
+        return tracemalloc.get_traced_memory() if self.trace_memory else (0, 0)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        memory, peak = self._traced_memory()
+        if self._stack:
+            self._stack[-1].peak = max(self._stack[-1].peak, peak)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        frame = _Frame(time.perf_counter(), memory, memory)
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - frame.start
+            self._stack.pop()
+            peak = max(frame.peak, self._traced_memory()[1])
+
+            stats = self.stages.setdefault(name, StageStats())
+            stats.calls += 1
+            stats.seconds += elapsed - frame.nested_seconds
+            stats.peak_memory = max(stats.peak_memory, peak - frame.memory)
+            if self._stack:
+                self._stack[-1].nested_seconds += elapsed
+                self._stack[-1].peak = max(self._stack[-1].peak, peak)
+
+    def count(self, name: str, amount: int = 1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "seconds": self.seconds,
+            "stages": {name: asdict(stats) for name, stats in self.stages.items()},
+            "counts": dict(self.counts),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_table(self) -> str:
+        """
+        Formats the stages and counts as a table, with the time spent outside any stage as ``other``.
+        """
+        rows = [("stage", "calls", "seconds", "share", "peak memory")]
+        staged = 0.0
+        for name, stats in self.stages.items():
+            staged += stats.seconds
+            seconds = f"{stats.seconds:.3f}"
+            rows.append((name, str(stats.calls), seconds, self._share(stats.seconds), _size(stats.peak_memory)))
+        other = max(0.0, self.seconds - staged)
+        rows.append(("other", "", f"{other:.3f}", self._share(other), ""))
+        rows.append(("total", "", f"{self.seconds:.3f}", "", ""))
+
+        widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+        # Stage names are aligned left, numbers right
+        lines = []
+        for row in rows:
+            cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+            lines.append("  ".join(cells).rstrip())
+        if self.counts:
+            name_width = max(len(name) for name in self.counts)
+            lines.append("")
+            lines.extend(f"{name.ljust(name_width)}  {amount}" for name, amount in self.counts.items())
+        return "\n".join(lines)
+
+    def _share(self, seconds: float) -> str:
+        return f"{100 * seconds / self.seconds:.1f}%" if self.seconds else ""
+
+
+def _size(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+_active_profiler: ContextVar[Optional[Profiler]] = ContextVar("presentpy_profiler", default=None)
+
+
+def active_profiler() -> Optional[Profiler]:
+    return _active_profiler.get()
+
+
+def stage(name: str) -> ContextManager[None]:
+    """
+    Times the code in the ``with`` block as the stage ``name`` of the active profiler, if there is one.
+    """
+    profiler = _active_profiler.get()
+    return nullcontext() if profiler is None else profiler.stage(name)
+
+
+def profiled(name: str):
+    """
+    Decorates a function to time every call as the stage ``name`` of the active profiler, if there is one.
+    """
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = _active_profiler.get()
+            if profiler is None:
+                return function(*args, **kwargs)
+            with profiler.stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name: str, amount: int = 1):
+    profiler = _active_profiler.get()
+    if profiler is not None:
+        profiler.count(name, amount)
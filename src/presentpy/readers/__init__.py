@@ -0,0 +1 @@
+from .notebook import Cell, NotebookCell, iter_notebook_cells
@@ -1 +1,228 @@
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, TextIO, Union
 
+import nbformat
+from nbformat import NotebookNode
+
+from presentpy.profiling import stage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+READ_SIZE = 1024 * 1024
+JSON_WHITESPACE = " \t\n\r"
+
+
+def loads(data: bytes) -> Any:
+    """
+    Decodes a JSON document with orjson when it is installed, or with the standard library.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class JSONStream:
+    """
+    Reads the JSON document in ``file`` a value at a time, only holding the value being decoded in memory.
+
+    A value is decoded once all of it has been read, each attempt reads as much as the buffer already holds,
+    so a large value is read in a few attempts whatever its size.
+    """
+
+    def __init__(self, file: TextIO, read_size: int = READ_SIZE):
+        self.file = file
+        self.read_size = read_size
+        self.buffer = ""
+        self.position = 0
+        self._decoder = json.JSONDecoder()
+
+    def _read(self, size: int) -> bool:
+        data = self.file.read(size)
+        if not data:
+            return False
+        # What was decoded already is dropped
+        self.buffer = self.buffer[self.position :] + data
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Returns the next character that is not whitespace without consuming it, or ``""`` at the end of the file.
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in JSON_WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer) or not self._read(self.read_size):
+                return self.buffer[self.position : self.position + 1]
+
+    def expect(self, characters: str) -> str:
+        """
+        Consumes the next character, which has to be one of ``characters``.
+        """
+        character = self.peek()
+        if not character or character not in characters:
+            found = repr(character) if character else "the end of the file"
+            raise ValueError(f"Notebook is not valid JSON, expected one of {characters!r} but found {found}")
+        self.position += 1
+        return character
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self._read(max(self.read_size, len(self.buffer))):
+                    raise
+                continue
+            # A number that ends the buffer could go on in the next read
+            if end == len(self.buffer) and not isinstance(value, (str, list, dict)) and self._read(self.read_size):
+                continue
+            self.position = end
+            return value
+
+    def items(self) -> Iterator[Any]:
+        """
+        Yields the values of the array that starts at the current position, one at a time.
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.position += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+
+def _join(value: Any) -> Any:
+    # Multiline strings are stored as lists of lines, like nbformat.read the lines are joined back
+    return "".join(value) if isinstance(value, list) else value
+
+
+def _is_json_mime(mime: str) -> bool:
+    return mime == "application/json" or (mime.startswith("application/") and mime.endswith("+json"))
+
+
+def _join_output(output: Dict[str, Any]) -> Dict[str, Any]:
+    if "text" in output:
+        output["text"] = _join(output["text"])
+    if "data" in output:
+        output["data"] = {
+            mime: value if _is_json_mime(mime) else _join(value) for mime, value in output["data"].items()
+        }
+    return output
+
+
+@dataclass
+class NotebookCell:
+    """
+    A notebook cell as the fast reader yields it, its outputs are the plain dictionaries decoded from the file.
+
+    Only what presentpy reads is kept, unlike a :class:`NotebookNode` the outputs are not wrapped.
+    """
+
+    cell_type: str
+    source: str
+    outputs: List[Dict[str, Any]] = field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, value: Dict[str, Any]) -> "NotebookCell":
+        return cls(
+            cell_type=value["cell_type"],
+            source=_join(value.get("source", "")),
+            outputs=[_join_output(output) for output in value.get("outputs", [])],
+            metadata=value.get("metadata", {}),
+        )
+
+
+Cell = Union[NotebookCell, NotebookNode]
+
+
+def _read_validated(path: Path) -> List[NotebookNode]:
+    with open(path, encoding="utf-8") as f:
+        notebook = nbformat.convert(nbformat.reader.reads(f.read()), 4)
+    # Raises nbformat.ValidationError, nbformat.read would only log it
+    nbformat.validate(notebook)
+    return notebook.cells
+
+
+def _read_whole(path: Path) -> Iterator[Cell]:
+    with stage("read"):
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            notebook = loads(data)
+        except ValueError as e:
+            raise ValueError(f"Notebook is not valid JSON, {e}") from e
+        if not isinstance(notebook, dict):
+            raise ValueError("Notebook is not valid JSON, expected an object")
+        if notebook.get("nbformat", 4) < 4 or "worksheets" in notebook:
+            cells = nbformat.read(path, as_version=4).cells
+        else:
+            cells = [NotebookCell.from_dict(cell) for cell in notebook.get("cells", [])]
+    yield from cells
+
+
+def iter_notebook_cells(path: Path, read_size: int = READ_SIZE, validate: bool = False) -> Iterator[Cell]:
+    """
+    Yields the cells of the notebook at ``path`` as :class:`NotebookCell` objects, without validating the notebook.
+
+    A notebook that fits in ``read_size`` is decoded in one go, with orjson when it is installed. A larger one is
+    parsed a cell at a time as it is read, so only one cell is held in memory at a time. Notebooks written before
+    nbformat 4 are read whole with nbformat and converted.
+
+    With ``validate`` the notebook is read whole with nbformat and checked against its schema, raising
+    :class:`nbformat.ValidationError` when it does not match, and the cells are yielded as :class:`NotebookNode`.
+    """
+    if validate:
+        with stage("read"):
+            cells = _read_validated(path)
+        yield from cells
+        return
+
+    if os.path.getsize(path) <= read_size:
+        yield from _read_whole(path)
+        return
+
+    with open(path, encoding="utf-8") as f:
+        stream = JSONStream(f, read_size)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            with stage("read"):
+                key = stream.value()
+                stream.expect(":")
+
+            if key == "cells":
+                cells = stream.items()
+                while True:
+                    with stage("read"):
+                        cell = next(cells, None)
+                        if cell is not None:
+                            cell = NotebookCell.from_dict(cell)
+                    if cell is None:
+                        break
+                    yield cell
+            elif key == "worksheets":
+                break
+            else:
+                with stage("read"):
+                    value = stream.value()
+                if key == "nbformat" and value < 4:
+                    break
+
+            if stream.expect(",}") == "}":
+                return
+
+    with stage("read"):
+        notebook = nbformat.read(path, as_version=4)
+    yield from notebook.cells
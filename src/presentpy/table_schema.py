@@ -0,0 +1,97 @@
+import math
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from presentpy.html_table import TableCell, TableRow
+
+DATARESOURCE_MIME_TYPE = "application/vnd.dataresource+json"
+NUMBER_PRECISION = 6
+
+# Names pandas gives index levels that have none, shown as an empty header like in its HTML output
+_UNNAMED_INDEX = re.compile(r"index|level_\d+")
+
+
+def _format_numbers(values: List[Any]) -> List[str]:
+    finite = [value for value in values if isinstance(value, (int, float)) and math.isfinite(value)]
+    if all(isinstance(value, int) for value in finite):
+        return ["NaN" if value is None else str(value) for value in values]
+
+    if any(0 < abs(value) < 10**-NUMBER_PRECISION for value in finite):
+        # Like pandas, a column with values that would show as zero is written with exponents
+        formatted = {value: f"{value:.{NUMBER_PRECISION}e}" for value in finite}
+        trailing_zeros = 0
+    else:
+        # Every value of a column gets the same number of decimals, as few as the column allows
+        formatted = {value: f"{value:.{NUMBER_PRECISION}f}" for value in finite}
+        trailing_zeros = min(len(text) - len(text.rstrip("0")) for text in formatted.values())
+        trailing_zeros = min(trailing_zeros, NUMBER_PRECISION - 1)
+    texts = []
+    for value in values:
+        if value in formatted:
+            texts.append(formatted[value][: len(formatted[value]) - trailing_zeros])
+        else:
+            texts.append(str(value) if value is not None else "NaN")
+    return texts
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.removesuffix("Z"))
+    except ValueError:
+        return None
+
+
+def _format_datetimes(values: List[Any]) -> List[str]:
+    parsed = [_parse_datetime(value) for value in values]
+    dates_only = all(value.time() == datetime.min.time() for value in parsed if value is not None)
+    texts = []
+    for value, parsed_value in zip(values, parsed):
+        if parsed_value is None:
+            texts.append("NaT" if value is None else str(value))
+        elif dates_only:
+            texts.append(parsed_value.date().isoformat())
+        else:
+            texts.append(parsed_value.isoformat(sep=" "))
+    return texts
+
+
+def format_column(values: List[Any], field_type: str) -> List[str]:
+    """
+    Formats the values of one column for display according to its table schema type.
+    """
+    if field_type in ("number", "integer"):
+        return _format_numbers(values)
+    if field_type == "datetime":
+        return _format_datetimes(values)
+    return ["" if value is None else str(value) for value in values]
+
+
+def iter_schema_rows(resource: Dict[str, Any]) -> Iterator[TableRow]:
+    """
+    Yields the rows of an ``application/vnd.dataresource+json`` output: a header row with the field names,
+    then one row per record. The fields of the primary key, the DataFrame index, are header cells.
+    """
+    schema = resource.get("schema", {})
+    fields = schema.get("fields", [])
+    primary_key = set(schema.get("primaryKey", []))
+    records = resource.get("data", [])
+
+    columns = [
+        format_column([record.get(field["name"]) for record in records], field.get("type", "string"))
+        for field in fields
+    ]
+
+    header = []
+    for field in fields:
+        name = str(field["name"])
+        unnamed_index = field["name"] in primary_key and _UNNAMED_INDEX.fullmatch(name)
+        header.append(TableCell("" if unnamed_index else name, header=True))
+    yield TableRow(header, header=True)
+
+    for row_no in range(len(records)):
+        yield TableRow(
+            [TableCell(column[row_no], header=field["name"] in primary_key) for field, column in zip(fields, columns)]
+        )
@@ -1,5 +1,7 @@
+from copy import deepcopy
+from io import BytesIO
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Set, Union
 
 from lxml import etree
 
@@ -10,92 +12,112 @@ from presentpy.constants import (
     OUTPUT_FRAME_STYLE_NAME,
 )
 from presentpy.namespaces import Namespaces
-from presentpy.templates.xml_file import XMLFile
+from presentpy.templates.xml_file import ThemedXMLFile, prettify_xml
+from presentpy.writer.slide_stream import SlideStream
 from presentpy.writer.theme import Theme
 
+SLIDES_PLACEHOLDER = "presentpy:slides"
 
-class Content(XMLFile):
 
-    def __init__(self, path: Path, namespaces: Namespaces, theme: Theme):
-        super().__init__(path, namespaces)
-        self.theme = theme
-        self.automatic_styles = self.xpath("office:document-content", "office:automatic-styles")
-        self.styles = self.xpath("office:document-content", "office:styles")
-        self.presentation = self.xpath("office:document-content", "office:body", "office:presentation")
+CONTENT_SPAN_STYLE_NAMES = (
+    "content_span",
+    "content_span__strong",
+    "content_span__strikethrough",
+    "content_span__emphasis",
+    "content_span__underline",
+)
+
+
+class Content(ThemedXMLFile):
+    template_name = "content.xml"
+
+    def __init__(self, source: Union[Path, bytes, etree._Element], namespaces: Namespaces, theme: Theme):
+        super().__init__(source, namespaces, theme)
+        self._bind()
 
-        drawing_page_properties = self.xpath(
-            "office:document-content",
-            "office:automatic-styles",
-            f"style:style[@style:name='{DEFAULT_STYLE_NAME_FOR_CONTENT}']",
+        styles = self.styles_by_name(self.automatic_styles)
+        self.set_properties(
+            styles[DEFAULT_STYLE_NAME_FOR_CONTENT],
             "style:drawing-page-properties",
+            {"draw:fill-color": self.theme.background_color},
         )
-        drawing_page_properties.set(namespaces("draw:fill-color"), self.theme.background_color)
-
-        master_title_text_properties = self.xpath(
-            "office:document-content",
-            "office:automatic-styles",
-            "style:style[@style:name='masterTitleSpan']",
+        self.set_properties(
+            styles["masterTitleSpan"],
             "style:text-properties",
+            {
+                "fo:color": self.theme.title_color,
+                "fo:font-size": self.theme.title_font_size,
+                "style:font-size-asian": self.theme.title_font_size,
+                "style:font-size-complex": self.theme.title_font_size,
+            },
         )
-        master_title_text_properties.set(namespaces("fo:color"), self.theme.title_color)
-        master_title_text_properties.set(namespaces("fo:font-size"), self.theme.title_font_size)
-        master_title_text_properties.set(namespaces("style:font-size-asian"), self.theme.title_font_size)
-        master_title_text_properties.set(namespaces("style:font-size-complex"), self.theme.title_font_size)
-
-        for span_styles in [
-            "content_span",
-            "content_span__strong",
-            "content_span__strikethrough",
-            "content_span__emphasis",
-            "content_span__underline",
-        ]:
-            master_content_text_properties = self.xpath(
-                "office:document-content",
-                "office:automatic-styles",
-                f"style:style[@style:name='{span_styles}']",
+        for span_style in CONTENT_SPAN_STYLE_NAMES:
+            self.set_properties(
+                styles[span_style],
                 "style:text-properties",
+                {
+                    "fo:color": self.theme.content_color,
+                    "fo:font-size": self.theme.content_font_size,
+                    "style:font-size-asian": self.theme.content_font_size,
+                    "style:font-size-complex": self.theme.content_font_size,
+                },
             )
-            master_content_text_properties.set(namespaces("fo:color"), self.theme.content_color)
-            master_content_text_properties.set(namespaces("fo:font-size"), self.theme.content_font_size)
-            master_content_text_properties.set(namespaces("style:font-size-asian"), self.theme.content_font_size)
-            master_content_text_properties.set(namespaces("style:font-size-complex"), self.theme.content_font_size)
-
-        default_slide_properties = self.xpath(
-            "office:document-content",
-            "office:automatic-styles",
-            f"style:style[@style:name='{DRAWING_PAGE_STYLE_NAME}']",
+        self.set_properties(
+            styles[DRAWING_PAGE_STYLE_NAME],
             "style:drawing-page-properties",
+            {"draw:fill-color": self.theme.background_color},
         )
-        default_slide_properties.set(namespaces("draw:fill-color"), self.theme.background_color)
-
-        highlighted_code_paragraph_style = self.xpath(
-            "office:document-content",
-            "office:automatic-styles",
-            f"style:style[@style:name='{CODE_HIGHLIGHT_PARAGRAPH_STYLE_NAME}']",
+        self.set_properties(
+            styles[CODE_HIGHLIGHT_PARAGRAPH_STYLE_NAME],
             "style:text-properties",
+            {"fo:background-color": self.theme.highlight_color, "fo:font-weight": "bold"},
         )
-        highlighted_code_paragraph_style.set(namespaces("fo:background-color"), self.theme.highlight_color)
-        highlighted_code_paragraph_style.set(namespaces("fo:font-weight"), "bold")
-
-        output_frame_text_properties = self.xpath(
-            "office:document-content",
-            "office:automatic-styles",
-            f"style:style[@style:name='{OUTPUT_FRAME_STYLE_NAME}']",
+        self.set_properties(
+            styles[OUTPUT_FRAME_STYLE_NAME],
             "style:text-properties",
+            {"fo:color": self.theme.content_color},
         )
-        output_frame_text_properties.set(namespaces("fo:color"), self.theme.content_color)
-
-        list_level_style_bullet = self.xpath(
-            "office:document-content",
-            "office:automatic-styles",
-            "text:list-style[@style:name='list']",
-            "text:list-level-style-bullet",
-            single=False,
-        )
-        for bullet in list_level_style_bullet:
-            text_properties = bullet.xpath("style:text-properties", namespaces=self.namespaces.data)[0]
-            text_properties.set(namespaces("fo:color"), self.theme.content_color)
+        for bullet in styles["list"].iterfind(namespaces("text:list-level-style-bullet")):
+            self.set_properties(bullet, "style:text-properties", {"fo:color": self.theme.content_color})
+
+        for style in self.theme.styles:
+            self.automatic_styles.append(deepcopy(style.to_element()))
+
+    def _bind(self):
+        self.automatic_styles = self.child(self.xml, "office:automatic-styles")
+        self.styles = self.child(self.xml, "office:styles")
+        self.presentation = self.child(self.child(self.xml, "office:body"), "office:presentation")
+
+    def remove_styles(self, names: Set[str]):
+        """
+        Removes the automatic styles named in ``names``.
+        """
+        style_name = self.namespaces("style:name")
+        for style in list(self.automatic_styles):
+            if style.get(style_name) in names:
+                self.automatic_styles.remove(style)
 
-    def write(self, path: Optional[Path] = None, prettify: bool = False):
+    def to_bytes(self, prettify=False):
         etree.indent(self.automatic_styles)
-        super().write(path, prettify=prettify)
+        return super().to_bytes(prettify=prettify)
+
+    def write_slides(self, fileobj: BinaryIO, slides: SlideStream, prettify: bool = False):
+        """
+        Writes the document to ``fileobj`` with the already serialised ``slides`` spliced into ``office:presentation``.
+        """
+        placeholder = etree.Comment(SLIDES_PLACEHOLDER)
+        self.presentation.append(placeholder)
+        try:
+            head, _, tail = self.to_bytes().partition(etree.tostring(placeholder))
+        finally:
+            self.presentation.remove(placeholder)
+
+        if prettify:
+            body = BytesIO()
+            slides.copy_to(body)
+            fileobj.write(prettify_xml(head + body.getvalue() + tail))
+            return
+
+        fileobj.write(head)
+        slides.copy_to(fileobj)
+        fileobj.write(tail)
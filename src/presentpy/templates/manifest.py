@@ -1,4 +1,7 @@
 from pathlib import Path
+from typing import Union
+
+from lxml import etree
 
 from presentpy.namespaces import Namespaces
 from presentpy.templates.xml_file import XMLFile
@@ -7,10 +10,10 @@ from presentpy.writer.tag import Tag
 
 class Manifest(XMLFile):
 
-    def __init__(self, path: Path, namespaces: Namespaces):
-        super().__init__(path, namespaces)
+    def __init__(self, source: Union[Path, bytes, etree._Element], namespaces: Namespaces):
+        super().__init__(source, namespaces)
 
-        self.manifest = self.xpath("manifest:manifest")
+        self.manifest = self.xml
 
     def add_file_entry(self, path: Path, media_type: str):
 
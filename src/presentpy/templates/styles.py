@@ -1,4 +1,8 @@
+from copy import deepcopy
 from pathlib import Path
+from typing import List, Set, Tuple, Union
+
+from lxml import etree
 
 from presentpy.constants import (
     CODE_HIGHLIGHT_PARAGRAPH_STYLE_NAME,
@@ -8,7 +12,8 @@ from presentpy.constants import (
     OUTPUT_FRAME_STYLE_NAME,
 )
 from presentpy.namespaces import Namespaces
-from presentpy.templates.xml_file import XMLFile
+from presentpy.templates.content import CONTENT_SPAN_STYLE_NAMES
+from presentpy.templates.xml_file import ThemedXMLFile
 from presentpy.writer.slide_tag import (
     BlankSlide,
     ImageSlide,
@@ -23,122 +28,145 @@ from presentpy.writer.tag import Tag
 from presentpy.writer.theme import Theme
 
 
-class Styles(XMLFile):
-
-    def __init__(self, path: Path, namespaces: Namespaces, theme: Theme):
-        super().__init__(path, namespaces)
-        self.theme = theme
+class Styles(ThemedXMLFile):
+    template_name = "styles.xml"
 
-        self.automatic_styles = self.xpath("office:document-styles", "office:automatic-styles")
-        self.styles = self.xpath("office:document-styles", "office:styles")
+    def __init__(self, source: Union[Path, bytes, etree._Element], namespaces: Namespaces, theme: Theme):
+        super().__init__(source, namespaces, theme)
+        self._bind()
 
-        page_layout_properties = self.xpath(
-            "office:document-styles",
-            "office:automatic-styles",
-            f"style:page-layout[@style:name='{DEFAULT_PAGE_LAYOUT_NAME}']",
+        styles = self.styles_by_name(self.automatic_styles)
+        self.set_properties(
+            styles[DEFAULT_PAGE_LAYOUT_NAME],
             "style:page-layout-properties",
+            {"fo:page-width": f"{self.theme.width:.2f}in", "fo:page-height": f"{self.theme.height:.2f}in"},
         )
-        page_layout_properties.set(namespaces("fo:page-width"), f"{self.theme.width:.2f}in")
-        page_layout_properties.set(namespaces("fo:page-height"), f"{self.theme.height:.2f}in")
-
-        drawing_page_properties = self.xpath(
-            "office:document-styles",
-            "office:automatic-styles",
-            f"style:style[@style:name='{DEFAULT_STYLE_NAME}']",
+        self.set_properties(
+            styles[DEFAULT_STYLE_NAME],
             "style:drawing-page-properties",
+            {"draw:fill-color": self.theme.background_color},
         )
-        drawing_page_properties.set(namespaces("draw:fill-color"), self.theme.background_color)
-
-        master_title_text_properties = self.xpath(
-            "office:document-styles",
-            "office:automatic-styles",
-            "style:style[@style:name='masterTitleSpan']",
+        self.set_properties(
+            styles["masterTitleSpan"],
             "style:text-properties",
+            {
+                "fo:color": self.theme.title_color,
+                "fo:font-size": self.theme.title_font_size,
+                "style:font-size-asian": self.theme.title_font_size,
+                "style:font-size-complex": self.theme.title_font_size,
+            },
         )
-        master_title_text_properties.set(namespaces("fo:color"), self.theme.title_color)
-        master_title_text_properties.set(namespaces("fo:font-size"), self.theme.title_font_size)
-        master_title_text_properties.set(namespaces("style:font-size-asian"), self.theme.title_font_size)
-        master_title_text_properties.set(namespaces("style:font-size-complex"), self.theme.title_font_size)
-
-        for span_styles in [
-            "content_span",
-            "content_span__strong",
-            "content_span__strikethrough",
-            "content_span__emphasis",
-            "content_span__underline",
-        ]:
-            master_content_text_properties = self.xpath(
-                "office:document-styles",
-                "office:automatic-styles",
-                f"style:style[@style:name='{span_styles}']",
+        for span_style in CONTENT_SPAN_STYLE_NAMES:
+            self.set_properties(
+                styles[span_style],
                 "style:text-properties",
+                {
+                    "fo:color": self.theme.content_color,
+                    "fo:font-size": self.theme.content_font_size,
+                    "style:font-size-asian": self.theme.content_font_size,
+                    "style:font-size-complex": self.theme.content_font_size,
+                },
             )
-            master_content_text_properties.set(namespaces("fo:color"), self.theme.content_color)
-            master_content_text_properties.set(namespaces("fo:font-size"), self.theme.content_font_size)
-            master_content_text_properties.set(namespaces("style:font-size-asian"), self.theme.content_font_size)
-            master_content_text_properties.set(namespaces("style:font-size-complex"), self.theme.content_font_size)
-
-        default_slide_properties = self.xpath(
-            "office:document-styles",
-            "office:automatic-styles",
-            f"style:style[@style:name='{DRAWING_PAGE_STYLE_NAME}']",
+        self.set_properties(
+            styles[DRAWING_PAGE_STYLE_NAME],
             "style:drawing-page-properties",
+            {"draw:fill-color": self.theme.background_color},
         )
-        default_slide_properties.set(namespaces("draw:fill-color"), self.theme.background_color)
-
-        highlighted_code_paragraph_style = self.xpath(
-            "office:document-styles",
-            "office:automatic-styles",
-            f"style:style[@style:name='{CODE_HIGHLIGHT_PARAGRAPH_STYLE_NAME}']",
+        self.set_properties(
+            styles[CODE_HIGHLIGHT_PARAGRAPH_STYLE_NAME],
             "style:text-properties",
+            {"fo:background-color": self.theme.highlight_color, "fo:font-weight": "bold"},
         )
-        highlighted_code_paragraph_style.set(namespaces("fo:background-color"), self.theme.highlight_color)
-        highlighted_code_paragraph_style.set(namespaces("fo:font-weight"), "bold")
-
-        output_frame_text_properties = self.xpath(
-            "office:document-styles",
-            "office:automatic-styles",
-            f"style:style[@style:name='{OUTPUT_FRAME_STYLE_NAME}']",
+        self.set_properties(
+            styles[OUTPUT_FRAME_STYLE_NAME],
             "style:text-properties",
+            {"fo:color": self.theme.content_color},
         )
-        output_frame_text_properties.set(namespaces("fo:color"), self.theme.content_color)
 
         # Add Master Slide Styles
 
-        maaster_styles = self.xpath(
-            "office:document-styles",
-            "office:master-styles",
+        if self.theme.master_pages is None:
+            self.theme.master_pages = build_master_pages(self.namespaces, self.theme)
+
+        master_pages, background_styles = self.theme.master_pages
+        for master_page in master_pages:
+            self.master_styles.append(deepcopy(master_page))
+        for background_style in background_styles:
+            self.automatic_styles.append(deepcopy(background_style))
+
+    def _bind(self):
+        self.automatic_styles = self.child(self.xml, "office:automatic-styles")
+        self.styles = self.child(self.xml, "office:styles")
+        self.master_styles = self.child(self.xml, "office:master-styles")
+
+    def share_styles(self, names: Set[str]):
+        """
+        Moves the automatic styles named in ``names`` into ``office:styles``, the only styles of this file
+        ``content.xml`` can refer to. Every other style stays automatic, so each style is written once.
+        """
+        style_name = self.namespaces("style:name")
+        for style in list(self.automatic_styles):
+            if style.get(style_name) in names:
+                self.styles.append(style)
+
+    def add_table_templates(self, styles: List[etree._Element]) -> List[etree._Element]:
+        """
+        Adds the table templates among ``styles`` to ``office:styles``, the only place ODF allows them, along with
+        the cell styles their rows name, as templates can only refer to common styles. Returns the other styles.
+        """
+        template_tag = self.namespaces("table:table-template")
+        style_name = self.namespaces("style:name")
+        cell_style_name = self.namespaces("table:style-name")
+        templates = [style for style in styles if style.tag == template_tag]
+        cell_styles = {row.get(cell_style_name) for template in templates for row in template}
+
+        remaining = []
+        for style in styles:
+            if style.tag == template_tag or style.get(style_name) in cell_styles:
+                self.styles.append(style)
+            else:
+                remaining.append(style)
+        return remaining
+
+
+def build_master_pages(namespaces: Namespaces, theme: Theme) -> Tuple[List[etree._Element], List[etree._Element]]:
+    """
+    Builds the master page of every slide layout, and the background style each of them uses.
+    """
+    slides = [
+        BlankSlide("Blank", namespaces, theme),
+        TitleSlide("Title", namespaces, theme),
+        TitleAndContentSlide("TitleAndContent", namespaces, theme),
+        TitleAndCodeSlide("TitleAndCode", namespaces, theme),
+        TitleCodeAndOutputSlide("TitleCodeAndOutput", namespaces, theme),
+        TitleAndImageSlide("TitleAndImage", namespaces, theme),
+        ImageSlide("Image", namespaces, theme),
+        TitleAndObjectSlide("TitleAndObject", namespaces, theme),
+    ]
+
+    master_pages = []
+    background_styles = []
+    for slide in slides:
+        master_page = slide.to_master_page(DEFAULT_PAGE_LAYOUT_NAME, DEFAULT_STYLE_NAME)
+        master_pages.append(master_page.to_element())
+        background_style = Tag(
+            "style:style",
+            namespaces,
+            {
+                "style:name": f"{master_page['style:name']}-background",
+                "style:family": "presentation",
+            },
         )
-        slides = [
-            BlankSlide("Blank", self.namespaces, self.theme),
-            TitleSlide("Title", self.namespaces, self.theme),
-            TitleAndContentSlide("TitleAndContent", self.namespaces, self.theme),
-            TitleAndCodeSlide("TitleAndCode", self.namespaces, self.theme),
-            TitleCodeAndOutputSlide("TitleCodeAndOutput", self.namespaces, self.theme),
-            TitleAndImageSlide("TitleAndImage", self.namespaces, self.theme),
-            ImageSlide("Image", self.namespaces, self.theme),
-            TitleAndObjectSlide("TitleAndObject", self.namespaces, self.theme),
-        ]
-
-        for slide in slides:
-            master_page = slide.to_master_page(DEFAULT_PAGE_LAYOUT_NAME, DEFAULT_STYLE_NAME)
-            maaster_styles.append(master_page.to_element())
-            background_style = Tag(
-                "style:style",
-                self.namespaces,
-                {
-                    "style:name": f"{master_page['style:name']}-background",
-                    "style:family": "presentation",
-                },
-            )
-            graphic_properties = Tag(
-                "style:graphic-properties",
-                self.namespaces,
-                {
-                    "draw:stroke": "none",
-                    "draw:fill": "solid",
-                    "draw:fill-color": self.theme.background_color,
-                },
-            )
-            background_style.append(graphic_properties)
-            self.automatic_styles.append(background_style.to_element())
+        graphic_properties = Tag(
+            "style:graphic-properties",
+            namespaces,
+            {
+                "draw:stroke": "none",
+                "draw:fill": "solid",
+                "draw:fill-color": theme.background_color,
+            },
+        )
+        background_style.append(graphic_properties)
+        background_styles.append(background_style.to_element())
+
+    return master_pages, background_styles
@@ -1,18 +1,115 @@
+import importlib.resources
 import xml.dom.minidom
+from copy import copy, deepcopy
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Set, Tuple, Union
+from weakref import WeakKeyDictionary
 
 from lxml import etree
 
 from presentpy.namespaces import Namespaces
 
+if TYPE_CHECKING:
+    from presentpy.writer.theme import Theme
+
+TEMPLATE_DIRECTORY = importlib.resources.files("presentpy") / "templates" / "odp"
+
+
+@lru_cache(maxsize=None)
+def template_files() -> Tuple[str, ...]:
+    """
+    Lists the files of the packaged ODP template as archive names, e.g. ``META-INF/manifest.xml``.
+    """
+    names = []
+    pending = [("", TEMPLATE_DIRECTORY)]
+    while pending:
+        prefix, directory = pending.pop()
+        for entry in directory.iterdir():
+            if entry.is_dir():
+                pending.append((f"{prefix}{entry.name}/", entry))
+            else:
+                names.append(f"{prefix}{entry.name}")
+    return tuple(sorted(names))
+
+
+@lru_cache(maxsize=None)
+def read_template(name: str) -> bytes:
+    """
+    Reads a file of the packaged ODP template, each file is only read from disk once per process.
+    """
+    return TEMPLATE_DIRECTORY.joinpath(*name.split("/")).read_bytes()
+
+
+@lru_cache(maxsize=None)
+def parse_template(name: str) -> etree._Element:
+    """
+    Parses a file of the packaged ODP template once per process, callers must copy the tree before changing it.
+    """
+    return etree.fromstring(read_template(name))
+
+
+def prettify_xml(xml_bytes: bytes) -> bytes:
+    dom = xml.dom.minidom.parseString(xml_bytes)
+    pretty_xml_as_string = dom.toprettyxml()
+    pretty_xml_as_string = "\n".join([line for line in pretty_xml_as_string.split("\n") if line.strip()])
+    return pretty_xml_as_string.encode("utf-8")
+
 
 class XMLFile:
 
-    def __init__(self, path: Path, namespaces: Namespaces):
-        self.path = path
+    def __init__(self, source: Union[Path, bytes, etree._Element], namespaces: Namespaces):
         self.namespaces = namespaces
-        with open(path, "r") as f:
-            self.xml = etree.fromstring(f.read())
+        if isinstance(source, etree._Element):
+            self.path = None
+            self.xml = deepcopy(source)
+        elif isinstance(source, bytes):
+            self.path = None
+            self.xml = etree.fromstring(source)
+        else:
+            self.path = source
+            with open(source, "rb") as f:
+                self.xml = etree.fromstring(f.read())
+
+    def _bind(self):
+        """
+        Looks up the elements subclasses keep references to, called again on every copy.
+        """
+
+    def copy(self):
+        """
+        Returns an independent copy of this file, much cheaper than parsing and theming the template again.
+        """
+        clone = copy(self)
+        clone.xml = deepcopy(self.xml)
+        clone._bind()
+        return clone
+
+    def child(self, parent: etree._Element, element_name: str) -> etree._Element:
+        element = parent.find(self.namespaces(element_name))
+        if element is None:
+            raise IndexError(f"{element_name} not found in {parent.tag}")
+        return element
+
+    def styles_by_name(self, parent: etree._Element) -> Dict[str, etree._Element]:
+        style_name = self.namespaces("style:name")
+        return {style.get(style_name): style for style in parent}
+
+    def referenced_style_names(self) -> Set[str]:
+        """
+        Returns the names of the styles and table templates elements of this file refer to.
+        """
+        names = set()
+        for element in self.xml.iter(etree.Element):
+            for name, value in element.attrib.items():
+                if value and etree.QName(name).localname.endswith(("style-name", "template-name")):
+                    names.add(value)
+        return names
+
+    def set_properties(self, style: etree._Element, properties_name: str, properties: Dict[str, str]):
+        element = self.child(style, properties_name)
+        for name, value in properties.items():
+            element.set(self.namespaces(name), value)
 
     def xpath(self, *path_from_root, single=True):
         if len(path_from_root) == 1 and path_from_root[0].startswith("/"):
@@ -28,15 +125,42 @@ class XMLFile:
                 raise IndexError(f"XPath {xpath} returned no elements") from e
         return result
 
+    def to_bytes(self, prettify=False):
+        xml_bytes = etree.tostring(self.xml, pretty_print=True, encoding="UTF-8", xml_declaration=True)
+        if prettify:
+            return prettify_xml(xml_bytes)
+        return xml_bytes
+
     def write(self, output_path=None, prettify=False):
         if output_path is None:
             output_path = self.path
-        with open(output_path, "w") as f:
-            xml_string = etree.tostring(self.xml, pretty_print=True)
-            if prettify:
-                dom = xml.dom.minidom.parseString(xml_string)
-                pretty_xml_as_string = dom.toprettyxml()
-                pretty_xml_as_string = "\n".join([line for line in pretty_xml_as_string.split("\n") if line.strip()])
-                f.write(pretty_xml_as_string)
-            else:
-                f.write(xml_string.decode())
+        with open(output_path, "wb") as f:
+            f.write(self.to_bytes(prettify=prettify))
+
+
+_themed_templates: "WeakKeyDictionary[Theme, Dict[type, ThemedXMLFile]]" = WeakKeyDictionary()
+
+
+class ThemedXMLFile(XMLFile):
+    template_name: str
+
+    def __init__(self, source: Union[Path, bytes, etree._Element], namespaces: Namespaces, theme: "Theme"):
+        super().__init__(source, namespaces)
+        self.theme = theme
+
+    @classmethod
+    def for_theme(cls, theme: "Theme"):
+        """
+        Returns a copy of the packaged template with ``theme`` applied, the template is only parsed and themed
+        once per theme.
+        """
+        templates = _themed_templates.setdefault(theme, {})
+        if cls not in templates:
+            templates[cls] = cls(parse_template(cls.template_name), theme.namespaces, theme)
+        return templates[cls].copy()
+
+    def style_names(self) -> Set[str]:
+        """
+        Returns the names of the automatic styles of this file.
+        """
+        return set(self.styles_by_name(self.automatic_styles))
@@ -0,0 +1,123 @@
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from presentpy.batch import DeckResult
+from presentpy.cache import write_atomically
+from presentpy.conversion import build_presentation
+from presentpy.namespaces import Namespaces
+from presentpy.writer.archive import ArchiveOptions
+from presentpy.writer.images import ImageOptions
+from presentpy.writer.render_cache import MemoryRenderCache, RenderCache
+from presentpy.writer.tables import TableOptions
+from presentpy.writer.theme import Theme
+
+POLL_INTERVAL = 0.25
+DEBOUNCE_INTERVAL = 0.5
+
+
+class NotebookWatcher:
+    """
+    Polls the modification time and size of a notebook.
+
+    Jupyter writes a notebook several times when saving it, so a change is only reported once the file
+    has been left alone for ``debounce`` seconds.
+    """
+
+    def __init__(self, path: Path, debounce: float = DEBOUNCE_INTERVAL):
+        self.path = path
+        self.debounce = debounce
+        self._seen = self._signature()
+        self._pending: Optional[Tuple[int, int]] = None
+        self._pending_since = 0.0
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        signature = self._signature()
+        # A missing file is an editor replacing it, wait for the new one to show up
+        if signature is None or signature == self._seen:
+            self._pending = None
+            return False
+        if signature != self._pending:
+            self._pending = signature
+            self._pending_since = now
+            return False
+        if now - self._pending_since < self.debounce:
+            return False
+        self._seen = signature
+        self._pending = None
+        return True
+
+
+def build_once(
+    notebook: Path,
+    output: Path,
+    theme: Theme,
+    namespaces: Namespaces,
+    render_cache: RenderCache,
+    with_outputs: bool = False,
+    prettify: bool = False,
+    image_options: Optional[ImageOptions] = None,
+    table_options: Optional[TableOptions] = None,
+    archive_options: Optional[ArchiveOptions] = None,
+    validate: bool = False,
+) -> DeckResult:
+    start = time.perf_counter()
+    try:
+        presentation = build_presentation(
+            notebook,
+            theme,
+            namespaces,
+            with_outputs=with_outputs,
+            render_cache=render_cache,
+            image_options=image_options,
+            table_options=table_options,
+            archive_options=archive_options,
+            validate=validate,
+        )
+        # Written in one go so a viewer reloading the deck never sees half an archive
+        with presentation:
+            write_atomically(output, presentation.write(prettify=prettify))
+    except Exception as e:
+        return DeckResult(notebook, output, seconds=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+    return DeckResult(notebook, output, slides=presentation.current_slide_count, seconds=time.perf_counter() - start)
+
+
+def watch(
+    notebook: Path,
+    output: Path,
+    theme: Theme,
+    namespaces: Namespaces,
+    with_outputs: bool = False,
+    prettify: bool = False,
+    render_cache: Optional[RenderCache] = None,
+    image_options: Optional[ImageOptions] = None,
+    table_options: Optional[TableOptions] = None,
+    archive_options: Optional[ArchiveOptions] = None,
+    validate: bool = False,
+    poll_interval: float = POLL_INTERVAL,
+    debounce: float = DEBOUNCE_INTERVAL,
+) -> Iterator[DeckResult]:
+    """
+    Builds the deck, then rebuilds it every time ``notebook`` is saved, yielding a :class:`DeckResult` per build.
+
+    The process, theme and templates stay warm between builds, and cells that did not change are reused from
+    ``render_cache``, an in-memory cache of the previous build unless one is given.
+    """
+    if render_cache is None:
+        render_cache = MemoryRenderCache()
+    watcher = NotebookWatcher(notebook, debounce=debounce)
+
+    options = (with_outputs, prettify, image_options, table_options, archive_options, validate)
+    yield build_once(notebook, output, theme, namespaces, render_cache, *options)
+    while True:
+        time.sleep(poll_interval)
+        if watcher.changed():
+            yield build_once(notebook, output, theme, namespaces, render_cache, *options)
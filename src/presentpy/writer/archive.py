@@ -0,0 +1,367 @@
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Deque, List, Optional, Tuple, Union
+
+from presentpy.profiling import count, profiled
+
+DEFAULT_COMPRESSION_LEVEL = 6
+CHUNK_SIZE = 1024 * 1024
+# Deflate refers back at most 32 KiB, a chunk primed with the end of the one before compresses as if it was not split
+WINDOW_SIZE = 32 * 1024
+
+# PNG and JPEG images are compressed already, deflating them again only costs time
+STORED_SUFFIXES = (".png", ".jpg", ".jpeg")
+
+ZIP_LIMIT = 0xFFFFFFFF
+ZIP_ENTRY_LIMIT = 0xFFFF
+ZIP_VERSION = 20
+UNIX_SYSTEM = 3
+UTF8_NAME_FLAG = 0x800
+DATA_DESCRIPTOR_FLAG = 0x8
+
+_LOCAL_HEADER = struct.Struct("<4s2H3H3L2H")
+_DATA_DESCRIPTOR = struct.Struct("<4s3L")
+_CENTRAL_HEADER = struct.Struct("<4s4B4H3L5H2L")
+_END_OF_CENTRAL_DIRECTORY = struct.Struct("<4s4H2LH")
+
+
+@dataclass(frozen=True)
+class ArchiveOptions:
+    """
+    How the parts of a deck are compressed.
+
+    XML parts are deflated at ``compression_level``, from 1 for the fastest to 9 for the smallest archive,
+    0 stores them. Parts over a megabyte are deflated in chunks on a pool of ``workers`` threads.
+    """
+
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL
+    workers: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class ArchivePart:
+    name: str
+    size: int
+    compressed_size: int
+
+
+def is_stored(name: str, options: ArchiveOptions) -> bool:
+    """
+    Returns whether the part ``name`` is stored uncompressed, ODF requires it of the ``mimetype``.
+    """
+    return name == "mimetype" or name.lower().endswith(STORED_SUFFIXES) or options.compression_level == 0
+
+
+def deflate_chunk(data: bytes, level: int, window: bytes = b"", last: bool = True) -> bytes:
+    """
+    Deflates one chunk of a part as raw deflate data that can be concatenated with the chunks around it.
+
+    ``window`` is the end of the chunk before, which this chunk can refer back to. Every chunk but the last one
+    ends on a byte boundary without closing the stream.
+    """
+    if window:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=window)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class ArchiveEntry:
+    """
+    A part being written into an :class:`ArchiveWriter`, a binary file-like object.
+
+    Deflated parts are cut into chunks that are compressed on the thread pool of the archive as they fill up.
+    A ``streamed`` entry is written out as it goes, stored data as it arrives and deflated chunks in order as
+    they are compressed, so only the chunks still being compressed are held. Other entries are held until they
+    are written out whole.
+    """
+
+    def __init__(self, archive: "ArchiveWriter", name: str, stored: bool, streamed: bool = False):
+        self.archive = archive
+        self.name = name
+        self.stored = stored
+        self.streamed = streamed
+        self.size = 0
+        self.compressed_size = 0
+        self.crc = 0
+        # Where the local header of the entry starts in the archive
+        self.offset = 0
+        self.closed = False
+        self.chunks: Deque[Union[bytes, Future]] = deque()
+        self._buffer = bytearray()
+        self._window = b""
+
+    @profiled("zip")
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        self.crc = zlib.crc32(data, self.crc)
+        if self.stored:
+            if self.streamed:
+                self.archive.write_data(self, data)
+            else:
+                self.chunks.append(bytes(data))
+            return len(data)
+
+        self._buffer += data
+        while len(self._buffer) >= CHUNK_SIZE:
+            self._deflate(bytes(self._buffer[:CHUNK_SIZE]), last=False)
+            del self._buffer[:CHUNK_SIZE]
+        return len(data)
+
+    def _deflate(self, chunk: bytes, last: bool):
+        self.chunks.append(self.archive.submit(chunk, self._window, last))
+        self._window = chunk[-WINDOW_SIZE:]
+        if self.streamed:
+            self._write_compressed()
+
+    def _write_compressed(self, wait: bool = False):
+        while self.chunks and (wait or self.chunks[0].done()):
+            self.archive.write_data(self, self.chunks.popleft().result())
+
+    def close(self):
+        if self.closed:
+            return
+        if not self.stored:
+            self._deflate(bytes(self._buffer), last=True)
+            self._buffer = bytearray()
+        self.closed = True
+        if self.streamed:
+            self._write_compressed(wait=True)
+            self.archive.finish_streamed(self)
+        else:
+            self.archive.flush()
+
+    @property
+    def ready(self) -> bool:
+        return self.closed and all(not isinstance(chunk, Future) or chunk.done() for chunk in self.chunks)
+
+    def compressed(self) -> bytes:
+        return b"".join(chunk.result() if isinstance(chunk, Future) else chunk for chunk in self.chunks)
+
+    def __enter__(self) -> "ArchiveEntry":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ArchiveWriter:
+    """
+    Writes a zip archive to ``file``, with the parts in the order they are added.
+
+    Each part is compressed according to :func:`is_stored`. Parts given whole to :meth:`write` are written out once
+    they are compressed entirely, parts written through :meth:`open` are streamed and followed by a data descriptor
+    with their sizes. ``file`` is only ever appended to and can be a pipe.
+    """
+
+    def __init__(self, file: BinaryIO, options: Optional[ArchiveOptions] = None):
+        self.file = file
+        self.options = options or ArchiveOptions()
+        self._executor = ThreadPoolExecutor(max_workers=self.options.workers)
+        # Chunks handed to the pool and not known to be compressed yet, bounding the uncompressed data held
+        self._in_flight: Deque[Future] = deque()
+        self._max_in_flight = 2 * (self.options.workers or os.cpu_count() or 1)
+        self._pending: Deque[ArchiveEntry] = deque()
+        self._streamed: Optional[ArchiveEntry] = None
+        # Name, flags, compression method, CRC, compressed size, size and offset of every written part
+        self._directory: List[Tuple[str, int, int, int, int, int, int]] = []
+        self._offset = 0
+        local_time = time.localtime()
+        self._date = (local_time.tm_year - 1980) << 9 | local_time.tm_mon << 5 | local_time.tm_mday
+        self._time = local_time.tm_hour << 11 | local_time.tm_min << 5 | local_time.tm_sec // 2
+
+    def submit(self, chunk: bytes, window: bytes, last: bool) -> Future:
+        future = self._executor.submit(deflate_chunk, chunk, self.options.compression_level, window, last)
+        self._in_flight.append(future)
+        while len(self._in_flight) > self._max_in_flight:
+            self._in_flight.popleft().result()
+        return future
+
+    def open(self, name: str) -> ArchiveEntry:
+        """
+        Adds the part ``name``, its content is written to the returned entry, which has to be closed before
+        another part is added. The parts before it are written out first, so the entry is streamed into ``file``.
+        """
+        self._check_streamed()
+        self.flush(wait=True)
+        entry = ArchiveEntry(self, name, is_stored(name, self.options), streamed=True)
+        self._write_local_header(entry, DATA_DESCRIPTOR_FLAG, 0, 0)
+        self._streamed = entry
+        return entry
+
+    def write(self, name: str, data: bytes):
+        """
+        Adds the part ``name`` with ``data`` as its content.
+        """
+        self._check_streamed()
+        entry = ArchiveEntry(self, name, is_stored(name, self.options))
+        self._pending.append(entry)
+        with entry:
+            entry.write(data)
+
+    def _check_streamed(self):
+        if self._streamed is not None:
+            raise ValueError(f"Archive entry {self._streamed.name} was not closed")
+
+    def flush(self, wait: bool = False):
+        """
+        Writes out the parts at the front of the archive that are compressed, waiting for them with ``wait``.
+        """
+        while self._pending and (wait or self._pending[0].ready):
+            entry = self._pending.popleft()
+            if not entry.closed:
+                raise ValueError(f"Archive entry {entry.name} was not closed")
+            self._write_entry(entry)
+
+    def _write_entry(self, entry: ArchiveEntry):
+        data = entry.compressed()
+        self._check_sizes(len(data), entry.size)
+        self._write_local_header(entry, 0, len(data), entry.size)
+        self.write_data(entry, data)
+        self._add_to_directory(entry, 0)
+
+    def write_data(self, entry: ArchiveEntry, data: bytes):
+        """
+        Appends compressed ``data`` of ``entry`` to the archive.
+        """
+        self.file.write(data)
+        entry.compressed_size += len(data)
+        self._offset += len(data)
+
+    def finish_streamed(self, entry: ArchiveEntry):
+        """
+        Ends the streamed ``entry`` with its data descriptor once all of its data is written.
+        """
+        self._check_sizes(entry.compressed_size, entry.size)
+        self.file.write(_DATA_DESCRIPTOR.pack(b"PK\x07\x08", entry.crc, entry.compressed_size, entry.size))
+        self._offset += _DATA_DESCRIPTOR.size
+        self._add_to_directory(entry, DATA_DESCRIPTOR_FLAG)
+        self._streamed = None
+
+    @staticmethod
+    def _check_sizes(*sizes: int):
+        if max(sizes) > ZIP_LIMIT:
+            raise ValueError("Archive is too large to be written without ZIP64 extensions")
+
+    def _write_local_header(self, entry: ArchiveEntry, flags: int, compressed_size: int, size: int):
+        """
+        Writes the local header of ``entry``, a streamed entry has its CRC and sizes in its data descriptor.
+        """
+        self._check_sizes(self._offset)
+        if len(self._directory) >= ZIP_ENTRY_LIMIT:
+            raise ValueError("Archive is too large to be written without ZIP64 extensions")
+        entry.offset = self._offset
+        encoded_name = entry.name.encode()
+        self.file.write(
+            _LOCAL_HEADER.pack(
+                b"PK\x03\x04",
+                ZIP_VERSION,
+                flags | self._flags(entry.name),
+                self._method(entry),
+                self._time,
+                self._date,
+                entry.crc,
+                compressed_size,
+                size,
+                len(encoded_name),
+                0,
+            )
+        )
+        self.file.write(encoded_name)
+        self._offset += _LOCAL_HEADER.size + len(encoded_name)
+
+    def _add_to_directory(self, entry: ArchiveEntry, flags: int):
+        self._directory.append(
+            (entry.name, flags, self._method(entry), entry.crc, entry.compressed_size, entry.size, entry.offset)
+        )
+        part = "media" if entry.name.startswith("media/") else entry.name
+        count(f"{part} bytes", entry.size)
+        count(f"{part} compressed bytes", entry.compressed_size)
+
+    @staticmethod
+    def _method(entry: ArchiveEntry) -> int:
+        return 0 if entry.stored else zlib.DEFLATED
+
+    @staticmethod
+    def _flags(name: str) -> int:
+        return 0 if name.isascii() else UTF8_NAME_FLAG
+
+    def close(self):
+        """
+        Writes the remaining parts and the central directory.
+        """
+        self._check_streamed()
+        self.flush(wait=True)
+        directory_offset = self._offset
+        for name, flags, method, crc, compressed_size, size, offset in self._directory:
+            encoded_name = name.encode()
+            self.file.write(
+                _CENTRAL_HEADER.pack(
+                    b"PK\x01\x02",
+                    ZIP_VERSION,
+                    UNIX_SYSTEM,
+                    ZIP_VERSION,
+                    0,
+                    flags | self._flags(name),
+                    method,
+                    self._time,
+                    self._date,
+                    crc,
+                    compressed_size,
+                    size,
+                    len(encoded_name),
+                    0,
+                    0,
+                    0,
+                    0,
+                    0o644 << 16,
+                    offset,
+                )
+            )
+            self.file.write(encoded_name)
+            self._offset += _CENTRAL_HEADER.size + len(encoded_name)
+
+        if self._offset > ZIP_LIMIT:
+            raise ValueError("Archive is too large to be written without ZIP64 extensions")
+        self.file.write(
+            _END_OF_CENTRAL_DIRECTORY.pack(
+                b"PK\x05\x06",
+                0,
+                0,
+                len(self._directory),
+                len(self._directory),
+                self._offset - directory_offset,
+                directory_offset,
+                0,
+            )
+        )
+        self._offset += _END_OF_CENTRAL_DIRECTORY.size
+
+    @property
+    def parts(self) -> List[ArchivePart]:
+        """
+        The parts written so far, in archive order.
+        """
+        return [ArchivePart(name, size, compressed_size) for name, *_, compressed_size, size, _ in self._directory]
+
+    @property
+    def size(self) -> int:
+        """
+        The number of bytes written so far, the size of the archive once it is closed.
+        """
+        return self._offset
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.close()
+        finally:
+            self._executor.shutdown(cancel_futures=exc_type is not None)
@@ -0,0 +1,60 @@
+from copy import deepcopy
+from typing import Dict, List, Optional
+
+from lxml import etree
+
+from presentpy.namespaces import Namespaces
+
+
+def _resolve_attributes(namespaces: Namespaces, attributes: Optional[Dict[str, str]]) -> Dict[str, str]:
+    if not attributes:
+        return {}
+    return {namespaces.resolve(name): value for name, value in attributes.items()}
+
+
+def build_element(
+    element_name: str,
+    namespaces: Namespaces,
+    attributes: Optional[Dict[str, str]] = None,
+    text: Optional[str] = None,
+    nsmap: Optional[Dict[str, str]] = None,
+) -> etree._Element:
+    """
+    Creates a standalone lxml element from a prefixed name such as ``text:span``.
+
+    Only the root of a tree needs ``nsmap``, elements appended under it take the prefixes declared there.
+    """
+    element = etree.Element(namespaces.resolve(element_name), _resolve_attributes(namespaces, attributes), nsmap=nsmap)
+    if text is not None:
+        element.text = text
+    return element
+
+
+def build_sub_element(
+    parent: etree._Element,
+    element_name: str,
+    namespaces: Namespaces,
+    attributes: Optional[Dict[str, str]] = None,
+    text: Optional[str] = None,
+) -> etree._Element:
+    """
+    Creates an lxml element from a prefixed name directly under ``parent``.
+    """
+    element = etree.SubElement(parent, namespaces.resolve(element_name), _resolve_attributes(namespaces, attributes))
+    if text is not None:
+        element.text = text
+    return element
+
+
+def serialise_elements(elements: List[etree._Element], namespaces: Namespaces) -> str:
+    """
+    Serialises copies of ``elements`` under a container declaring every prefix, see :func:`parse_elements`.
+    """
+    container = build_element("office:automatic-styles", namespaces, nsmap=namespaces.data)
+    for element in elements:
+        container.append(deepcopy(element))
+    return etree.tostring(container, encoding="unicode")
+
+
+def parse_elements(xml: str) -> List[etree._Element]:
+    return list(etree.fromstring(xml))
@@ -0,0 +1,157 @@
+import base64
+import hashlib
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+DEFAULT_DPI = 96.0
+INCHES_PER_METER = 0.0254
+
+BUDGET_DPI = 150.0
+MIN_BUDGET_DPI = 48.0
+BUDGET_DPI_STEP = 0.75
+
+
+@dataclass
+class ImageInfo:
+    width: int
+    height: int
+    dpi: Tuple[float, float] = (DEFAULT_DPI, DEFAULT_DPI)
+
+    @property
+    def size_in_inches(self) -> Tuple[float, float]:
+        return self.width / self.dpi[0], self.height / self.dpi[1]
+
+
+def read_png_info(data: bytes) -> ImageInfo:
+    """
+    Reads the size and resolution of a PNG image from the chunks before its image data, without decoding it.
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("Not a PNG image")
+
+    info = None
+    position = len(PNG_SIGNATURE)
+    while position + 8 <= len(data):
+        length, chunk_type = struct.unpack_from(">I4s", data, position)
+        chunk = data[position + 8 : position + 8 + length]
+        if len(chunk) < length:
+            raise ValueError(f"Truncated PNG {chunk_type.decode('latin-1')} chunk")
+
+        if chunk_type == b"IHDR":
+            info = ImageInfo(*struct.unpack_from(">II", chunk))
+        elif chunk_type == b"pHYs" and info is not None and length >= 9:
+            pixels_per_unit_x, pixels_per_unit_y, unit = struct.unpack_from(">IIB", chunk)
+            if unit == 1:
+                info.dpi = (pixels_per_unit_x * INCHES_PER_METER, pixels_per_unit_y * INCHES_PER_METER)
+        elif chunk_type in (b"IDAT", b"IEND"):
+            break
+        position += length + 12
+
+    if info is None:
+        raise ValueError("PNG image has no IHDR chunk")
+    return info
+
+
+def load_png(image_png: str) -> Tuple[bytes, ImageInfo]:
+    """
+    Decodes a base64 ``image/png`` output, returning the PNG bytes unchanged along with their size and resolution.
+
+    Images whose header cannot be read are re-encoded through Pillow.
+    """
+    data = base64.b64decode(image_png)
+    try:
+        return data, read_png_info(data)
+    except ValueError:
+        pass
+
+    image = Image.open(BytesIO(data))
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue(), ImageInfo(*image.size, dpi=image.info.get("dpi", (DEFAULT_DPI, DEFAULT_DPI)))
+
+
+def media_path(data: bytes, extension: str) -> str:
+    """
+    Names media after their content, so identical images are stored once per deck.
+    """
+    return f"media/{hashlib.sha256(data).hexdigest()[:16]}.{extension}"
+
+
+@dataclass(frozen=True)
+class ImageOptions:
+    """
+    How images are optimised when a deck is written, nothing is changed by default.
+
+    ``dpi`` downscales images to at most that many pixels per inch of the area they take on the slide,
+    ``quantize`` reduces them to a 256 colour palette and ``recompress`` recompresses them losslessly.
+    With ``max_deck_size`` set, the settings are tightened until the written deck is at most that many bytes.
+    """
+
+    dpi: Optional[float] = None
+    quantize: bool = False
+    recompress: bool = False
+    max_deck_size: Optional[int] = None
+    workers: Optional[int] = None
+
+    def __bool__(self):
+        return bool(self.dpi or self.quantize or self.recompress)
+
+    def tightened(self) -> Optional["ImageOptions"]:
+        """
+        Returns the next, smaller settings to try when the deck is over ``max_deck_size``, or ``None`` when
+        there are none left.
+        """
+        if not self.recompress:
+            return replace(self, recompress=True)
+        if not self.quantize:
+            return replace(self, quantize=True)
+        dpi = BUDGET_DPI if self.dpi is None else self.dpi * BUDGET_DPI_STEP
+        if dpi < MIN_BUDGET_DPI:
+            return None
+        return replace(self, dpi=dpi)
+
+
+def optimise_image(data: bytes, extent: Optional[Tuple[float, float]], options: ImageOptions) -> bytes:
+    """
+    Applies ``options`` to a PNG image shown ``extent`` inches wide and high, keeping the original bytes
+    whenever the optimised image would not be smaller.
+    """
+    if not options:
+        return data
+
+    image = Image.open(BytesIO(data))
+    if options.dpi and extent:
+        max_size = (max(1, round(extent[0] * options.dpi)), max(1, round(extent[1] * options.dpi)))
+        if image.width > max_size[0] or image.height > max_size[1]:
+            image.thumbnail(max_size, Image.Resampling.LANCZOS)
+    if options.quantize and image.mode != "P":
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        image = image.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+
+    buffer = BytesIO()
+    image.save(buffer, format="PNG", optimize=options.recompress)
+    if buffer.tell() >= len(data):
+        return data
+    return buffer.getvalue()
+
+
+def optimise_images(
+    media: Dict[str, bytes], extents: Dict[str, Tuple[float, float]], options: ImageOptions
+) -> Dict[str, bytes]:
+    """
+    Optimises every PNG in ``media`` on a thread pool, Pillow releases the GIL while encoding and decoding.
+    """
+    if not options:
+        return media
+
+    paths = [path for path in media if path.endswith(".png")]
+    with ThreadPoolExecutor(max_workers=options.workers) as executor:
+        optimised = executor.map(lambda path: optimise_image(media[path], extents.get(path), options), paths)
+        return {**media, **dict(zip(paths, optimised))}
@@ -0,0 +1,45 @@
+import sys
+from typing import List
+
+from presentpy.writer.archive import ArchivePart
+
+
+class PresentationObserver:
+    """
+    Receives events while a deck is built and written, e.g. to feed metrics or tracing when presentpy runs
+    inside a service.
+
+    Subclasses override the events they need, the others do nothing. Cells reused from a render cache are not
+    built again, so they only report :meth:`cell_rendered` and :meth:`slide_added`.
+    """
+
+    def slide_added(self, number: int):
+        """
+        A slide was added to the deck, ``number`` counts from 0.
+        """
+
+    def cell_rendered(self, cell_type: str, seconds: float, cached: bool):
+        """
+        A notebook cell was turned into slides in ``seconds``, or reused from the render cache with ``cached``.
+        """
+
+    def table_rendered(self, rows: int, columns: int, slides: int):
+        """
+        A DataFrame output was laid out on ``slides`` slides, showing ``rows`` rows under its header rows.
+        """
+
+    def image_written(self, path: str, size: int):
+        """
+        An image was written into the deck at ``path``, taking ``size`` bytes after optimisation.
+        """
+
+    def write_finished(self, parts: List[ArchivePart], size: int, seconds: float):
+        """
+        The deck was written in ``seconds``, an archive of ``size`` bytes made of ``parts``.
+        """
+
+    def warning(self, message: str):
+        """
+        Something in the notebook could not be converted as is, printed to stderr unless overridden.
+        """
+        print(message, file=sys.stderr)
@@ -1,16 +1,14 @@
-import base64
-import importlib.resources
-import os
-import shutil
-import tempfile
+import re
+import time
 import zipfile
+from copy import deepcopy
 from io import BytesIO
+from itertools import chain
 from pathlib import Path
-from typing import List
+from typing import Any, BinaryIO, Dict, List, Optional, Set, Tuple, Union
 
 import mistletoe
-from bs4 import BeautifulSoup
-from PIL import Image
+from lxml import etree
 
 from presentpy.code_slide_source import CodeSlideSource
 from presentpy.constants import (
@@ -19,9 +17,20 @@ from presentpy.constants import (
     CONTENT_LIST_PARAGRAPH_STYLE_NAME,
     CONTENT_PARAGRAPH_STYLE_NAME,
 )
+from presentpy.html_table import TableCell, iter_table_rows
 from presentpy.namespaces import Namespaces
+from presentpy.profiling import active_profiler, profiled, stage
+from presentpy.table_schema import iter_schema_rows
 from presentpy.templates import Content, Styles
+from presentpy.templates.content import CONTENT_SPAN_STYLE_NAMES
 from presentpy.templates.manifest import Manifest
+from presentpy.templates.xml_file import parse_template, read_template, template_files
+from presentpy.writer.archive import ArchiveOptions, ArchiveWriter
+from presentpy.writer.builder import build_element, build_sub_element, parse_elements, serialise_elements
+from presentpy.writer.images import ImageOptions, load_png, media_path, optimise_images
+from presentpy.writer.observer import PresentationObserver
+from presentpy.writer.render_cache import CellFragment
+from presentpy.writer.slide_stream import SlideStream
 from presentpy.writer.slide_tag import (
     BlankSlide,
     ImageSlide,
@@ -32,39 +41,146 @@ from presentpy.writer.slide_tag import (
     TitleAndObjectSlide,
     TitleCodeAndOutputSlide,
 )
+from presentpy.writer.style_registry import StyleRegistry
+from presentpy.writer.tables import TableOptions, paginate_rows, rows_per_slide, split_header
 from presentpy.writer.tag import Tag
 from presentpy.writer.theme import Theme
 
+_WHITESPACE = re.compile(r"(\s+)")
+
 
 class Presentation:
-    def __init__(self, theme: Theme, namespaces: Namespaces):
+    def __init__(
+        self,
+        theme: Theme,
+        namespaces: Namespaces,
+        image_options: Optional[ImageOptions] = None,
+        table_options: Optional[TableOptions] = None,
+        archive_options: Optional[ArchiveOptions] = None,
+        observer: Optional[PresentationObserver] = None,
+    ):
         self.theme = theme
         self.namespaces = namespaces
-        self.styles: List[Tag] = []
-        self.slides: List[SlideTag] = []
+        self.image_options = image_options
+        self.table_options = table_options
+        self.archive_options = archive_options
+        self.observer = observer or PresentationObserver()
+        self.styles = StyleRegistry(namespaces)
+        # Names of the token and content styles the slides refer to, the others are left out of the deck
+        self.used_style_names: Set[str] = set()
+        self.slides = SlideStream(namespaces)
+        self.current_slide: Optional[SlideTag] = None
         self.current_slide_count = 0
         self.current_image_count = 0
         self.current_table_count = 0
-        self._temp_dir = tempfile.mkdtemp()
         self.file_entries = []
-        os.makedirs(f"{self._temp_dir}/media", exist_ok=True)
+        self.media: Dict[str, bytes] = {}
+        self.image_extents: Dict[str, Tuple[float, float]] = {}
+        self._fragment: Optional[CellFragment] = None
+        self._fragment_styles: Dict[str, Tag] = {}
+        self._fragment_style_names: Set[str] = set()
 
     def new_slide(self, name=None, slide_type: SlideTag = TitleCodeAndOutputSlide):
         if name is None:
             name = f"slide{self.current_slide_count}"
+        self.finish_slide()
         slide_tag = slide_type(name, self.namespaces, self.theme)
-        self.slides.append(slide_tag)
+        self.current_slide = slide_tag
+        self.observer.slide_added(self.current_slide_count)
         self.current_slide_count += 1
         return slide_tag
 
     def new_empty_slide(self, name=None):
         if name is None:
             name = f"slide{self.current_slide_count}"
+        self.finish_slide()
         slide_tag = BlankSlide(name, self.namespaces, self.theme)
-        self.slides.append(slide_tag)
+        self.current_slide = slide_tag
+        self.observer.slide_added(self.current_slide_count)
         self.current_slide_count += 1
         return slide_tag
 
+    @profiled("serialisation")
+    def finish_slide(self):
+        """
+        Serialises the slide being built, a slide is finished once the next one is started or the deck is written.
+        """
+        if self.current_slide is not None:
+            profiler = active_profiler()
+            if profiler is not None:
+                profiler.count("elements", sum(1 for _ in self.current_slide.to_element().iter()))
+            if self._fragment is None:
+                self.slides.write(self.current_slide.to_element())
+            else:
+                serialised = etree.tostring(self.current_slide.to_element(), encoding="UTF-8")
+                self._fragment.slides.append(serialised)
+                self.slides.write_serialised(serialised)
+            self.current_slide = None
+
+    def start_fragment(self):
+        """
+        Starts recording what is added to the deck, until :meth:`finish_fragment` returns it as a :class:`CellFragment`.
+        """
+        self.finish_slide()
+        self._fragment = CellFragment(
+            first_slide=self.current_slide_count,
+            first_table=self.current_table_count,
+            first_image=self.current_image_count,
+        )
+        self._fragment_styles = {}
+        self._fragment_style_names = set()
+
+    def finish_fragment(self) -> CellFragment:
+        self.finish_slide()
+        fragment, self._fragment = self._fragment, None
+        fragment.styles = serialise_elements(
+            [style.to_element() for style in self._fragment_styles.values()], self.namespaces
+        )
+        fragment.style_names = sorted(self._fragment_style_names)
+        fragment.table_count = self.current_table_count - fragment.first_table
+        fragment.image_count = self.current_image_count - fragment.first_image
+        return fragment
+
+    def add_fragment(self, fragment: CellFragment):
+        """
+        Adds a cell rendered earlier, renumbering its slides, tables and images to follow the ones already in the deck.
+        """
+        self.finish_slide()
+        fragment = fragment.renumbered(self.current_slide_count, self.current_table_count, self.current_image_count)
+        for slide_no, slide in enumerate(fragment.slides, self.current_slide_count):
+            self.slides.write_serialised(slide)
+            self.observer.slide_added(slide_no)
+        if fragment.styles:
+            for style in parse_elements(fragment.styles):
+                self.styles.add_named(Tag.from_element(style, self.namespaces))
+        for path, media_type in fragment.file_entries:
+            if path not in self.media:
+                self.file_entries.append((path, media_type))
+                self.media[path] = fragment.media[path]
+        for path, extent in fragment.image_extents.items():
+            self._add_image_extent(self.image_extents, path, extent)
+        self.used_style_names.update(fragment.style_names)
+        self.current_slide_count += len(fragment.slides)
+        self.current_table_count += fragment.table_count
+        self.current_image_count += fragment.image_count
+
+    def add_style(self, style: Tag, prefix: str, name_attribute: str = "style:name") -> str:
+        """
+        Adds an automatic style to the deck, returning its name. Styles with the same properties are stored once.
+        """
+        name = self.styles.add(style, prefix, name_attribute)
+        if self._fragment is not None:
+            self._fragment_styles.setdefault(name, style)
+        return name
+
+    def use_styles(self, names: Set[str]):
+        """
+        Records that the slides refer to the token or content styles ``names``.
+        """
+        self.used_style_names |= names
+        if self._fragment is not None:
+            self._fragment_style_names |= names
+
     def add_content(self, document: mistletoe.Document, slide_name: str = None):
         if not document.children:
             raise ValueError("Document has no children")
@@ -118,11 +234,11 @@ class Presentation:
                             )
                             list_item_tag.append(p)
                         else:
-                            print(f"Skipping {list_item.__class__.__name__}")
+                            self.observer.warning(f"Skipping {list_item.__class__.__name__}")
                         list_tag.append(list_item_tag)
                     slide.content_text_box.append(list_tag)
                 else:
-                    print(f"Skipping {child.__class__.__name__}")
+                    self.observer.warning(f"Skipping {child.__class__.__name__}")
 
                 # Add a new paragraph after the last element if it's not the end of content
                 if idx != len(document.children) - 1:
@@ -148,6 +264,7 @@ class Presentation:
                 attributes["text:style-name"] = f"content_span__{span.__class__.__name__}".lower()
             else:
                 attributes["text:style-name"] = "content_span"
+            self.use_styles({attributes["text:style-name"]})
 
             span_tag = Tag(
                 "text:span",
@@ -180,14 +297,22 @@ class Presentation:
     def add_source_code(self, code: CodeSlideSource, slide_name: str = None, with_output=False):
         if code.output.image_png:
             self._source_code_slide_add_image_slide(code, slide_name)
-        elif code.output.text_html:
+        elif code.output.table_data or code.output.text_html:
             self._source_code_slide_add_table_slide(code, slide_name)
         else:
             self._source_code_slide_add_code_slide(code, slide_name, with_output)
 
+    @profiled("tables")
     def _source_code_slide_add_table_slide(self, code, slide_name):
+        # The table schema output is structured data, HTML is only parsed when it is missing
+        if code.output.table_data:
+            rows = iter_schema_rows(code.output.table_data)
+        else:
+            rows = iter_table_rows(code.output.text_html)
+        header, body = split_header(rows)
+        if not header:
+            raise ValueError("Output has no DataFrame table")
         new_slide = self.new_slide(slide_name, slide_type=TitleAndObjectSlide)
-        soup = BeautifulSoup(code.output.text_html, "lxml")
 
         table_attrs = {
             "table:use-banding-columns-styles": "false",
@@ -197,54 +322,43 @@ class Presentation:
             "table:use-last-column-styles": "false",
             "table:use-last-row-styles": "false",
         }
-        table_table = soup.find("table", class_="dataframe")
-        rows = table_table.find_all("tr")
-        column_count = len(rows[0].find_all("th")) + len(rows[0].find_all("td"))
+        column_count = len(header[0].cells)
 
         self.current_table_count += 1
 
-        table_name = f"table{self.current_table_count}"
-
         [*_, content_width, content_height] = new_slide.get_dimensions("object_frame")
 
         cell_width = content_width / column_count
 
-        template_name = f"{table_name}-template"
-        table_attrs["table:template-name"] = template_name
-
-        table_template = Tag("table:table-template", self.namespaces, {"table:name": template_name})
-        table_template.append(Tag("table:first-row", self.namespaces, {"table:style-name": f"{table_name}-first-row"}))
-        self.styles.append(table_template)
-
-        odd_row_style_name = f"{table_name}-odd-row"
-        odd_row_style = self._table_generate_row_style(
-            odd_row_style_name,
-            self.theme.content_color_alt,
-            self.theme.table_row_odd_background_color,
-            self.theme.table_border_width,
+        # Table styles are the same for every table of a theme, only the column width varies
+        odd_row_style_name = self.add_style(
+            self._table_generate_row_style(
+                self.theme.content_color_alt,
+                self.theme.table_row_odd_background_color,
+                self.theme.table_border_width,
+            ),
+            "table-odd-row",
         )
-        self.styles.append(odd_row_style)
-
-        even_row_style_name = f"{table_name}-even-row"
-        even_row_style = self._table_generate_row_style(
-            even_row_style_name,
-            self.theme.content_color_alt,
-            self.theme.table_row_even_background_color,
-            self.theme.table_border_width,
+        even_row_style_name = self.add_style(
+            self._table_generate_row_style(
+                self.theme.content_color_alt,
+                self.theme.table_row_even_background_color,
+                self.theme.table_border_width,
+            ),
+            "table-even-row",
         )
-        self.styles.append(even_row_style)
 
-        text_style_name = f"{table_name}-text"
-        text_style = Tag("style:style", self.namespaces, {"style:family": "text", "style:name": text_style_name})
+        table_template = Tag("table:table-template", self.namespaces)
+        table_template.append(Tag("table:first-row", self.namespaces, {"table:style-name": even_row_style_name}))
+        table_attrs["table:template-name"] = self.add_style(table_template, "table-template", "table:name")
+
+        text_style = Tag("style:style", self.namespaces, {"style:family": "text"})
         text_style.append(
             Tag("style:text-properties", self.namespaces, {"fo:color": f"{self.theme.content_color_alt}"})
         )
-        self.styles.append(text_style)
+        text_style_name = self.add_style(text_style, "table-text")
 
-        text_heading_style_name = f"{table_name}-text-heading"
-        text_heading_style = Tag(
-            "style:style", self.namespaces, {"style:family": "text", "style:name": text_heading_style_name}
-        )
+        text_heading_style = Tag("style:style", self.namespaces, {"style:family": "text"})
         text_heading_style.append(
             Tag(
                 "style:text-properties",
@@ -252,60 +366,88 @@ class Presentation:
                 {"fo:color": f"{self.theme.content_color_alt}", "fo:font-weight": "bold"},
             )
         )
-        self.styles.append(text_heading_style)
+        text_heading_style_name = self.add_style(text_heading_style, "table-text-heading")
 
-        column_style = Tag(
-            "style:style", self.namespaces, {"style:family": "table-column", "style:name": f"{table_name}-column"}
-        )
+        column_style = Tag("style:style", self.namespaces, {"style:family": "table-column"})
         column_style.append(
             Tag("style:table-column-properties", self.namespaces, {"style:column-width": f"{cell_width}in"})
         )
-        self.styles.append(column_style)
-
-        table = Tag("table:table", self.namespaces, table_attrs)
-        for _ in range(column_count):
-            table.append(Tag("table:table-column", self.namespaces, {"table:style-name": f"{table_name}-column"}))
-        for row_no, row in enumerate(rows):
-            row_style_name = f"{table_name}-even-row" if row_no % 2 == 0 else f"{table_name}-odd-row"
-            text_style = text_heading_style_name if row_no == 0 else text_style_name
-            table_row = Tag("table:table-row", self.namespaces, {"table:default-cell-style-name": row_style_name})
-            for cell in row.find_all("th"):
-                cell_tag = self._table_create_cell(text_style, cell)
-                table_row.append(cell_tag)
-            for cell in row.find_all("td"):
-                cell_tag = self._table_create_cell(text_style, cell)
-                table_row.append(cell_tag)
-            table.append(table_row)
-        new_slide.object_frame.append(table)
+        column_style_name = self.add_style(column_style, "table-column")
+
+        options = self.table_options or TableOptions()
+        page_size = options.rows_per_slide or rows_per_slide(content_height, len(header))
+        # Rows are read one slide at a time, every slide repeats the header rows
+        row_count = 0
+        for page_no, page in enumerate(paginate_rows(body, options, page_size)):
+            row_count += len(page)
+            if page_no:
+                new_slide = self.new_slide(slide_type=TitleAndObjectSlide)
+            table = Tag("table:table", self.namespaces, table_attrs)
+            for _ in range(column_count):
+                table.append(Tag("table:table-column", self.namespaces, {"table:style-name": column_style_name}))
+            for row_no, row in enumerate(chain(header, page)):
+                row_style_name = even_row_style_name if row_no % 2 == 0 else odd_row_style_name
+                text_style = text_heading_style_name if row_no < len(header) else text_style_name
+                table_row = build_sub_element(
+                    table.element,
+                    "table:table-row",
+                    self.namespaces,
+                    {"table:default-cell-style-name": row_style_name},
+                )
+                for cell in row.cells:
+                    self._table_create_cell(table_row, text_style, cell)
+            new_slide.object_frame.append(table)
 
-        if code.title:
-            self._add_title(code.title, new_slide)
+            if code.title:
+                self._add_title(code.title, new_slide)
 
+        self.observer.table_rendered(row_count, column_count, page_no + 1)
+
+    def add_media(
+        self, data: bytes, extension: str, media_type: str, extent: Optional[Tuple[float, float]] = None
+    ) -> str:
+        """
+        Adds a file to the ``media`` directory of the deck, returning its path. Identical files are stored once.
+
+        ``extent`` is the largest width and height in inches the file is shown at, used to downscale images.
+        """
+        path = media_path(data, extension)
+        if path not in self.media:
+            self.file_entries.append((path, media_type))
+            self.media[path] = data
+        if self._fragment is not None and path not in self._fragment.media:
+            self._fragment.file_entries.append((path, media_type))
+            self._fragment.media[path] = data
+        if extent is not None:
+            self._add_image_extent(self.image_extents, path, extent)
+            if self._fragment is not None:
+                self._add_image_extent(self._fragment.image_extents, path, extent)
+        return path
+
+    @staticmethod
+    def _add_image_extent(extents, path, extent):
+        width, height = extents.get(path, (0.0, 0.0))
+        extents[path] = (max(width, extent[0]), max(height, extent[1]))
+
+    @profiled("images")
     def _source_code_slide_add_image_slide(self, code, slide_name):
         self.current_image_count += 1
-        media_path = f"media/image{self.current_image_count}.png"
-        image_path = f"{self._temp_dir}/{media_path}"
-        self.file_entries.append((media_path, "image/png"))
-        image_object = Image.open(BytesIO(base64.decodebytes(bytes(code.output.image_png, "utf-8"))))
-        image_object.save(image_path)
-
-        width, height = image_object.size
-        dpi_x, dpi_y = image_object.info["dpi"]
-
-        width_in_inches = width / dpi_x
-        height_in_inches = height / dpi_y
+        image, image_info = load_png(code.output.image_png)
+        width_in_inches, height_in_inches = image_info.size_in_inches
 
         new_slide = self.new_slide(slide_name, slide_type=ImageSlide if not code.title else TitleAndImageSlide)
-        new_slide.add_image(media_path, width_in_inches, height_in_inches)
+        # Images are never shown larger than the content area, whatever their size on the slide
+        *_, content_width, content_height = new_slide.content_location
+        extent = (min(width_in_inches, content_width), min(height_in_inches, content_height))
+        image_path = self.add_media(image, "png", "image/png", extent=extent)
+        new_slide.add_image(image_path, width_in_inches, height_in_inches)
 
         if code.title:
             self._add_title(code.title, new_slide)
 
-    def _table_generate_row_style(self, even_row_style_name, table_content_color, row_background_color, border_width):
-        even_row_style = Tag(
-            "style:style", self.namespaces, {"style:family": "table-cell", "style:name": even_row_style_name}
-        )
-        even_row_style.append(
+    def _table_generate_row_style(self, table_content_color, row_background_color, border_width):
+        row_style = Tag("style:style", self.namespaces, {"style:family": "table-cell"})
+        row_style.append(
             Tag(
                 "style:table-cell-properties",
                 self.namespaces,
@@ -319,14 +461,14 @@ class Presentation:
                 },
             )
         )
-        even_row_style.append(
+        row_style.append(
             Tag(
                 "loext:graphic-properties",
                 self.namespaces,
                 {"draw:fill": "solid", "draw:fill-color": row_background_color},
             )
         )
-        even_row_style.append(
+        row_style.append(
             Tag(
                 "style:paragraph-properties",
                 self.namespaces,
@@ -334,22 +476,101 @@ class Presentation:
             )
         )
 
-        return even_row_style
-
-    def _table_create_cell(self, text_style, cell):
-        cell_tag = Tag(
-            "table:table-cell",
-            self.namespaces,
-        )
-        text_p = Tag("text:p", self.namespaces)
-        span = Tag("text:span", self.namespaces, {"text:style-name": text_style})
-        span.text = cell.text
-        text_p.append(span)
-        cell_tag.append(text_p)
-        return cell_tag
+        return row_style
+
+    def _table_create_cell(self, table_row, text_style, cell: TableCell):
+        if cell.covered:
+            return build_sub_element(table_row, "table:covered-table-cell", self.namespaces)
+        attributes = {}
+        if cell.column_span > 1:
+            attributes["table:number-columns-spanned"] = str(cell.column_span)
+        if cell.row_span > 1:
+            attributes["table:number-rows-spanned"] = str(cell.row_span)
+        cell_element = build_sub_element(table_row, "table:table-cell", self.namespaces, attributes)
+        text_p = build_sub_element(cell_element, "text:p", self.namespaces)
+        build_sub_element(text_p, "text:span", self.namespaces, {"text:style-name": text_style}, text=cell.text)
+        return cell_element
+
+    def _build_code_paragraphs(self, code: CodeSlideSource) -> List[etree._Element]:
+        """
+        Builds one ``text:p`` per line of code with every line in the non highlighted style.
+        """
+        text_box = build_element("draw:text-box", self.namespaces, nsmap=self.namespaces.data)
+        used_style_names = set()
+        for line in code.lines:
+            p = build_sub_element(
+                text_box,
+                "text:p",
+                self.namespaces,
+                {
+                    "text:style-name": CODE_PARAGRAPH_STYLE_NAME,
+                    "text:class-names": "",
+                    "text:cond-style-name": "",
+                },
+            )
+            runs = self._coalesce_tokens(line)
+            for run_no, (style_name, text) in enumerate(runs, 1):
+                used_style_names.add(style_name)
+                span = build_sub_element(
+                    p,
+                    "text:span",
+                    self.namespaces,
+                    {"text:style-name": style_name, "text:class-names": ""},
+                )
+                self._add_code_text(span, text, line_end=run_no == len(runs))
+        self.use_styles(used_style_names)
+        return list(text_box)
+
+    def _coalesce_tokens(self, line: List[Tuple[Any, str]]) -> List[Tuple[str, str]]:
+        """
+        Merges the tokens of a line into ``(style_name, text)`` runs: consecutive tokens with the same style share
+        a run, and whitespace joins a neighbouring run unless one of the two styles would show on it.
+        """
+        token_style_map = self.theme.token_style_map
+        underlined = self.theme.underlined_token_styles
+        runs = []
+        for token, value in line:
+            style_name = token_style_map[token]
+            if runs:
+                previous_style_name, previous_text = runs[-1]
+                if style_name == previous_style_name or (value.isspace() and previous_style_name not in underlined):
+                    runs[-1] = (previous_style_name, previous_text + value)
+                    continue
+                if previous_text.isspace() and style_name not in underlined:
+                    runs[-1] = (style_name, previous_text + value)
+                    continue
+            runs.append((style_name, value))
+        return runs
+
+    def _add_code_text(self, span: etree._Element, text: str, line_end: bool):
+        """
+        Writes ``text`` into ``span`` keeping every space. Consecutive spaces collapse into one in ODF text, so
+        whitespace becomes ``text:s`` elements except for single spaces after a word and before more text.
+        """
+        # Splitting puts the whitespace runs at odd positions, next to an empty word where they start or end the text
+        parts = _WHITESPACE.split(text)
+        pending = ""
+        last = None
+        for index, part in enumerate(parts):
+            if index % 2 == 0 or (part == " " and parts[index - 1] and (parts[index + 1] or not line_end)):
+                pending += part
+                continue
+            if last is None:
+                span.text = pending or None
+            else:
+                last.tail = pending or None
+            pending = ""
+            last = build_sub_element(span, "text:s", self.namespaces, {"text:c": str(len(part))})
+        if last is None:
+            span.text = pending or None
+        else:
+            last.tail = pending or None
 
     def _source_code_slide_add_code_slide(self, code, slide_name, with_output):
-        for highlight in code.highlights:
+        paragraph_style_name = self.namespaces("text:style-name")
+        code_paragraphs = self._build_code_paragraphs(code)
+
+        for step, highlight in enumerate(code.highlights, 1):
             new_slide = self.new_slide(
                 slide_name, slide_type=TitleCodeAndOutputSlide if with_output else TitleAndCodeSlide
             )
@@ -357,40 +578,16 @@ class Presentation:
             if code.title:
                 self._add_title(code.title, new_slide)
 
-            for line_no, line in enumerate(code.lines, 1):
-                p = Tag(
-                    "text:p",
-                    self.namespaces,
-                    {
-                        "text:style-name": (
-                            CODE_PARAGRAPH_STYLE_NAME
-                            if line_no not in highlight
-                            else CODE_HIGHLIGHT_PARAGRAPH_STYLE_NAME
-                        ),
-                        "text:class-names": "",
-                        "text:cond-style-name": "",
-                    },
-                )
-                for token, value in line:
-                    token_style_name = f"span__{self.theme.pygments_style}__{token}".replace(".", "_").lower()
-                    if token_style_name not in self.theme.token_styles:
-                        for tt in reversed(token.split()):
-                            token_style_name = f"span__{self.theme.pygments_style}__{tt}".replace(".", "_").lower()
-                            if token_style_name in self.theme.token_styles:
-                                break
-
-                    span = Tag(
-                        "text:span",
-                        self.namespaces,
-                        {"text:style-name": token_style_name, "text:class-names": ""},
-                    )
-                    if value.isspace():
-                        space_tag = Tag("text:s", self.namespaces, {"text:c": str(len(value))})
-                        span.append(space_tag)
-                    else:
-                        span.text = value
-                    p.append(span)
-                new_slide.content_text_box.append(p)
+            # Earlier steps get copies of the prebuilt paragraphs, the last one takes the originals
+            last_step = step == len(code.highlights)
+            highlighted_lines = set(highlight)
+            content_text_box = new_slide.content_text_box.element
+            for line_no, paragraph in enumerate(code_paragraphs, 1):
+                if not last_step:
+                    paragraph = deepcopy(paragraph)
+                if line_no in highlighted_lines:
+                    paragraph.set(paragraph_style_name, CODE_HIGHLIGHT_PARAGRAPH_STYLE_NAME)
+                content_text_box.append(paragraph)
 
             if with_output:
                 for line_no, line in enumerate(code.outputs, 1):
@@ -409,56 +606,146 @@ class Presentation:
                     output_p.append(span)
                     new_slide.output_text_box.append(output_p)
 
-    def write(self, path: Path, keep_intermediate: bool = False, prettify: bool = False):
-
-        source = importlib.resources.files("presentpy") / "templates/odp/"
+    def write(
+        self, path: Union[Path, str, BinaryIO, None] = None, keep_intermediate: bool = False, prettify: bool = False
+    ) -> Optional[bytes]:
+        """
+        Writes the presentation as an ODP archive.
+
+        ``path`` can be a file path, a binary file-like object or ``None``, in which case the archive is returned
+        as bytes.
+        """
+        if isinstance(path, str):
+            path = Path(path)
+
+        if path is None:
+            buffer = BytesIO()
+            self.write(buffer, prettify=prettify)
+            return buffer.getvalue()
+
+        if not isinstance(path, Path):
+            if keep_intermediate:
+                raise ValueError("keep_intermediate requires the presentation to be written to a path")
+            self._write_archive(path, prettify=prettify)
+            return None
 
-        exploded_presentation_path = path.parent / f"{path.stem}_odp"
-
-        shutil.copytree(source, exploded_presentation_path, dirs_exist_ok=True)
-        shutil.copytree(self._temp_dir, exploded_presentation_path, dirs_exist_ok=True)
-
-        content_path = f"{exploded_presentation_path}/content.xml"
-        content_xml = Content(content_path, self.namespaces, self.theme)
+        pptx_file = path.parent / f"{path.stem}.odp"
+        self._write_archive(pptx_file, prettify=prettify)
+
+        if keep_intermediate:
+            exploded_presentation_path = path.parent / f"{path.stem}_odp"
+            with zipfile.ZipFile(pptx_file) as zip_ref:
+                zip_ref.extractall(exploded_presentation_path)
+        return None
+
+    def _write_archive(self, file: Union[Path, BinaryIO], prettify: bool = False):
+        start = time.perf_counter()
+        self.finish_slide()
+
+        options = self.image_options
+        if options is None or options.max_deck_size is None:
+            media = self.optimised_media(options)
+            archive = self._write_zip(file, media, prettify=prettify)
+            self._report_written(archive, media, time.perf_counter() - start)
+            return
+
+        # Tighten the image settings until the deck fits, the last attempt is kept if none does
+        while True:
+            buffer = BytesIO()
+            media = self.optimised_media(options)
+            archive = self._write_zip(buffer, media, prettify=prettify)
+            tightened = options.tightened()
+            if buffer.tell() <= options.max_deck_size or tightened is None:
+                break
+            options = tightened
+
+        if buffer.tell() > options.max_deck_size:
+            self.observer.warning(
+                f"Deck is {buffer.tell()} bytes, over the {options.max_deck_size} bytes budget "
+                "even with the smallest image settings"
+            )
+        if isinstance(file, Path):
+            file.write_bytes(buffer.getvalue())
+        else:
+            file.write(buffer.getvalue())
+        self._report_written(archive, media, time.perf_counter() - start)
+
+    def _report_written(self, archive: ArchiveWriter, media: Dict[str, bytes], seconds: float):
+        for path, media_type in self.file_entries:
+            if media_type.startswith("image/"):
+                self.observer.image_written(path, len(media[path]))
+        self.observer.write_finished(archive.parts, archive.size, seconds)
+
+    @profiled("images")
+    def optimised_media(self, options: Optional[ImageOptions] = None) -> Dict[str, bytes]:
+        if options is None:
+            return self.media
+        return optimise_images(self.media, self.image_extents, options)
+
+    def close(self):
+        """
+        Releases the slides streamed so far, the presentation cannot be written afterwards.
+        """
+        self.slides.close()
+
+    def __enter__(self) -> "Presentation":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write_zip(self, file: Union[Path, BinaryIO], media: Dict[str, bytes], prettify: bool = False) -> ArchiveWriter:
+        if isinstance(file, Path):
+            with file.open("wb") as f:
+                return self._write_zip(f, media, prettify=prettify)
+
+        content_xml, styles_xml, manifest_xml = self._fill_templates()
+        with stage("zip"), ArchiveWriter(file, self.archive_options) as archive:
+            # ODF readers recognise the format from the stored mimetype at the very start of the archive
+            archive.write("mimetype", read_template("mimetype"))
+            for arcname in template_files():
+                if arcname == "mimetype":
+                    continue
+                if arcname == "content.xml":
+                    with archive.open(arcname) as entry, stage("serialisation"):
+                        content_xml.write_slides(entry, self.slides, prettify=prettify)
+                elif arcname == "styles.xml":
+                    with stage("serialisation"):
+                        data = styles_xml.to_bytes(prettify=prettify)
+                    archive.write(arcname, data)
+                elif arcname == "META-INF/manifest.xml":
+                    with stage("serialisation"):
+                        data = manifest_xml.to_bytes(prettify=prettify)
+                    archive.write(arcname, data)
+                else:
+                    archive.write(arcname, read_template(arcname))
 
-        styles_path = f"{exploded_presentation_path}/styles.xml"
-        styles_xml = Styles(styles_path, self.namespaces, self.theme)
+            for file_path, _ in self.file_entries:
+                archive.write(file_path, media[file_path])
+        return archive
 
-        manifest_path = f"{exploded_presentation_path}/META-INF/manifest.xml"
-        manifest_xml = Manifest(manifest_path, self.namespaces)
+    @profiled("templates")
+    def _fill_templates(self) -> Tuple[Content, Styles, Manifest]:
+        content_xml = Content.for_theme(self.theme)
+        styles_xml = Styles.for_theme(self.theme)
+        manifest_xml = Manifest(parse_template("META-INF/manifest.xml"), self.namespaces)
 
         for file_path, media_type in self.file_entries:
             manifest_xml.add_file_entry(file_path, media_type)
 
-        for style in self.theme.styles:
-            content_xml.automatic_styles.append(style.to_element())
-
-        for style in self.styles:
-            content_xml.automatic_styles.append(style.to_element())
-
-        from copy import deepcopy
-
-        for automatic_style in content_xml.automatic_styles:
-            content_xml.styles.append(deepcopy(automatic_style))
-
-        for automatic_style in styles_xml.automatic_styles:
-            styles_xml.styles.append(deepcopy(automatic_style))
-
-        for slide in self.slides:
-            content_xml.presentation.append(slide.to_element())
-
-        manifest_xml.write(prettify=True)
-        content_xml.write(prettify=prettify)
-        styles_xml.write(prettify=True)
-
-        pptx_file = path.parent / f"{path.stem}.odp"
+        # Token and content styles no slide refers to are left out
+        prunable = self.theme.token_styles.union(CONTENT_SPAN_STYLE_NAMES)
+        content_xml.remove_styles(prunable - self.used_style_names - content_xml.referenced_style_names())
 
-        with zipfile.ZipFile(pptx_file, "w") as zip_ref:
-            for file in exploded_presentation_path.glob("**/*"):
-                zip_ref.write(file, file.relative_to(exploded_presentation_path))
+        # Table templates and the cell styles they name are common styles, the rest are automatic styles of content.xml
+        for style in styles_xml.add_table_templates([style.to_element() for style in self.styles]):
+            content_xml.automatic_styles.append(style)
 
-        if not keep_intermediate:
-            shutil.rmtree(exploded_presentation_path)
+        # Styles are written once, in the file that refers to them. content.xml can only see the common styles
+        # of styles.xml, the ones it refers to without defining them itself are moved there. Slides only refer to
+        # the styles of content.xml and to master pages, so they are not searched.
+        styles_xml.share_styles(content_xml.referenced_style_names() - content_xml.style_names())
+        return content_xml, styles_xml, manifest_xml
 
 
 def get_raw_text(token):
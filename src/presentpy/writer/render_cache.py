@@ -0,0 +1,221 @@
+import base64
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pygments
+
+from presentpy import version
+from presentpy.cache import write_atomically
+from presentpy.code_slide_source import extract_config_from_source_code
+from presentpy.readers import Cell
+from presentpy.writer.tables import TableOptions
+from presentpy.writer.theme import Theme
+from presentpy.writer.theme_bundle import bundle_key
+
+RENDER_CACHE_FORMAT_VERSION = 5
+DEFAULT_RENDER_CACHE_SIZE = 256 * 1024 * 1024
+
+CACHED_CELL_TYPES = ("code", "markdown")
+
+_SLIDE_NAME = re.compile(r"slide(\d+)\Z")
+_ATTRIBUTE_VALUE = re.compile(rb'(\s[\w:.-]+=")([^"]*)(")')
+
+
+def _shift(value: str, first: int, last: int, delta: int) -> str:
+    match = _SLIDE_NAME.match(value)
+    if match is None:
+        return value
+    number = int(match.group(1))
+    if not first <= number <= last:
+        return value
+    return f"{value[:match.start(1)]}{number + delta}{value[match.end(1):]}"
+
+
+@dataclass
+class CellFragment:
+    """
+    Everything rendering one cell added to a :class:`Presentation`: its serialised slides, the automatic styles
+    it created, the theme styles it refers to, the media it uses, and how many tables and images it numbered.
+
+    Slides are named after the deck counter at the time the cell was rendered, kept in ``first_slide``,
+    :meth:`renumbered` moves them to another position. Styles and media are named after their content.
+    """
+
+    first_slide: int
+    first_table: int
+    first_image: int
+    slides: List[bytes] = field(default_factory=list)
+    styles: str = ""
+    file_entries: List[Tuple[str, str]] = field(default_factory=list)
+    media: Dict[str, bytes] = field(default_factory=dict)
+    image_extents: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    style_names: List[str] = field(default_factory=list)
+    table_count: int = 0
+    image_count: int = 0
+
+    def renumbered(self, first_slide: int, first_table: int, first_image: int) -> "CellFragment":
+        """
+        Returns the fragment as if the cell had been rendered with the given deck counters.
+        """
+        if (first_slide, first_table, first_image) == (self.first_slide, self.first_table, self.first_image):
+            return self
+
+        delta = first_slide - self.first_slide
+        last = self.first_slide + len(self.slides) - 1
+
+        def shift(match):
+            value = _shift(match.group(2).decode(), self.first_slide, last, delta)
+            return match.group(1) + value.encode() + match.group(3)
+
+        def shift_start_tag(xml: bytes) -> bytes:
+            # Only the slide element carries the slide name
+            start_tag, _, rest = xml.partition(b">")
+            return _ATTRIBUTE_VALUE.sub(shift, start_tag) + b">" + rest
+
+        return CellFragment(
+            first_slide=first_slide,
+            first_table=first_table,
+            first_image=first_image,
+            slides=[shift_start_tag(slide) for slide in self.slides],
+            styles=self.styles,
+            file_entries=self.file_entries,
+            media=self.media,
+            image_extents=self.image_extents,
+            style_names=self.style_names,
+            table_count=self.table_count,
+            image_count=self.image_count,
+        )
+
+    def to_json(self) -> bytes:
+        values = asdict(self)
+        values["slides"] = [slide.decode() for slide in self.slides]
+        values["media"] = {path: base64.b64encode(data).decode() for path, data in self.media.items()}
+        return json.dumps(values).encode()
+
+    @classmethod
+    def from_json(cls, data: bytes) -> "CellFragment":
+        values = json.loads(data)
+        values["slides"] = [slide.encode() for slide in values["slides"]]
+        values["file_entries"] = [tuple(entry) for entry in values["file_entries"]]
+        values["media"] = {path: base64.b64decode(data) for path, data in values["media"].items()}
+        values["image_extents"] = {path: tuple(extent) for path, extent in values["image_extents"].items()}
+        return cls(**values)
+
+
+class RenderCache:
+    """
+    On-disk cache of rendered cells, so unchanged cells are spliced into a deck instead of being rendered again.
+
+    Fragments are keyed on the cell source, outputs and magic config, the table layout, the theme and the presentpy and
+    Pygments versions. Reading a fragment marks it as recently used, :meth:`prune` evicts the least recently used ones
+    once the cache holds more than ``max_size`` bytes.
+    """
+
+    def __init__(self, directory: Path, max_size: int = DEFAULT_RENDER_CACHE_SIZE):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def key(
+        self,
+        cell: Cell,
+        theme: Theme,
+        with_outputs: bool = False,
+        table_options: Optional[TableOptions] = None,
+    ) -> str:
+        values = {
+            "format": RENDER_CACHE_FORMAT_VERSION,
+            "version": version,
+            "pygments": pygments.__version__,
+            "theme": bundle_key(theme.pygments_style, theme.width, theme.height),
+            "font_size_ratio": theme.font_size_ratio,
+            "cell_type": cell.cell_type,
+            "source": cell.source,
+        }
+        if cell.cell_type == "code":
+            values["config"] = extract_config_from_source_code(cell.source)[1]
+            values["outputs"] = cell.outputs
+            values["with_outputs"] = with_outputs
+            values["tables"] = asdict(table_options or TableOptions())
+        return hashlib.sha256(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[CellFragment]:
+        path = self._path(key)
+        try:
+            fragment = CellFragment.from_json(path.read_bytes())
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return fragment
+
+    def put(self, key: str, fragment: CellFragment):
+        try:
+            write_atomically(self._path(key), fragment.to_json())
+        except OSError:
+            pass
+
+    def prune(self):
+        """
+        Deletes the least recently used fragments until the cache fits in ``max_size`` bytes.
+        """
+        entries = []
+        try:
+            for path in self.directory.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            return
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total_size -= size
+
+
+class MemoryRenderCache(RenderCache):
+    """
+    :class:`RenderCache` kept in memory for a long running process, :meth:`prune` keeps only the fragments
+    used since the previous call, so the cache holds at most one deck.
+    """
+
+    def __init__(self):
+        self.fragments: Dict[str, CellFragment] = {}
+        self._used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CellFragment]:
+        fragment = self.fragments.get(key)
+        if fragment is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._used.add(key)
+        return fragment
+
+    def put(self, key: str, fragment: CellFragment):
+        self.fragments[key] = fragment
+        self._used.add(key)
+
+    def prune(self):
+        self.fragments = {key: fragment for key, fragment in self.fragments.items() if key in self._used}
+        self._used = set()
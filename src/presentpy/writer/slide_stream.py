@@ -0,0 +1,66 @@
+import re
+import shutil
+import tempfile
+from typing import BinaryIO
+
+from lxml import etree
+
+from presentpy.namespaces import Namespaces
+
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+_NAMESPACE_DECLARATION = re.compile(rb'\sxmlns:([A-Za-z_][\w.-]*)="([^"]*)"')
+
+
+class SlideStream:
+    """
+    Serialised ``draw:page`` elements waiting to be written into ``content.xml``.
+
+    Slides are serialised as soon as they are finished, so only the slide being built is held as a tree.
+    The serialised bytes are kept in memory and spill to an anonymous temporary file once they grow past
+    ``max_size``. Close the stream once the deck is written, or use it as a context manager.
+    """
+
+    def __init__(self, namespaces: Namespaces, max_size: int = SPOOL_MAX_SIZE):
+        self.namespaces = namespaces
+        self.count = 0
+        self._buffer = tempfile.SpooledTemporaryFile(max_size=max_size)
+
+    def _drop_declaration(self, match):
+        prefix, uri = match.group(1).decode(), match.group(2).decode()
+        if self.namespaces.get(prefix) == uri:
+            return b""
+        return match.group(0)
+
+    def write(self, element: etree._Element):
+        self.write_serialised(etree.tostring(element, encoding="UTF-8"))
+
+    def write_serialised(self, serialised: bytes):
+        """
+        Writes a slide that was already serialised on its own, with its namespace declarations.
+        """
+        # content.xml already declares every namespace on its root element, so the declarations
+        # lxml adds to the detached slide are dropped to keep the output the same as a single tree.
+        start_tag, _, rest = serialised.partition(b">")
+        start_tag = _NAMESPACE_DECLARATION.sub(self._drop_declaration, start_tag)
+        self._buffer.write(start_tag)
+        self._buffer.write(b">")
+        self._buffer.write(rest)
+        self.count += 1
+
+    def copy_to(self, fileobj: BinaryIO):
+        self._buffer.seek(0)
+        shutil.copyfileobj(self._buffer, fileobj)
+        self._buffer.seek(0, 2)
+
+    def close(self):
+        """
+        Drops the serialised slides, removing the temporary file they spilled to if any.
+        """
+        self._buffer.close()
+
+    def __enter__(self) -> "SlideStream":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,3 +1,5 @@
+from copy import deepcopy
+
 from presentpy.constants import (
     CODE_FRAME_STYLE_NAME,
     DEFAULT_STYLE_NAME_FOR_CONTENT,
@@ -27,6 +29,7 @@ class SlideTag(Tag):
                 "draw:id": name,
                 "draw:master-page-name": self.get_master_page_style_name(),
             },
+            nsmap=namespaces.data,
         )
         self.name = name
         self.theme = theme
@@ -104,8 +107,8 @@ class SlideTag(Tag):
             },
         )
 
-        for child in self.children:
-            master_page.append(child)
+        for child in self.element:
+            master_page.element.append(deepcopy(child))
 
         return master_page
 
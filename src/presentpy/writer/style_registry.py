@@ -0,0 +1,56 @@
+import hashlib
+from typing import Dict, Iterator
+
+from lxml import etree
+
+from presentpy.namespaces import Namespaces
+from presentpy.writer.tag import Tag
+
+# Table templates are named by ``table:name``, every other style by ``style:name``
+NAME_ATTRIBUTES = ("style:name", "table:name")
+
+
+class StyleRegistry:
+    """
+    Automatic styles of a deck, interned by content.
+
+    Styles are named after a hash of their element with the name left out, so styles with the same properties
+    get the same name and are stored once, whichever cell or cached fragment added them.
+    """
+
+    def __init__(self, namespaces: Namespaces):
+        self.namespaces = namespaces
+        self._styles: Dict[str, Tag] = {}
+
+    def add(self, style: Tag, prefix: str, name_attribute: str = "style:name") -> str:
+        """
+        Names ``style`` after its content and adds it unless an identical style is already registered,
+        returning the name to refer to it by.
+        """
+        style.element.attrib.pop(self.namespaces.resolve(name_attribute), None)
+        digest = hashlib.sha256(etree.tostring(style.element, method="c14n")).hexdigest()[:8]
+        name = f"{prefix}-{digest}"
+        style[name_attribute] = name
+        self._styles.setdefault(name, style)
+        return name
+
+    def add_named(self, style: Tag) -> str:
+        """
+        Adds a style named by :meth:`add` earlier, e.g. one read back from a cached fragment.
+        """
+        name = next(
+            style.element.get(self.namespaces.resolve(attribute))
+            for attribute in NAME_ATTRIBUTES
+            if style.element.get(self.namespaces.resolve(attribute)) is not None
+        )
+        self._styles.setdefault(name, style)
+        return name
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._styles
+
+    def __iter__(self) -> Iterator[Tag]:
+        return iter(self._styles.values())
+
+    def __len__(self) -> int:
+        return len(self._styles)
@@ -0,0 +1,112 @@
+from collections import deque
+from dataclasses import dataclass, replace
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from presentpy.html_table import TableCell, TableRow
+
+# Impress shows table text at 18pt when no size is given, a row is a line of text and the cell padding
+TABLE_FONT_SIZE = 18
+TABLE_LINE_SPACING = 1.2
+TABLE_CELL_PADDING = 0.1
+POINTS_PER_INCH = 72
+
+ELLIPSIS = "..."
+
+
+@dataclass(frozen=True)
+class TableOptions:
+    """
+    How DataFrame outputs are laid out on slides.
+
+    ``rows_per_slide`` is the number of body rows on each slide, derived from the height of the slide when unset.
+    With ``elide`` set, only the first and last ``elide`` rows of a table are shown, around a row of ellipses.
+    """
+
+    rows_per_slide: Optional[int] = None
+    elide: Optional[int] = None
+
+
+def rows_per_slide(height: float, header_rows: int, font_size: float = TABLE_FONT_SIZE) -> int:
+    """
+    Returns how many body rows fit under ``header_rows`` header rows in ``height`` inches.
+    """
+    row_height = font_size * TABLE_LINE_SPACING / POINTS_PER_INCH + TABLE_CELL_PADDING
+    return max(1, int(height / row_height) - header_rows)
+
+
+def split_header(rows: Iterator[TableRow]) -> Tuple[List[TableRow], Iterator[TableRow]]:
+    """
+    Reads the header rows at the start of ``rows``, returning them along with the rest of the rows.
+
+    Tables without header rows get their first row as the header, as pandas always writes one.
+    """
+    first_row = next(rows, None)
+    if first_row is None:
+        return [], rows
+    header = [first_row]
+    if first_row.header:
+        for row in rows:
+            if not row.header:
+                return header, chain([row], rows)
+            header.append(row)
+    return header, rows
+
+
+def repeat_row_spans(rows: Iterable[TableRow]) -> Iterator[TableRow]:
+    """
+    Replaces row spans with the spanning text repeated in every row, so rows can be shown on separate slides.
+    """
+    # Column -> the spanning cell and the number of rows it still covers
+    spans: Dict[int, Tuple[TableCell, int]] = {}
+    for row in rows:
+        cells = list(row.cells)
+        for column, (cell, remaining) in list(spans.items()):
+            if column < len(cells) and cells[column].covered:
+                cells[column] = replace(cell, row_span=1)
+            if remaining > 1:
+                spans[column] = (cell, remaining - 1)
+            else:
+                del spans[column]
+        for column, cell in enumerate(row.cells):
+            if not cell.covered and cell.row_span > 1:
+                spans[column] = (cell, cell.row_span - 1)
+                cells[column] = replace(cell, row_span=1)
+        yield TableRow(cells, row.header)
+
+
+def elide_rows(rows: Iterable[TableRow], count: int, column_count: int) -> Iterator[TableRow]:
+    """
+    Yields the first and last ``count`` rows, with a row of ellipses in place of the ones in between.
+    """
+    rows = iter(rows)
+    yield from islice(rows, count)
+    # One row more than is kept, a single row in between is shown as the ellipses would take its place
+    last_rows = deque(maxlen=count + 1)
+    skipped = 0
+    for row in rows:
+        if len(last_rows) == count + 1:
+            skipped += 1
+        last_rows.append(row)
+    if skipped:
+        yield TableRow([TableCell(ELLIPSIS) for _ in range(column_count)])
+        last_rows.popleft()
+    yield from last_rows
+
+
+def paginate_rows(rows: Iterator[TableRow], options: TableOptions, page_size: int) -> Iterator[List[TableRow]]:
+    """
+    Splits the body rows of a table into pages of at most ``page_size`` rows, reading one page at a time.
+
+    Row spans are kept when the table fits on one slide and repeated in every row otherwise.
+    """
+    first_page = list(islice(rows, page_size + 1))
+    if len(first_page) <= page_size and (options.elide is None or len(first_page) <= 2 * options.elide + 1):
+        yield first_page
+        return
+
+    rows = repeat_row_spans(chain(first_page, rows))
+    if options.elide is not None:
+        rows = elide_rows(rows, options.elide, len(first_page[0].cells))
+    while page := list(islice(rows, page_size)):
+        yield page
@@ -1,27 +1,62 @@
 import re
+from copy import deepcopy
 from typing import Dict, List, Optional
 
 from lxml import etree, objectify
 
 from presentpy.namespaces import Namespaces
+from presentpy.writer.builder import build_element
 
 
 class Tag:
-    def __init__(self, element_name: str, namespaces: Namespaces, attributes: Optional[Dict[str, str]] = None):
+    """
+    Thin wrapper around an lxml element that accepts prefixed names, e.g. ``Tag("text:span", namespaces)``.
+
+    The element is built as soon as the tag is created, so appending tags builds the lxml tree directly.
+    """
+
+    __slots__ = ("namespaces", "element")
+
+    def __init__(
+        self,
+        element_name: str,
+        namespaces: Namespaces,
+        attributes: Optional[Dict[str, str]] = None,
+        nsmap: Optional[Dict[str, str]] = None,
+    ):
         self.namespaces = namespaces
-        self.element_name = element_name
-        self.attributes = attributes or {}
-        self.text: Optional[str] = None
-        self.children: List[Tag] = []
+        self.element = build_element(element_name, namespaces, attributes, nsmap=nsmap)
+
+    @classmethod
+    def from_element(cls, element: etree._Element, namespaces: Namespaces) -> "Tag":
+        tag = cls.__new__(cls)
+        tag.namespaces = namespaces
+        tag.element = element
+        return tag
+
+    @property
+    def text(self) -> Optional[str]:
+        return self.element.text
+
+    @text.setter
+    def text(self, value: Optional[str]):
+        self.element.text = value
+
+    @property
+    def children(self) -> List[etree._Element]:
+        return list(self.element)
 
     def __setitem__(self, key, value):
-        self.attributes[key] = value
+        self.element.set(self.namespaces(key), value)
 
     def __getitem__(self, key):
-        return self.attributes[key]
+        value = self.element.get(self.namespaces(key))
+        if value is None:
+            raise KeyError(key)
+        return value
 
     def append(self, tag: "Tag"):
-        self.children.append(tag)
+        self.element.append(tag.element)
 
     @staticmethod
     def _cleanup_xml(element):
@@ -35,21 +70,13 @@ class Tag:
         return element
 
     def to_element(self):
-        new_page = etree.Element(self.namespaces(self.element_name), nsmap=self.namespaces.data)
-
-        if self.text is not None:
-            new_page.text = self.text
-
-        for attr, value in self.attributes.items():
-            new_page.set(self.namespaces(attr), value)
-
-        for child in self.children:
-            new_page.append(child.to_element())
-
-        return new_page
+        """
+        Returns the underlying element, not a copy, appending it somewhere else moves it.
+        """
+        return self.element
 
     def __str__(self):
-        new_page = self.to_element()
+        new_page = deepcopy(self.element)
 
         Tag._cleanup_xml(new_page)
         return Tag._to_xml_str(new_page)
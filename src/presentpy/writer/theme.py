@@ -1,10 +1,27 @@
+from functools import cached_property
+from typing import TYPE_CHECKING, List, Optional, Set, Tuple
+
 from colour import Color
+from lxml import etree
 from pygments.styles import get_style_by_name
-from pygments.token import Comment, Literal, String, Token
+from pygments.token import STANDARD_TYPES, Comment, Literal, String, Token
 
 from presentpy.namespaces import Namespaces
 from presentpy.writer.tag import Tag
 
+if TYPE_CHECKING:
+    from presentpy.writer.theme_bundle import ThemeBundle
+
+COLOR_PROPERTIES = (
+    "background_color",
+    "content_color",
+    "content_color_alt",
+    "highlight_color",
+    "table_row_even_background_color",
+    "table_row_odd_background_color",
+    "title_color",
+)
+
 
 def convert_color(color: str):
     if len(color) == 4:
@@ -12,9 +29,46 @@ def convert_color(color: str):
     return color
 
 
+class TokenStyleMap(dict):
+    """
+    Maps Pygments token types to the name of the ODF text style used for them.
+
+    Token types that are not in the map yet are resolved through their parent types and remembered.
+    """
+
+    def __init__(self, pygments_style: str, token_styles: set):
+        super().__init__()
+        self.pygments_style = pygments_style
+        self.token_styles = token_styles
+
+    def style_name(self, token) -> str:
+        return f"span__{self.pygments_style}__{token}".replace(".", "_").lower()
+
+    def resolve(self, token) -> str:
+        token_style_name = self.style_name(token)
+        if token_style_name not in self.token_styles:
+            for tt in reversed(token.split()):
+                token_style_name = self.style_name(tt)
+                if token_style_name in self.token_styles:
+                    break
+        return token_style_name
+
+    def __missing__(self, token):
+        token_style_name = self[token] = self.resolve(token)
+        return token_style_name
+
+
 class Theme:
 
-    def __init__(self, pygments_style: str, namespaces: Namespaces, height=7.5, width=13.33, font_size_ratio=0.5 / 36):
+    def __init__(
+        self,
+        pygments_style: str,
+        namespaces: Namespaces,
+        height=7.5,
+        width=13.33,
+        font_size_ratio=0.5 / 36,
+        bundle: Optional["ThemeBundle"] = None,
+    ):
         self.styles = []
         self.namespaces = namespaces
         self.pygments_style = pygments_style
@@ -22,9 +76,20 @@ class Theme:
         self.height = height
         self.token_styles = set()
         self.font_size_ratio = font_size_ratio
+        self.master_pages: Optional[Tuple[List[etree._Element], List[etree._Element]]] = None
 
         self.style = get_style_by_name(self.pygments_style)
 
+        if bundle is not None:
+            bundle.apply(self)
+        else:
+            self._build_token_styles()
+
+        self.token_style_map = TokenStyleMap(self.pygments_style, self.token_styles)
+        for token in STANDARD_TYPES:
+            self.token_style_map[token] = self.token_style_map.resolve(token)
+
+    def _build_token_styles(self):
         for token, str_style in self.style.styles.items():
             style_parts = set(str_style.split())
 
@@ -72,36 +137,46 @@ class Theme:
             self.token_styles.add(inner_style_name)
             self.styles.append(text_style)
 
-        self._table_row_odd_background_color = Color(self.style.background_color)
-        max_luminance = min(self._table_row_odd_background_color.luminance + 0.05, 1)
-        self._table_row_odd_background_color.set_luminance(max_luminance)
-
-        self._table_row_even_background_color = Color(self.style.background_color)
-        min_luminance = max(self._table_row_even_background_color.luminance - 0.05, 0)
-        self._table_row_even_background_color.set_luminance(min_luminance)
-
+    @cached_property
+    def underlined_token_styles(self) -> Set[str]:
+        """
+        Names of the token styles that show on whitespace, so spaces cannot take them from a neighbouring token.
+        """
+        underline_style = self.namespaces("style:text-underline-style")
+        return {
+            style["style:name"]
+            for style in self.styles
+            if any(properties.get(underline_style) for properties in style.children)
+        }
+
+    @cached_property
+    def _fallback_color(self):
         fallback_color = Color(self.style.background_color)
         fallback_color_luma = 0.2126 * fallback_color.red + 0.7152 * fallback_color.green + 0.0722 * fallback_color.blue
+        color = Color(self.style.background_color)
         if fallback_color_luma > 128:
-            self._fallback_color = Color(self.style.background_color)
-            self._fallback_color.set_luminance(max(fallback_color.get_luminance() - 0.5, 0))
+            color.set_luminance(max(fallback_color.get_luminance() - 0.5, 0))
         else:
-            self._fallback_color = Color(self.style.background_color)
-            self._fallback_color.set_luminance(min(fallback_color.get_luminance() + 0.5, 1))
+            color.set_luminance(min(fallback_color.get_luminance() + 0.5, 1))
+        return color
 
-    @property
+    @cached_property
     def table_row_odd_background_color(self):
-        return convert_color(self._table_row_odd_background_color.hex)
+        color = Color(self.style.background_color)
+        color.set_luminance(min(color.luminance + 0.05, 1))
+        return convert_color(color.hex)
 
-    @property
+    @cached_property
     def table_row_even_background_color(self):
-        return convert_color(self._table_row_even_background_color.hex)
+        color = Color(self.style.background_color)
+        color.set_luminance(max(color.luminance - 0.05, 0))
+        return convert_color(color.hex)
 
-    @property
+    @cached_property
     def background_color(self):
         return convert_color(self.style.background_color)
 
-    @property
+    @cached_property
     def title_color(self):
         selected_token_style = self._find_style_for_token(String, Literal, Comment)
         style_parts = set(selected_token_style.split())
@@ -110,7 +185,7 @@ class Theme:
                 return convert_color(part)
         return str(self._fallback_color)
 
-    @property
+    @cached_property
     def highlight_color(self):
         return convert_color(self.style.highlight_color)
 
@@ -118,7 +193,7 @@ class Theme:
     def table_border_width(self):
         return f"{0.03}in"
 
-    @property
+    @cached_property
     def content_color(self):
         selected_token_style = self._find_style_for_token(Comment, String, Literal)
         style_parts = set(selected_token_style.split())
@@ -127,7 +202,7 @@ class Theme:
                 return convert_color(part)
         return str(self._fallback_color)
 
-    @property
+    @cached_property
     def content_color_alt(self):
         selected_token_style = self._find_style_for_token()
         style_parts = set(selected_token_style.split())
@@ -0,0 +1,111 @@
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import pygments
+
+from presentpy import version
+from presentpy.cache import write_atomically
+from presentpy.namespaces import Namespaces
+from presentpy.templates.styles import build_master_pages
+from presentpy.writer.builder import parse_elements, serialise_elements
+from presentpy.writer.tag import Tag
+from presentpy.writer.theme import COLOR_PROPERTIES, Theme
+
+BUNDLE_FORMAT_VERSION = 1
+
+
+@dataclass
+class ThemeBundle:
+    """
+    Everything a :class:`Theme` computes from its Pygments style and page size: the resolved colours,
+    the token text styles and the master pages, kept as XML so it can be cached on disk.
+    """
+
+    pygments_style: str
+    width: float
+    height: float
+    colors: Dict[str, str]
+    token_styles: str
+    master_pages: str
+    background_styles: str
+
+    @classmethod
+    def compile(cls, theme: Theme) -> "ThemeBundle":
+        if theme.master_pages is None:
+            theme.master_pages = build_master_pages(theme.namespaces, theme)
+        master_pages, background_styles = theme.master_pages
+
+        return cls(
+            pygments_style=theme.pygments_style,
+            width=theme.width,
+            height=theme.height,
+            colors={name: getattr(theme, name) for name in COLOR_PROPERTIES},
+            token_styles=serialise_elements([style.to_element() for style in theme.styles], theme.namespaces),
+            master_pages=serialise_elements(master_pages, theme.namespaces),
+            background_styles=serialise_elements(background_styles, theme.namespaces),
+        )
+
+    def apply(self, theme: Theme):
+        # Colours are cached properties, seeding the instance dictionary skips computing them
+        theme.__dict__.update(self.colors)
+
+        style_name = theme.namespaces("style:name")
+        token_styles = parse_elements(self.token_styles)
+        theme.styles = [Tag.from_element(element, theme.namespaces) for element in token_styles]
+        theme.token_styles = {element.get(style_name) for element in token_styles}
+        theme.master_pages = (parse_elements(self.master_pages), parse_elements(self.background_styles))
+
+    def to_json(self) -> bytes:
+        return json.dumps({"key": bundle_key(self.pygments_style, self.width, self.height), **asdict(self)}).encode()
+
+    @classmethod
+    def from_json(cls, data: bytes) -> "ThemeBundle":
+        values = json.loads(data)
+        key = values.pop("key")
+        bundle = cls(**values)
+        if key != bundle_key(bundle.pygments_style, bundle.width, bundle.height):
+            raise ValueError("Theme bundle was compiled by a different version")
+        return bundle
+
+
+def bundle_key(pygments_style: str, width: float, height: float) -> str:
+    key = f"{BUNDLE_FORMAT_VERSION}:{version}:{pygments.__version__}:{pygments_style}:{width:.4f}x{height:.4f}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def load_theme(
+    pygments_style: str,
+    namespaces: Namespaces,
+    height: float = 7.5,
+    width: float = 13.33,
+    cache_directory: Optional[Path] = None,
+) -> Theme:
+    """
+    Builds a :class:`Theme`, using the compiled bundle stored in ``cache_directory`` when there is one.
+
+    Bundles are compiled and stored on a cache miss, and keyed on the presentpy and Pygments versions so
+    upgrading either of them invalidates the cache. Without ``cache_directory`` the theme is built from scratch.
+    """
+    if cache_directory is None:
+        return Theme(pygments_style, namespaces, height=height, width=width)
+
+    key = bundle_key(pygments_style, width, height)
+    bundle_path = Path(cache_directory) / "themes" / f"{pygments_style}-{key}.json"
+
+    try:
+        bundle = ThemeBundle.from_json(bundle_path.read_bytes())
+    except (OSError, ValueError, KeyError, TypeError):
+        bundle = None
+
+    if bundle is not None:
+        return Theme(pygments_style, namespaces, height=height, width=width, bundle=bundle)
+
+    theme = Theme(pygments_style, namespaces, height=height, width=width)
+    try:
+        write_atomically(bundle_path, ThemeBundle.compile(theme).to_json())
+    except OSError:
+        pass
+    return theme
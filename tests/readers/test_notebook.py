@@ -0,0 +1,105 @@
+import json
+
+import nbformat
+import pytest
+
+from presentpy.readers import NotebookCell, iter_notebook_cells, notebook
+
+
+def as_tuples(cells):
+    return [(cell.cell_type, cell.source, cell.get("outputs", []), cell.metadata) for cell in cells]
+
+
+@pytest.mark.parametrize("read_size", [1, 16, 1024 * 1024])
+def test_cells_match_nbformat(read_size):
+    expected = nbformat.read("tests/files/test.ipynb", as_version=4).cells
+
+    cells = list(iter_notebook_cells("tests/files/test.ipynb", read_size=read_size))
+
+    assert all(isinstance(cell, NotebookCell) for cell in cells)
+    assert [(cell.cell_type, cell.source, cell.outputs, cell.metadata) for cell in cells] == as_tuples(expected)
+
+
+def test_without_orjson(monkeypatch):
+    monkeypatch.setattr(notebook, "orjson", None)
+    expected = nbformat.read("tests/files/test.ipynb", as_version=4).cells
+
+    cells = iter_notebook_cells("tests/files/test.ipynb")
+
+    assert [(cell.cell_type, cell.source, cell.outputs, cell.metadata) for cell in cells] == as_tuples(expected)
+
+
+def test_validate(tmp_path):
+    cells = list(iter_notebook_cells("tests/files/test.ipynb", validate=True))
+    assert cells == nbformat.read("tests/files/test.ipynb", as_version=4).cells
+
+    path = tmp_path / "notebook.ipynb"
+    cell = {"cell_type": "markdown", "metadata": {}, "source": "# Title", "unexpected": 1}
+    path.write_text(json.dumps({"cells": [cell], "metadata": {}, "nbformat": 4, "nbformat_minor": 4}))
+
+    assert [cell.source for cell in iter_notebook_cells(path)] == ["# Title"]
+    with pytest.raises(nbformat.ValidationError):
+        list(iter_notebook_cells(path, validate=True))
+
+
+def test_keys_in_any_order(tmp_path):
+    path = tmp_path / "notebook.ipynb"
+    cells = [
+        {"cell_type": "markdown", "metadata": {}, "source": ["# Title\n", "\n", "text"]},
+        {
+            "cell_type": "code",
+            "execution_count": 1,
+            "metadata": {},
+            "outputs": [{"name": "stdout", "output_type": "stream", "text": ["1\n", "2\n"]}],
+            "source": ["print(1)\n", "print(2)"],
+        },
+    ]
+    path.write_text(json.dumps({"nbformat": 4, "metadata": {"kernelspec": {}}, "cells": cells, "nbformat_minor": 5}))
+
+    markdown, code = iter_notebook_cells(path, read_size=8)
+
+    assert markdown.source == "# Title\n\ntext"
+    assert code.source == "print(1)\nprint(2)"
+    assert code.outputs[0]["text"] == "1\n2\n"
+
+
+def test_cells_are_yielded_as_they_are_read(tmp_path):
+    path = tmp_path / "notebook.ipynb"
+    cell = {"cell_type": "markdown", "metadata": {}, "source": "# Title"}
+    # Everything after the first cell is cut off
+    path.write_text(json.dumps({"cells": [cell, cell]})[:-20])
+
+    cells = iter_notebook_cells(path, read_size=16)
+
+    assert next(cells).source == "# Title"
+    with pytest.raises(ValueError):
+        next(cells)
+
+
+def test_empty_notebook(tmp_path):
+    path = tmp_path / "notebook.ipynb"
+    path.write_text('{"cells": [], "metadata": {}}')
+    assert list(iter_notebook_cells(path)) == []
+
+    path.write_text("{}")
+    assert list(iter_notebook_cells(path)) == []
+
+
+def test_older_notebooks_are_converted(tmp_path):
+    path = tmp_path / "notebook.ipynb"
+    notebook = nbformat.v3.new_notebook(
+        worksheets=[nbformat.v3.new_worksheet(cells=[nbformat.v3.new_code_cell(input="x = 1")])]
+    )
+    path.write_text(nbformat.writes(notebook, version=3))
+
+    [cell] = iter_notebook_cells(path)
+
+    assert (cell.cell_type, cell.source) == ("code", "x = 1")
+
+
+def test_not_json(tmp_path):
+    path = tmp_path / "notebook.ipynb"
+    path.write_text("not a notebook")
+
+    with pytest.raises(ValueError, match="not valid JSON"):
+        list(iter_notebook_cells(path))
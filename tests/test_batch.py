@@ -0,0 +1,63 @@
+import shutil
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from presentpy.__main__ import process
+from presentpy.batch import expand_sources, plan_outputs
+
+
+@pytest.fixture
+def notebooks_dir(tmp_path):
+    source = Path("tests/files/test.ipynb")
+    (tmp_path / "notebooks" / "week1").mkdir(parents=True)
+    (tmp_path / "notebooks" / ".ipynb_checkpoints").mkdir()
+    shutil.copy(source, tmp_path / "notebooks" / "intro.ipynb")
+    shutil.copy(source, tmp_path / "notebooks" / "week1" / "intro.ipynb")
+    shutil.copy(source, tmp_path / "notebooks" / ".ipynb_checkpoints" / "intro-checkpoint.ipynb")
+    return tmp_path / "notebooks"
+
+
+def test_expand_sources_directory(notebooks_dir):
+    sources = expand_sources([str(notebooks_dir)])
+
+    assert sources == [
+        (notebooks_dir / "intro.ipynb", Path("intro.odp")),
+        (notebooks_dir / "week1" / "intro.ipynb", Path("week1/intro.odp")),
+    ]
+
+
+def test_expand_sources_glob_and_duplicates(notebooks_dir):
+    sources = expand_sources([f"{notebooks_dir}/*.ipynb", str(notebooks_dir / "intro.ipynb")])
+
+    assert sources == [(notebooks_dir / "intro.ipynb", Path("intro.odp"))]
+
+
+def test_expand_sources_no_match(tmp_path):
+    with pytest.raises(ValueError):
+        expand_sources([f"{tmp_path}/*.ipynb"])
+
+
+def test_plan_outputs_collision(notebooks_dir, tmp_path):
+    sources = expand_sources([str(notebooks_dir / "intro.ipynb"), str(notebooks_dir / "week1" / "intro.ipynb")])
+
+    with pytest.raises(ValueError):
+        plan_outputs(sources, tmp_path / "out")
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_process_batch(notebooks_dir, tmp_path, jobs):
+    (notebooks_dir / "empty.ipynb").write_text(
+        '{"cells": [{"cell_type": "markdown", "id": "empty", "metadata": {}, "source": ""}],'
+        ' "metadata": {}, "nbformat": 4, "nbformat_minor": 5}'
+    )
+    output = tmp_path / "out"
+
+    result = CliRunner().invoke(process, [str(notebooks_dir), "--output", str(output), "--jobs", jobs])
+
+    assert result.exit_code == 1
+    assert (output / "intro.odp").is_file()
+    assert (output / "week1" / "intro.odp").is_file()
+    assert not (output / "empty.odp").exists()
+    assert "Converted 2 of 3 notebooks" in result.output
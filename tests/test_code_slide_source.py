@@ -5,10 +5,12 @@ from pygments.token import Token
 from presentpy.code_slide_source import (
     CodeOutputs,
     CodeSlideSource,
+    get_lexer,
     get_parsed_lines,
     parse_highlights,
     parse_magic_config,
 )
+from presentpy.readers import NotebookCell
 
 
 @pytest.fixture
@@ -74,6 +76,27 @@ def test_full_parse(get_cell):
     # fmt: on
 
 
+def test_from_notebook_cell():
+    cell = NotebookCell.from_dict(
+        {
+            "cell_type": "code",
+            "source": ["df\n", '#% title="Data"'],
+            "outputs": [
+                {"output_type": "stream", "name": "stdout", "text": ["loaded\n", "\n"]},
+                {
+                    "output_type": "execute_result",
+                    "data": {"text/plain": ["   a\n", "0  1"], "text/html": ["<table>\n", "</table>"]},
+                },
+            ],
+        }
+    )
+
+    code_slide = CodeSlideSource.from_code_cell(cell)
+
+    assert code_slide.title == "Data"
+    assert code_slide.output == CodeOutputs(stream="loaded", text_plain="a\n0  1", text_html="<table>\n</table>")
+
+
 @pytest.mark.parametrize(
     "source, expected_output",
     [
@@ -111,3 +134,8 @@ def test_parse_highlights_single_range(source, expected_output):
 def test_parse_magic_config(config, expected_config):
     result = parse_magic_config(config)
     assert result == expected_config
+
+
+def test_get_lexer_is_cached():
+    assert get_lexer("python") is get_lexer("python")
+    assert get_lexer("python") is not get_lexer("javascript")
@@ -1,9 +1,13 @@
 import difflib
 import filecmp
+import io
+import json
 import os
 import shutil
+import zipfile
 
 from click.testing import CliRunner
+from lxml import etree
 
 from presentpy.__main__ import process
 
@@ -85,3 +89,123 @@ def test_process_notebook(tmp_path):
 
         assert result.exit_code == 0
         assert compare_dirs(expected_folder, output_folder)
+
+
+def test_process_notebook_to_stdout():
+    runner = CliRunner()
+
+    result = runner.invoke(process, ["tests/files/test.ipynb", "--theme", "default", "--output", "-"])
+
+    assert result.exit_code == 0
+    with zipfile.ZipFile(io.BytesIO(result.stdout_bytes)) as zip_ref:
+        assert zip_ref.testzip() is None
+        expected_files = {"content.xml", "styles.xml", "media/48e3ec9c44ec7358.png", "media/f94d3c1e4c61d404.png"}
+        assert expected_files <= set(zip_ref.namelist())
+        first, *rest = zip_ref.infolist()
+        assert (first.filename, first.compress_type) == ("mimetype", zipfile.ZIP_STORED)
+        for info in rest:
+            expected = zipfile.ZIP_STORED if info.filename.endswith(".png") else zipfile.ZIP_DEFLATED
+            assert info.compress_type == expected
+
+
+def test_process_notebook_with_profile(tmp_path):
+    runner = CliRunner()
+
+    result = runner.invoke(
+        process,
+        ["tests/files/test.ipynb", "--output", str(tmp_path), "--profile-format", "json"],
+        env={"PRESENTPY_PROFILE": "1"},
+    )
+
+    assert result.exit_code == 0
+    report = json.loads(result.stderr)
+    assert {"read", "lexing", "markdown", "tables", "images", "slides", "templates", "serialisation", "zip"} <= set(
+        report["stages"]
+    )
+    assert report["counts"]["slides"] == 9
+    with zipfile.ZipFile(tmp_path / "test.odp") as zip_ref:
+        assert report["counts"]["content.xml bytes"] == zip_ref.getinfo("content.xml").file_size
+
+
+def style_names(parent, attributes=("name",)):
+    names = set()
+    for element in parent.iter(etree.Element):
+        for name, value in element.attrib.items():
+            if value and etree.QName(name).localname.endswith(attributes):
+                names.add(value)
+    return names
+
+
+def test_styles_are_written_once_where_they_are_used():
+    runner = CliRunner()
+
+    result = runner.invoke(process, ["tests/files/test.ipynb", "--theme", "monokai", "--output", "-"])
+
+    assert result.exit_code == 0
+    with zipfile.ZipFile(io.BytesIO(result.stdout_bytes)) as zip_ref:
+        assert zip_ref.testzip() is None
+        content = etree.fromstring(zip_ref.read("content.xml"))
+        styles = etree.fromstring(zip_ref.read("styles.xml"))
+
+    office = "{urn:oasis:names:tc:opendocument:xmlns:office:1.0}"
+    content_automatic = style_names(content.find(f"{office}automatic-styles"))
+    styles_automatic = style_names(styles.find(f"{office}automatic-styles"))
+    styles_common = style_names(styles.find(f"{office}styles"))
+    defined = content_automatic | styles_automatic | styles_common
+
+    assert len(content.find(f"{office}styles")) == 0
+    assert not styles_automatic & styles_common
+    # Every style a file refers to is one it can see, content.xml only sees the common styles of styles.xml
+    references = ("style-name", "template-name")
+    assert style_names(content, references) & defined <= content_automatic | styles_common
+    assert style_names(styles, references) & defined <= styles_automatic | styles_common
+
+    # ODF only allows table templates among the common styles, their rows can only name common styles
+    table = "{urn:oasis:names:tc:opendocument:xmlns:table:1.0}"
+    templates = styles.find(f"{office}styles").findall(f"{table}table-template")
+    assert templates
+    assert len(content.findall(f".//{table}table-template")) == 0
+    assert len(styles.find(f"{office}automatic-styles").findall(f"{table}table-template")) == 0
+    assert style_names(content, ("template-name",)) <= {template.get(f"{table}name") for template in templates}
+    assert {row.get(f"{table}style-name") for template in templates for row in template} <= styles_common
+
+
+def test_process_notebook_with_cell_cache(tmp_path, cache_directory):
+    runner = CliRunner()
+
+    expected_folder = "tests/outputs/test_odp"
+    output_file = tmp_path / "result.odp"
+    arguments = ["tests/files/test.ipynb", "--theme", "default", "--output", str(output_file)]
+    arguments += ["--prettify", "--keep-intermediate", "--cell-cache"]
+
+    for _ in range(2):
+        shutil.rmtree(tmp_path / "result_odp", ignore_errors=True)
+        result = runner.invoke(process, arguments)
+
+        assert result.exit_code == 0
+        assert compare_dirs(expected_folder, tmp_path / "result_odp")
+    assert list((cache_directory / "cells").glob("*.json"))
+
+
+def test_cell_cache_requires_cache():
+    runner = CliRunner()
+
+    result = runner.invoke(process, ["tests/files/test.ipynb", "--cell-cache", "--no-cache"])
+
+    assert result.exit_code != 0
+    assert "--cell-cache cannot be combined with --no-cache" in result.output
+
+
+def test_validate_rejects_invalid_notebook(tmp_path):
+    notebook = json.loads(open("tests/files/test.ipynb").read())
+    notebook["cells"][0]["unexpected"] = 1
+    path = tmp_path / "invalid.ipynb"
+    path.write_text(json.dumps(notebook))
+    runner = CliRunner()
+
+    result = runner.invoke(process, [str(path), "--output", str(tmp_path)])
+    assert result.exit_code == 0
+
+    result = runner.invoke(process, [str(path), "--output", str(tmp_path), "--validate"])
+    assert result.exit_code != 0
+    assert "is not a valid notebook: Additional properties are not allowed" in result.output
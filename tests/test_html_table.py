@@ -0,0 +1,78 @@
+from presentpy.html_table import TableCell, iter_table_rows
+
+MULTI_INDEX_TABLE = """
+<div>
+<table border="1">
+  <tr><td>not a dataframe</td></tr>
+</table>
+<table border="1" class="dataframe">
+  <thead>
+    <tr>
+      <th></th>
+      <th></th>
+      <th colspan="2" halign="left">price</th>
+    </tr>
+    <tr>
+      <th>city</th>
+      <th>year</th>
+      <th>min</th>
+      <th>max</th>
+    </tr>
+  </thead>
+  <tbody>
+    <tr>
+      <th rowspan="2" valign="top">Lima</th>
+      <th>2023</th>
+      <td>1</td>
+      <td>2</td>
+    </tr>
+    <tr>
+      <th>2024</th>
+      <td>3</td>
+      <td><b>4</b></td>
+    </tr>
+  </tbody>
+</table>
+</div>
+"""
+
+
+def texts(row):
+    return [None if cell.covered else cell.text for cell in row.cells]
+
+
+def test_rows_are_read_in_document_order():
+    html = '<table class="dataframe"><tr><td>1</td><th>index</th><td>2</td></tr></table>'
+
+    [row] = iter_table_rows(html)
+
+    assert texts(row) == ["1", "index", "2"]
+    assert [cell.header for cell in row.cells] == [False, True, False]
+    assert not row.header
+
+
+def test_multi_index_spans_are_covered():
+    rows = list(iter_table_rows(MULTI_INDEX_TABLE))
+
+    assert [texts(row) for row in rows] == [
+        ["", "", "price", None],
+        ["city", "year", "min", "max"],
+        ["Lima", "2023", "1", "2"],
+        [None, "2024", "3", "4"],
+    ]
+    assert [row.header for row in rows] == [True, True, False, False]
+    assert rows[0].cells[2] == TableCell("price", header=True, column_span=2)
+    assert rows[2].cells[0] == TableCell("Lima", header=True, row_span=2)
+
+
+def test_no_dataframe_table():
+    assert list(iter_table_rows("<table><tr><td>1</td></tr></table>")) == []
+
+
+def test_non_ascii_text():
+    html = (
+        '<table class="dataframe"><thead><tr><th>città</th></tr></thead>'
+        "<tbody><tr><td>München</td></tr></tbody></table>"
+    )
+
+    assert [texts(row) for row in iter_table_rows(html)] == [["città"], ["München"]]
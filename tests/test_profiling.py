@@ -0,0 +1,60 @@
+import json
+import time
+import tracemalloc
+
+from presentpy.profiling import Profiler, active_profiler, count, profiled, stage
+
+
+@profiled("inner")
+def allocate(size):
+    data = bytearray(size)
+    time.sleep(0.01)
+    return len(data)
+
+
+def test_stages_are_only_timed_while_profiling():
+    assert active_profiler() is None
+    with stage("outer"):
+        assert allocate(10) == 10
+    count("slides")
+
+    with Profiler() as profiler:
+        assert active_profiler() is profiler
+    assert active_profiler() is None
+    assert not tracemalloc.is_tracing()
+    assert profiler.stages == {}
+
+
+def test_nested_stages_time_themselves_and_count_memory_of_nested_ones():
+    with Profiler() as profiler:
+        with stage("outer"):
+            time.sleep(0.02)
+            allocate(1024 * 1024)
+            allocate(10)
+        count("slides", 2)
+        count("slides")
+
+    outer, inner = profiler.stages["outer"], profiler.stages["inner"]
+    assert (outer.calls, inner.calls) == (1, 2)
+    assert outer.seconds >= 0.02 and inner.seconds >= 0.02
+    # Time in the nested stage is not counted twice
+    assert outer.seconds + inner.seconds <= profiler.seconds
+    assert inner.peak_memory >= 1024 * 1024
+    assert outer.peak_memory >= inner.peak_memory
+    assert profiler.counts == {"slides": 3}
+
+
+def test_reports():
+    with Profiler(trace_memory=False) as profiler:
+        allocate(10)
+        count("elements", 5)
+
+    report = json.loads(profiler.to_json())
+    assert report["stages"]["inner"]["calls"] == 1
+    assert report["stages"]["inner"]["peak_memory"] == 0
+    assert report["counts"] == {"elements": 5}
+
+    table = profiler.to_table().splitlines()
+    assert table[0].split() == ["stage", "calls", "seconds", "share", "peak", "memory"]
+    assert [line.split()[0] for line in table[1:4]] == ["inner", "other", "total"]
+    assert table[-1].split() == ["elements", "5"]
@@ -0,0 +1,53 @@
+import nbformat
+
+from presentpy.code_slide_source import CodeSlideSource
+from presentpy.html_table import iter_table_rows
+from presentpy.table_schema import DATARESOURCE_MIME_TYPE, format_column, iter_schema_rows
+
+
+def fixture_table():
+    nb = nbformat.read("tests/files/test.ipynb", as_version=4)
+    for cell in nb.cells:
+        for output in cell.get("outputs", []):
+            if output.output_type == "execute_result" and "text/html" in output.data:
+                return cell, output.data["text/html"]
+
+
+def schema_from_rows(rows):
+    header, *records = [[cell.text for cell in row.cells] for row in rows]
+    fields = [{"name": "index", "type": "datetime"}] + [{"name": name, "type": "number"} for name in header[1:]]
+    data = [
+        {"index": f"{record[0]}T00:00:00.000", **{name: float(value) for name, value in zip(header[1:], record[1:])}}
+        for record in records
+    ]
+    return {"schema": {"fields": fields, "primaryKey": ["index"]}, "data": data}
+
+
+def test_schema_rows_match_html_rows():
+    _, html = fixture_table()
+    html_rows = list(iter_table_rows(html))
+
+    schema_rows = list(iter_schema_rows(schema_from_rows(html_rows)))
+
+    assert schema_rows == html_rows
+
+
+def test_format_column():
+    assert format_column([1.5, 2.25, None], "number") == ["1.50", "2.25", "NaN"]
+    assert format_column([1.0, 2.0], "number") == ["1.0", "2.0"]
+    assert format_column([1, 20], "integer") == ["1", "20"]
+    assert format_column([0.1234567], "number") == ["0.123457"]
+    assert format_column([1e-9, 2.5e-7, None], "number") == ["1.000000e-09", "2.500000e-07", "NaN"]
+    assert format_column([0.0, 1e-7, 0.5], "number") == ["0.000000e+00", "1.000000e-07", "5.000000e-01"]
+    assert format_column(["2024-01-02T03:04:05.000Z", None], "datetime") == ["2024-01-02 03:04:05", "NaT"]
+    assert format_column(["a", None, 3], "string") == ["a", "", "3"]
+
+
+def test_from_code_cell_reads_table_schema():
+    cell, html = fixture_table()
+    resource = schema_from_rows(list(iter_table_rows(html)))
+    cell.outputs[0].data[DATARESOURCE_MIME_TYPE] = resource
+
+    code = CodeSlideSource.from_code_cell(cell)
+
+    assert code.output.table_data == resource
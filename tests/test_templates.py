@@ -0,0 +1,33 @@
+import pytest
+from lxml import etree
+
+from presentpy.namespaces import Namespaces, odf_namespaces
+from presentpy.templates import Content, Styles
+from presentpy.templates.xml_file import read_template
+from presentpy.writer.theme import Theme
+
+
+@pytest.fixture
+def theme():
+    return Theme("monokai", Namespaces(odf_namespaces))
+
+
+@pytest.mark.parametrize("template_class", [Content, Styles])
+def test_for_theme_matches_fresh_template(theme, template_class):
+    fresh = template_class(read_template(template_class.template_name), theme.namespaces, theme)
+
+    themed = template_class.for_theme(theme)
+
+    assert etree.tostring(themed.xml, method="c14n") == etree.tostring(fresh.xml, method="c14n")
+
+
+def test_for_theme_returns_independent_copies(theme):
+    first = Content.for_theme(theme)
+    second = Content.for_theme(theme)
+
+    first.presentation.append(etree.Element("marker"))
+
+    assert first.xml is not second.xml
+    assert first.presentation.getroottree().getroot() is first.xml
+    assert len(second.presentation) == 0
+    assert len(Content.for_theme(theme).presentation) == 0
@@ -0,0 +1,52 @@
+import shutil
+
+import nbformat
+
+from presentpy.namespaces import Namespaces, odf_namespaces
+from presentpy.watch import NotebookWatcher, watch
+from presentpy.writer.render_cache import MemoryRenderCache
+from presentpy.writer.theme import Theme
+
+
+def add_cell(notebook):
+    nb = nbformat.read(notebook, as_version=4)
+    nb.cells.append(nbformat.v4.new_markdown_cell("# New slide\n\nhello"))
+    nbformat.write(nb, notebook)
+
+
+def test_watcher_debounces_changes(tmp_path):
+    notebook = tmp_path / "test.ipynb"
+    shutil.copy("tests/files/test.ipynb", notebook)
+    watcher = NotebookWatcher(notebook, debounce=1.0)
+
+    assert not watcher.changed(now=0.0)
+    add_cell(notebook)
+    assert not watcher.changed(now=1.0)
+    add_cell(notebook)
+    assert not watcher.changed(now=1.5)
+    assert not watcher.changed(now=2.0)
+    assert watcher.changed(now=2.5)
+    assert not watcher.changed(now=5.0)
+
+
+def test_watch_rebuilds_reusing_cells(tmp_path):
+    notebook = tmp_path / "test.ipynb"
+    output = tmp_path / "test.odp"
+    shutil.copy("tests/files/test.ipynb", notebook)
+    namespaces = Namespaces(odf_namespaces)
+    render_cache = MemoryRenderCache()
+
+    theme = Theme("default", namespaces)
+
+    builds = watch(notebook, output, theme, namespaces, render_cache=render_cache, poll_interval=0.01, debounce=0)
+
+    first = next(builds)
+    cells = render_cache.misses
+    add_cell(notebook)
+    second = next(builds)
+
+    assert first.ok and second.ok
+    assert second.slides == first.slides + 1
+    assert render_cache.hits == cells
+    assert len(render_cache.fragments) == cells + 1
+    assert output.exists()
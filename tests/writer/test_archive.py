@@ -0,0 +1,112 @@
+import random
+import zipfile
+from io import BytesIO
+
+import pytest
+
+from presentpy.writer.archive import CHUNK_SIZE, ArchiveOptions, ArchiveWriter, deflate_chunk, is_stored
+
+
+def write_archive(parts, options=None):
+    buffer = BytesIO()
+    with ArchiveWriter(buffer, options) as archive:
+        for name, data in parts:
+            archive.write(name, data)
+    return zipfile.ZipFile(BytesIO(buffer.getvalue()))
+
+
+def test_parts_are_written_in_order_and_read_back():
+    parts = [("mimetype", b"application/vnd.oasis.opendocument.presentation"), ("content.xml", b"<a/>" * 1000)]
+    parts.append(("media/image.png", bytes(random.Random(0).getrandbits(8) for _ in range(1000))))
+
+    with write_archive(parts) as zip_ref:
+        assert zip_ref.testzip() is None
+        assert zip_ref.namelist() == [name for name, _ in parts]
+        for name, data in parts:
+            assert zip_ref.read(name) == data
+
+
+@pytest.mark.parametrize(
+    "name, level, stored",
+    [
+        ("mimetype", 6, True),
+        ("content.xml", 6, False),
+        ("content.xml", 0, True),
+        ("media/plot.png", 6, True),
+        ("media/photo.JPEG", 6, True),
+    ],
+)
+def test_compression_policy(name, level, stored):
+    options = ArchiveOptions(compression_level=level)
+    assert is_stored(name, options) == stored
+
+    with write_archive([(name, b"x" * 1000)], options) as zip_ref:
+        info = zip_ref.getinfo(name)
+    assert info.compress_type == (zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+
+
+def test_compression_level_is_applied():
+    data = " ".join(str(random.Random(0).random()) for _ in range(10000)).encode()
+    sizes = []
+    for level in (1, 9):
+        with write_archive([("content.xml", data)], ArchiveOptions(compression_level=level)) as zip_ref:
+            sizes.append(zip_ref.getinfo("content.xml").compress_size)
+    assert sizes[1] < sizes[0]
+
+
+def test_chunks_deflate_like_a_single_stream():
+    data = "".join(f'<text:p text:style-name="P{i % 7}">{i}</text:p>' for i in range(200000)).encode()
+    assert len(data) > 3 * CHUNK_SIZE
+
+    buffer = BytesIO()
+    with ArchiveWriter(buffer, ArchiveOptions(workers=4)) as archive:
+        with archive.open("content.xml") as entry:
+            for start in range(0, len(data), 100000):
+                entry.write(data[start : start + 100000])
+
+    with zipfile.ZipFile(buffer) as zip_ref:
+        assert zip_ref.testzip() is None
+        assert zip_ref.read("content.xml") == data
+        # Priming each chunk with the end of the one before keeps the size close to deflating it in one go
+        assert zip_ref.getinfo("content.xml").compress_size < len(deflate_chunk(data, 6)) * 1.01
+
+
+def test_empty_part():
+    with write_archive([("settings.xml", b"")]) as zip_ref:
+        assert zip_ref.read("settings.xml") == b""
+
+
+def test_unclosed_entry_is_an_error():
+    archive = ArchiveWriter(BytesIO())
+    archive.open("content.xml")
+    with pytest.raises(ValueError, match="not closed"):
+        archive.close()
+
+
+@pytest.mark.parametrize("level", [0, 6])
+def test_opened_parts_are_streamed(level):
+    data = random.Random(0).randbytes(5 * CHUNK_SIZE)
+    buffer = BytesIO()
+    with ArchiveWriter(buffer, ArchiveOptions(compression_level=level, workers=1)) as archive:
+        archive.write("mimetype", b"application/vnd.oasis.opendocument.presentation")
+        with archive.open("content.xml") as entry:
+            entry.write(data[:CHUNK_SIZE])
+            written = buffer.tell()
+            entry.write(data[CHUNK_SIZE:])
+            # Stored data is written as it arrives, deflated chunks once they are compressed
+            assert buffer.tell() - written >= (4 if level == 0 else 2) * CHUNK_SIZE
+
+    with zipfile.ZipFile(buffer) as zip_ref:
+        assert zip_ref.testzip() is None
+        assert zip_ref.read("content.xml") == data
+        # Sizes of a streamed part follow its data, a part written whole has them in its local header
+        assert zip_ref.getinfo("content.xml").flag_bits & 0x8
+        assert not zip_ref.getinfo("mimetype").flag_bits & 0x8
+    assert buffer.getvalue()[30:38] == b"mimetype"
+
+
+def test_part_cannot_be_added_while_one_is_open():
+    archive = ArchiveWriter(BytesIO())
+    archive.open("content.xml")
+    with pytest.raises(ValueError, match="content.xml was not closed"):
+        archive.write("styles.xml", b"")
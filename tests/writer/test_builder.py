@@ -0,0 +1,30 @@
+import pytest
+from lxml import etree
+
+from presentpy.namespaces import Namespaces
+from presentpy.writer.builder import build_element, build_sub_element
+
+
+@pytest.fixture
+def namespaces():
+    return Namespaces({"test": "http://test.com", "custom": "http://custom.com"})
+
+
+def test_build_element(namespaces):
+    element = build_element("test:page", namespaces, {"custom:id": "1", "name": "page"}, text="Hello")
+
+    assert element.tag == "{http://test.com}page"
+    assert element.get("{http://custom.com}id") == "1"
+    assert element.get("name") == "page"
+    assert element.text == "Hello"
+
+
+def test_build_sub_element_uses_root_prefixes(namespaces):
+    root = build_element("test:page", namespaces, nsmap=namespaces.data)
+    child = build_sub_element(root, "custom:frame", namespaces, {"test:x": "1in"})
+    build_sub_element(child, "test:span", namespaces, text="Hi")
+
+    assert etree.tostring(root) == (
+        b'<test:page xmlns:test="http://test.com" xmlns:custom="http://custom.com">'
+        b'<custom:frame test:x="1in"><test:span>Hi</test:span></custom:frame></test:page>'
+    )
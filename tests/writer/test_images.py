@@ -0,0 +1,154 @@
+import base64
+import random
+import struct
+import zlib
+from io import BytesIO
+
+import nbformat
+import pytest
+from PIL import Image
+
+from presentpy.code_slide_source import CodeSlideSource
+from presentpy.namespaces import Namespaces, odf_namespaces
+from presentpy.writer.images import (
+    DEFAULT_DPI,
+    ImageOptions,
+    load_png,
+    optimise_image,
+    optimise_images,
+    read_png_info,
+)
+from presentpy.writer.presentation import Presentation
+from presentpy.writer.theme import Theme
+
+
+def encode(image, **params):
+    buffer = BytesIO()
+    image.save(buffer, **params)
+    return buffer.getvalue()
+
+
+def image_cell(data):
+    cell = nbformat.v4.new_code_cell("plot()")
+    cell.outputs = [nbformat.v4.new_output("display_data", data={"image/png": base64.b64encode(data).decode()})]
+    return cell
+
+
+@pytest.mark.parametrize("dpi", [(72, 72), (100, 150), (300.5, 300.5)])
+def test_read_png_info_matches_pillow(dpi):
+    data = encode(Image.new("RGB", (640, 480)), format="PNG", dpi=dpi)
+
+    info = read_png_info(data)
+
+    assert (info.width, info.height) == (640, 480)
+    assert info.dpi == Image.open(BytesIO(data)).info["dpi"]
+
+
+def test_read_png_info_defaults_dpi():
+    data = encode(Image.new("RGB", (32, 16)), format="PNG")
+
+    assert read_png_info(data).dpi == (DEFAULT_DPI, DEFAULT_DPI)
+    assert read_png_info(data).size_in_inches == (32 / DEFAULT_DPI, 16 / DEFAULT_DPI)
+
+
+def test_read_png_info_rejects_other_formats():
+    signature = b"\x89PNG\r\n\x1a\n"
+    with pytest.raises(ValueError):
+        read_png_info(encode(Image.new("RGB", (8, 8)), format="JPEG"))
+    with pytest.raises(ValueError):
+        read_png_info(signature + struct.pack(">I4s", 13, b"IHDR") + b"\x00" * 4)
+    with pytest.raises(ValueError):
+        idat = zlib.compress(b"")
+        read_png_info(signature + struct.pack(">I4s", len(idat), b"IDAT") + idat + b"\x00" * 4)
+
+
+def test_load_png_keeps_bytes_unchanged():
+    data = encode(Image.new("RGB", (64, 64)), format="PNG", dpi=(200, 200))
+
+    image, info = load_png(base64.encodebytes(data).decode())
+
+    assert image == data
+    assert info.dpi == pytest.approx((200, 200), abs=0.01)
+
+
+def test_load_png_reencodes_other_formats():
+    image, info = load_png(base64.b64encode(encode(Image.new("RGB", (8, 4)), format="JPEG")).decode())
+
+    assert Image.open(BytesIO(image)).format == "PNG"
+    assert (info.width, info.height) == (8, 4)
+
+
+def noise(size):
+    return Image.frombytes("RGB", size, random.Random(0).randbytes(size[0] * size[1] * 3))
+
+
+@pytest.fixture
+def theme():
+    return Theme("default", Namespaces(odf_namespaces))
+
+
+def test_identical_images_are_stored_once(theme):
+    presentation = Presentation(theme, theme.namespaces)
+    plot = encode(Image.new("RGB", (64, 64)), format="PNG", dpi=(100, 100))
+    other_plot = encode(Image.new("RGB", (64, 64), "red"), format="PNG", dpi=(100, 100))
+
+    for data in [plot, other_plot, plot]:
+        presentation.add_source_code(CodeSlideSource.from_code_cell(image_cell(data)))
+
+    assert presentation.current_slide_count == 3
+    assert len(presentation.file_entries) == len(presentation.media) == 2
+    assert sorted(presentation.media.values()) == sorted([plot, other_plot])
+
+
+def test_optimise_image_downscales_to_extent():
+    data = encode(noise((800, 400)), format="PNG")
+
+    optimised = optimise_image(data, (4.0, 4.0), ImageOptions(dpi=100))
+
+    assert Image.open(BytesIO(optimised)).size == (400, 200)
+    assert optimise_image(data, (4.0, 4.0), ImageOptions()) is data
+    assert optimise_image(data, (10.0, 10.0), ImageOptions(dpi=100)) is data
+
+
+def test_optimise_images_only_touches_png():
+    data = encode(noise((800, 400)), format="PNG")
+    media = {"media/plot.png": data, "media/other.svg": b"<svg/>"}
+
+    optimised = optimise_images(media, {"media/plot.png": (2.0, 1.0)}, ImageOptions(dpi=100, workers=2))
+
+    assert Image.open(BytesIO(optimised["media/plot.png"])).size == (200, 100)
+    assert optimised["media/other.svg"] == b"<svg/>"
+
+
+def test_image_options_tighten_until_exhausted():
+    options = ImageOptions(max_deck_size=1)
+    steps = []
+    while options is not None:
+        steps.append(options)
+        options = options.tightened()
+
+    assert steps[1].recompress and steps[2].quantize
+    assert [step.dpi for step in steps[3:5]] == [150, 112.5]
+    assert steps[-1].dpi >= 48
+
+
+def test_image_extent_is_limited_to_content_area(theme):
+    presentation = Presentation(theme, theme.namespaces)
+    plot = encode(noise((3000, 300)), format="PNG", dpi=(100, 100))
+
+    presentation.add_source_code(CodeSlideSource.from_code_cell(image_cell(plot)))
+
+    [(width, height)] = presentation.image_extents.values()
+    assert width < 30 and height == pytest.approx(3, abs=0.01)
+
+
+def test_write_fits_deck_size_budget(theme):
+    presentation = Presentation(theme, theme.namespaces)
+    presentation.add_source_code(CodeSlideSource.from_code_cell(image_cell(encode(noise((1200, 900)), format="PNG"))))
+    unoptimised = len(presentation.write())
+
+    presentation.image_options = ImageOptions(max_deck_size=unoptimised // 2)
+    optimised = presentation.write()
+
+    assert len(optimised) <= unoptimised // 2
+    assert len(presentation.write()) == len(optimised)
@@ -31,3 +31,12 @@ def test_raises_if_namespace_not_found():
     ns = Namespaces({"ns": "http://example.com/ns"})
     with pytest.raises(KeyError):
         ns.resolve("other:tag")
+
+
+def test_resolve_is_updated_when_namespace_changes():
+    ns = Namespaces({"ns": "http://example.com/ns"})
+    assert ns.resolve("ns:tag") == "{http://example.com/ns}tag"
+
+    ns["ns"] = "http://example.com/other"
+
+    assert ns.resolve("ns:tag") == "{http://example.com/other}tag"
@@ -0,0 +1,87 @@
+import zipfile
+from io import BytesIO
+from pathlib import Path
+
+import mistletoe
+
+from presentpy.conversion import convert
+from presentpy.namespaces import Namespaces, odf_namespaces
+from presentpy.writer.observer import PresentationObserver
+from presentpy.writer.presentation import Presentation
+from presentpy.writer.render_cache import MemoryRenderCache
+from presentpy.writer.theme import Theme
+
+
+class RecordingObserver(PresentationObserver):
+    def __init__(self):
+        self.events = []
+
+    def slide_added(self, number):
+        self.events.append(("slide_added", number))
+
+    def cell_rendered(self, cell_type, seconds, cached):
+        assert seconds >= 0
+        self.events.append(("cell_rendered", cell_type, cached))
+
+    def table_rendered(self, rows, columns, slides):
+        self.events.append(("table_rendered", rows, columns, slides))
+
+    def image_written(self, path, size):
+        self.events.append(("image_written", path, size))
+
+    def write_finished(self, parts, size, seconds):
+        self.events.append(("write_finished", parts, size))
+
+    def warning(self, message):
+        self.events.append(("warning", message))
+
+    def of(self, name):
+        return [event[1:] for event in self.events if event[0] == name]
+
+
+def test_conversion_events():
+    namespaces = Namespaces(odf_namespaces)
+    theme = Theme("default", namespaces)
+    render_cache = MemoryRenderCache()
+
+    observers = []
+    for _ in range(2):
+        observer = RecordingObserver()
+        output = BytesIO()
+        convert(Path("tests/files/test.ipynb"), output, theme, namespaces, render_cache=render_cache, observer=observer)
+        observers.append(observer)
+    built, cached = observers
+
+    assert built.of("slide_added") == [(number,) for number in range(9)]
+    assert [cell_type for cell_type, _ in built.of("cell_rendered")] == ["markdown", "code", "code", "code", "code"]
+    assert {was_cached for _, was_cached in built.of("cell_rendered")} == {False}
+    assert built.of("table_rendered") == [(6, 5, 1)]
+
+    with zipfile.ZipFile(output) as zip_ref:
+        images = {info.filename: info.file_size for info in zip_ref.infolist() if info.filename.startswith("media/")}
+    assert dict(built.of("image_written")) == images
+
+    [(parts, size)] = built.of("write_finished")
+    assert size == len(output.getvalue())
+    assert [part.name for part in parts][:2] == ["mimetype", "META-INF/manifest.xml"]
+    content = next(part for part in parts if part.name == "content.xml")
+    assert content.compressed_size < content.size
+
+    # Cells from the render cache are not built again
+    assert cached.of("slide_added") == built.of("slide_added")
+    assert {was_cached for _, was_cached in cached.of("cell_rendered")} == {True}
+    assert cached.of("table_rendered") == []
+    assert cached.of("image_written") == built.of("image_written")
+
+
+def test_skipped_elements_are_warnings(capsys):
+    namespaces = Namespaces(odf_namespaces)
+    theme = Theme("default", namespaces)
+    document = mistletoe.Document("# Title\n\n> quoted")
+
+    observer = RecordingObserver()
+    Presentation(theme, namespaces, observer=observer).add_content(document)
+    assert observer.of("warning") == [("Skipping Quote",)]
+
+    Presentation(theme, namespaces).add_content(mistletoe.Document("# Title\n\n> quoted"))
+    assert capsys.readouterr().err == "Skipping Quote\n"
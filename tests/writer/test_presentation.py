@@ -0,0 +1,223 @@
+import io
+import zipfile
+
+import mistletoe
+import nbformat
+import pytest
+from lxml import etree
+from pygments.token import Token
+
+from presentpy.code_slide_source import CodeSlideSource
+from presentpy.constants import CODE_HIGHLIGHT_PARAGRAPH_STYLE_NAME, CODE_PARAGRAPH_STYLE_NAME
+from presentpy.namespaces import Namespaces, odf_namespaces
+from presentpy.table_schema import DATARESOURCE_MIME_TYPE
+from presentpy.writer.presentation import Presentation
+from presentpy.writer.tables import TableOptions
+from presentpy.writer.theme import Theme
+
+
+@pytest.fixture
+def namespaces():
+    return Namespaces(odf_namespaces)
+
+
+@pytest.fixture
+def presentation(namespaces):
+    presentation = Presentation(Theme("default", namespaces), namespaces)
+    presentation.add_content(mistletoe.Document("# Hello\n\nWorld"))
+    return presentation
+
+
+def test_write_returns_bytes(presentation):
+    data = presentation.write()
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zip_ref:
+        assert zip_ref.read("mimetype") == b"application/vnd.oasis.opendocument.presentation"
+        assert b"Hello" in zip_ref.read("content.xml")
+
+
+def test_write_to_file_object(presentation):
+    buffer = io.BytesIO()
+
+    assert presentation.write(buffer) is None
+
+    with zipfile.ZipFile(buffer) as zip_ref:
+        assert zip_ref.testzip() is None
+        assert "content.xml" in zip_ref.namelist()
+
+
+def test_write_to_file_object_cannot_keep_intermediate(presentation):
+    with pytest.raises(ValueError):
+        presentation.write(io.BytesIO(), keep_intermediate=True)
+
+
+def test_code_highlight_steps(namespaces):
+    presentation = Presentation(Theme("default", namespaces), namespaces)
+    cell = nbformat.v4.new_code_cell("a = 1\nb = 2\nc = 3\n#% highlights=1,2-3")
+    presentation.add_source_code(CodeSlideSource.from_code_cell(cell))
+
+    with zipfile.ZipFile(io.BytesIO(presentation.write())) as zip_ref:
+        content = etree.fromstring(zip_ref.read("content.xml"))
+
+    steps = []
+    for page in content.iterfind(".//draw:page", namespaces=namespaces.data):
+        paragraphs = page.findall(".//text:p[@text:cond-style-name]", namespaces=namespaces.data)
+        steps.append([paragraph.get(namespaces("text:style-name")) for paragraph in paragraphs])
+        assert ["".join(paragraph.itertext()) for paragraph in paragraphs] == ["a = 1", "b = 2", "c = 3"]
+
+    assert steps == [
+        [CODE_PARAGRAPH_STYLE_NAME, CODE_PARAGRAPH_STYLE_NAME, CODE_PARAGRAPH_STYLE_NAME],
+        [CODE_HIGHLIGHT_PARAGRAPH_STYLE_NAME, CODE_PARAGRAPH_STYLE_NAME, CODE_PARAGRAPH_STYLE_NAME],
+        [CODE_PARAGRAPH_STYLE_NAME, CODE_HIGHLIGHT_PARAGRAPH_STYLE_NAME, CODE_HIGHLIGHT_PARAGRAPH_STYLE_NAME],
+    ]
+
+
+def table_cell(html):
+    cell = nbformat.v4.new_code_cell("df")
+    cell.outputs = [nbformat.v4.new_output("execute_result", data={"text/plain": "df", "text/html": html})]
+    return cell
+
+
+def read_table(presentation, namespaces):
+    with zipfile.ZipFile(io.BytesIO(presentation.write())) as zip_ref:
+        content = etree.fromstring(zip_ref.read("content.xml"))
+    return content.find(".//table:table", namespaces=namespaces.data)
+
+
+def test_table_spans(namespaces):
+    presentation = Presentation(Theme("default", namespaces), namespaces)
+    html = (
+        '<table class="dataframe"><thead><tr><th></th><th colspan="2">price</th></tr></thead>'
+        '<tbody><tr><th rowspan="2">Lima</th><td>1</td><td>2</td></tr><tr><td>3</td><td>4</td></tr></tbody></table>'
+    )
+    presentation.add_source_code(CodeSlideSource.from_code_cell(table_cell(html)))
+
+    table = read_table(presentation, namespaces)
+
+    assert len(table.findall("table:table-column", namespaces=namespaces.data)) == 3
+    rows = [
+        [(etree.QName(cell).localname, "".join(cell.itertext())) for cell in row]
+        for row in table.iterfind("table:table-row", namespaces=namespaces.data)
+    ]
+    assert rows == [
+        [("table-cell", ""), ("table-cell", "price"), ("covered-table-cell", "")],
+        [("table-cell", "Lima"), ("table-cell", "1"), ("table-cell", "2")],
+        [("covered-table-cell", ""), ("table-cell", "3"), ("table-cell", "4")],
+    ]
+    price = table[3][1]
+    assert price.get(namespaces("table:number-columns-spanned")) == "2"
+    assert table[4][0].get(namespaces("table:number-rows-spanned")) == "2"
+
+
+def test_table_prefers_table_schema(namespaces):
+    presentation = Presentation(Theme("default", namespaces), namespaces)
+    cell = table_cell('<table class="dataframe"><tr><th>from html</th></tr></table>')
+    cell.outputs[0].data[DATARESOURCE_MIME_TYPE] = {
+        "schema": {"fields": [{"name": "index", "type": "integer"}, {"name": "x", "type": "number"}]},
+        "data": [{"index": 0, "x": 0.5}],
+    }
+    presentation.add_source_code(CodeSlideSource.from_code_cell(cell))
+
+    table = read_table(presentation, namespaces)
+
+    assert b"from html" not in etree.tostring(table)
+    rows = table.findall("table:table-row", namespaces=namespaces.data)
+    assert [["".join(cell.itertext()) for cell in row] for row in rows] == [["index", "x"], ["0", "0.5"]]
+
+
+def read_tables(presentation, namespaces):
+    with zipfile.ZipFile(io.BytesIO(presentation.write())) as zip_ref:
+        content = etree.fromstring(zip_ref.read("content.xml"))
+    return [
+        [["".join(cell.itertext()) for cell in row] for row in table.iterfind("table:table-row", namespaces.data)]
+        for table in content.iterfind(".//table:table", namespaces=namespaces.data)
+    ]
+
+
+def test_table_pages_repeat_header(namespaces):
+    presentation = Presentation(Theme("default", namespaces), namespaces, table_options=TableOptions(rows_per_slide=2))
+    body = "".join(f"<tr><th>{n}</th><td>{n * 10}</td></tr>" for n in range(5))
+    html = f'<table class="dataframe"><thead><tr><th></th><th>x</th></tr></thead><tbody>{body}</tbody></table>'
+    presentation.add_source_code(CodeSlideSource.from_code_cell(table_cell(html)))
+
+    tables = read_tables(presentation, namespaces)
+
+    assert presentation.current_slide_count == 3
+    assert presentation.current_table_count == 1
+    assert tables == [
+        [["", "x"], ["0", "0"], ["1", "10"]],
+        [["", "x"], ["2", "20"], ["3", "30"]],
+        [["", "x"], ["4", "40"]],
+    ]
+
+
+def test_table_elides_middle_rows(namespaces):
+    presentation = Presentation(Theme("default", namespaces), namespaces, table_options=TableOptions(elide=1))
+    body = "".join(f"<tr><td>{n}</td></tr>" for n in range(100))
+    html = f'<table class="dataframe"><thead><tr><th>x</th></tr></thead><tbody>{body}</tbody></table>'
+    presentation.add_source_code(CodeSlideSource.from_code_cell(table_cell(html)))
+
+    assert read_tables(presentation, namespaces) == [[["x"], ["0"], ["..."], ["99"]]]
+
+
+def test_tables_share_styles(namespaces):
+    presentation = Presentation(Theme("default", namespaces), namespaces)
+    for columns in [2, 2, 3]:
+        header = "".join(f"<th>{n}</th>" for n in range(columns))
+        html = f'<table class="dataframe"><thead><tr>{header}</tr></thead></table>'
+        presentation.add_source_code(CodeSlideSource.from_code_cell(table_cell(html)))
+
+    families = [style["style:family"] for style in presentation.styles if style.element.get(namespaces("style:family"))]
+
+    # Row, text and heading styles and the template once, a column style per column width
+    assert len(presentation.styles) == 7
+    assert families.count("table-column") == 2
+
+
+def content_style_names(presentation, namespaces):
+    with zipfile.ZipFile(io.BytesIO(presentation.write())) as zip_ref:
+        content = etree.fromstring(zip_ref.read("content.xml"))
+    automatic_styles = content.find("office:automatic-styles", namespaces=namespaces.data)
+    return {style.get(namespaces("style:name")) for style in automatic_styles}
+
+
+def test_only_used_token_styles_are_written(namespaces):
+    theme = Theme("default", namespaces)
+    presentation = Presentation(theme, namespaces)
+    presentation.add_source_code(CodeSlideSource.from_code_cell(nbformat.v4.new_code_cell("import os")))
+
+    names = content_style_names(presentation, namespaces)
+
+    assert theme.token_style_map[Token.Keyword.Namespace] in names
+    assert theme.token_style_map[Token.Comment] not in names
+    assert "content_span__strikethrough" not in names
+
+
+def code_spans(presentation, source, namespaces):
+    cell = nbformat.v4.new_code_cell(source)
+    (paragraph,) = presentation._build_code_paragraphs(CodeSlideSource.from_code_cell(cell))
+    spans = []
+    for span in paragraph:
+        parts = [span.text or ""]
+        for space in span:
+            parts.append(f"<{space.get(namespaces('text:c'))}>")
+            parts.append(space.tail or "")
+        spans.append("".join(parts))
+    return spans
+
+
+def test_code_spans_are_merged(namespaces):
+    presentation = Presentation(Theme("default", namespaces), namespaces)
+
+    assert code_spans(presentation, 'x = "a  b"', namespaces) == ["x ", "= ", '"a<2>b"']
+    assert code_spans(presentation, "    return  x ", namespaces) == ["<4>return<2>", "x<1>"]
+
+
+def test_code_spaces_keep_underlined_styles_apart(namespaces):
+    theme = Theme("default", namespaces)
+    keyword_style_name = theme.token_style_map[Token.Keyword]
+    theme.__dict__["underlined_token_styles"] = {keyword_style_name}
+    presentation = Presentation(theme, namespaces)
+
+    assert code_spans(presentation, "x  return", namespaces) == ["x<2>", "return"]
+    assert code_spans(presentation, "return x", namespaces) == ["return", "<1>x"]
@@ -0,0 +1,82 @@
+import os
+
+import nbformat
+import pytest
+
+from presentpy.code_slide_source import CodeSlideSource
+from presentpy.namespaces import Namespaces, odf_namespaces
+from presentpy.writer.presentation import Presentation
+from presentpy.writer.render_cache import CellFragment, RenderCache
+from presentpy.writer.tables import TableOptions
+from presentpy.writer.theme import Theme
+
+
+@pytest.fixture
+def theme():
+    return Theme("default", Namespaces(odf_namespaces))
+
+
+@pytest.fixture
+def render_cache(tmp_path):
+    return RenderCache(tmp_path / "cells")
+
+
+def render(presentation, source):
+    presentation.start_fragment()
+    presentation.add_source_code(CodeSlideSource.from_code_cell(nbformat.v4.new_code_cell(source)))
+    return presentation.finish_fragment()
+
+
+def test_fragment_is_renumbered(theme):
+    fragment = render(Presentation(theme, theme.namespaces), "a = 1\n#% highlights=1")
+
+    renumbered = fragment.renumbered(5, 0, 0)
+
+    assert b'draw:name="slide0"' in fragment.slides[0]
+    assert b'draw:name="slide5"' in renumbered.slides[0]
+    assert b'draw:id="slide6"' in renumbered.slides[1]
+    assert fragment.renumbered(0, 0, 0) is fragment
+
+
+def test_add_fragment_matches_rendering(theme):
+    rendered = Presentation(theme, theme.namespaces)
+    render(rendered, "x = 0")
+    render(rendered, "a = 1\n#% highlights=1")
+
+    spliced = Presentation(theme, theme.namespaces)
+    render(spliced, "x = 0")
+    spliced.add_fragment(render(Presentation(theme, theme.namespaces), "a = 1\n#% highlights=1"))
+
+    assert spliced.current_slide_count == rendered.current_slide_count == 3
+    assert spliced.used_style_names == rendered.used_style_names
+    assert spliced.write() is not None
+    assert CellFragment.from_json(render(spliced, "b").to_json()).slides
+
+
+def test_key_depends_on_source_outputs_and_theme(render_cache, theme):
+    cell = nbformat.v4.new_code_cell("a = 1")
+    key = render_cache.key(cell, theme)
+
+    assert render_cache.key(nbformat.v4.new_code_cell("a = 1"), theme) == key
+    assert render_cache.key(nbformat.v4.new_code_cell("a = 2"), theme) != key
+    assert render_cache.key(cell, theme, with_outputs=True) != key
+    assert render_cache.key(cell, theme, table_options=TableOptions(elide=5)) != key
+    assert render_cache.key(cell, Theme("monokai", theme.namespaces)) != key
+    cell.outputs = [nbformat.v4.new_output("stream", text="1")]
+    assert render_cache.key(cell, theme) != key
+
+
+def test_prune_evicts_least_recently_used(render_cache, theme):
+    fragment = render(Presentation(theme, theme.namespaces), "a = 1")
+    for key in ["old", "used", "new"]:
+        render_cache.put(key, fragment)
+    size = (render_cache.directory / "old.json").stat().st_size
+    for age, key in enumerate(["used", "old", "new"]):
+        os.utime(render_cache.directory / f"{key}.json", (age, age))
+    assert render_cache.get("used") is not None
+
+    render_cache.max_size = 2 * size
+    render_cache.prune()
+
+    assert sorted(path.stem for path in render_cache.directory.glob("*.json")) == ["new", "used"]
+    assert render_cache.get("missing") is None
@@ -0,0 +1,55 @@
+import zipfile
+from pathlib import Path
+
+import mistletoe
+import pytest
+from lxml import etree
+
+from presentpy.conversion import convert
+from presentpy.namespaces import Namespaces, odf_namespaces
+from presentpy.writer.presentation import Presentation
+from presentpy.writer.slide_stream import SlideStream
+from presentpy.writer.tag import Tag
+from presentpy.writer.theme import Theme
+
+
+@pytest.fixture
+def namespaces():
+    return Namespaces(odf_namespaces)
+
+
+def test_write_drops_known_declarations(namespaces):
+    stream = SlideStream(namespaces)
+    page = Tag("draw:page", namespaces, {"draw:name": "slide0"}, nsmap=namespaces.data)
+    page.append(Tag("text:p", namespaces))
+
+    stream.write(page.to_element())
+
+    assert stream.count == 1
+    stream._buffer.seek(0)
+    assert stream._buffer.read() == b'<draw:page draw:name="slide0"><text:p/></draw:page>'
+
+
+def test_presentation_streams_finished_slides(namespaces, tmp_path):
+    presentation = Presentation(Theme("default", namespaces), namespaces)
+
+    for idx in range(5):
+        presentation.add_content(mistletoe.Document(f"# Slide {idx}\n\nSome content"))
+        assert presentation.slides.count == idx
+
+    presentation.write(tmp_path / "deck.odp")
+
+    assert presentation.current_slide is None
+    with zipfile.ZipFile(tmp_path / "deck.odp") as zip_ref:
+        content = etree.fromstring(zip_ref.read("content.xml"))
+    pages = content.findall(".//draw:page", namespaces=namespaces.data)
+    assert [page.get(namespaces("draw:name")) for page in pages] == [f"slide{idx}" for idx in range(5)]
+
+
+def test_convert_closes_the_stream(namespaces, tmp_path):
+    presentation = convert(
+        Path("tests/files/test.ipynb"), tmp_path / "deck.odp", Theme("default", namespaces), namespaces
+    )
+
+    assert presentation.current_slide_count == 9
+    assert presentation.slides._buffer.closed
@@ -0,0 +1,46 @@
+from presentpy.namespaces import Namespaces, odf_namespaces
+from presentpy.writer.style_registry import StyleRegistry
+from presentpy.writer.tag import Tag
+
+namespaces = Namespaces(odf_namespaces)
+
+
+def text_style(color, name=None):
+    attributes = {"style:family": "text"}
+    if name:
+        attributes["style:name"] = name
+    style = Tag("style:style", namespaces, attributes)
+    style.append(Tag("style:text-properties", namespaces, {"fo:color": color}))
+    return style
+
+
+def test_identical_styles_are_stored_once():
+    registry = StyleRegistry(namespaces)
+
+    name = registry.add(text_style("white"), "text")
+
+    assert name.startswith("text-")
+    assert registry.add(text_style("white", name="ignored"), "text") == name
+    assert registry.add(text_style("black"), "text") != name
+    assert len(registry) == 2
+    assert name in registry
+
+
+def test_add_named_keeps_the_name():
+    registry = StyleRegistry(namespaces)
+    name = StyleRegistry(namespaces).add(text_style("white"), "text")
+
+    assert registry.add_named(text_style("white", name=name)) == name
+    assert registry.add(text_style("white"), "text") == name
+    assert len(registry) == 1
+
+
+def test_template_names():
+    registry = StyleRegistry(namespaces)
+    template = Tag("table:table-template", namespaces)
+    template.append(Tag("table:first-row", namespaces, {"table:style-name": "row"}))
+
+    name = registry.add(template, "template", "table:name")
+
+    assert template["table:name"] == name
+    assert StyleRegistry(namespaces).add_named(template) == name
@@ -0,0 +1,95 @@
+from presentpy.html_table import TableCell, TableRow, iter_table_rows
+from presentpy.writer.tables import (
+    TableOptions,
+    elide_rows,
+    paginate_rows,
+    repeat_row_spans,
+    rows_per_slide,
+    split_header,
+)
+
+
+def body_rows(count):
+    return (TableRow([TableCell(str(n))]) for n in range(count))
+
+
+def texts(rows):
+    return [[cell.text for cell in row.cells] for row in rows]
+
+
+def test_rows_per_slide():
+    assert rows_per_slide(5.5, header_rows=1) == 12
+    assert rows_per_slide(5.5, header_rows=1, font_size=36) == 6
+    assert rows_per_slide(0.1, header_rows=3) == 1
+
+
+def test_split_header():
+    html = (
+        '<table class="dataframe"><thead><tr><th>a</th></tr><tr><th>b</th></tr></thead>'
+        "<tbody><tr><td>1</td></tr></tbody></table>"
+    )
+    header, body = split_header(iter_table_rows(html))
+
+    assert texts(header) == [["a"], ["b"]]
+    assert texts(body) == [["1"]]
+
+
+def test_split_header_without_thead():
+    header, body = split_header(body_rows(3))
+
+    assert texts(header) == [["0"]]
+    assert texts(body) == [["1"], ["2"]]
+
+
+def test_split_header_empty():
+    assert split_header(iter([]))[0] == []
+
+
+def test_repeat_row_spans():
+    html = (
+        '<table class="dataframe"><tbody><tr><th rowspan="3">a</th><td>1</td></tr><tr><td>2</td></tr>'
+        "<tr><td>3</td></tr><tr><th>b</th><td>4</td></tr></tbody></table>"
+    )
+    rows = list(repeat_row_spans(iter_table_rows(html)))
+
+    assert texts(rows) == [["a", "1"], ["a", "2"], ["a", "3"], ["b", "4"]]
+    assert all(not cell.covered and cell.row_span == 1 for row in rows for cell in row.cells)
+
+
+def test_elide_rows():
+    assert texts(elide_rows(body_rows(10), 2, 1)) == [["0"], ["1"], ["..."], ["8"], ["9"]]
+    assert texts(elide_rows(body_rows(4), 2, 1)) == [["0"], ["1"], ["2"], ["3"]]
+    assert texts(elide_rows(body_rows(5), 2, 1)) == [["0"], ["1"], ["2"], ["3"], ["4"]]
+    assert texts(elide_rows(body_rows(6), 2, 1)) == [["0"], ["1"], ["..."], ["4"], ["5"]]
+
+
+def test_paginate_rows():
+    pages = list(paginate_rows(body_rows(5), TableOptions(), 2))
+
+    assert [texts(page) for page in pages] == [[["0"], ["1"]], [["2"], ["3"]], [["4"]]]
+
+
+def test_paginate_rows_keeps_spans_on_one_page():
+    rows = [TableRow([TableCell("a", row_span=2)]), TableRow([TableCell(covered=True)])]
+
+    assert list(paginate_rows(iter(rows), TableOptions(), 2)) == [rows]
+
+
+def test_paginate_rows_reads_lazily():
+    rows = body_rows(1_000_000)
+    pages = paginate_rows(rows, TableOptions(), 10)
+
+    assert texts(next(pages))[-1] == ["9"]
+    assert next(rows).cells[0].text == "11"
+
+
+def test_paginate_rows_elided():
+    pages = list(paginate_rows(body_rows(100), TableOptions(elide=3), 4))
+
+    assert [texts(page) for page in pages] == [[["0"], ["1"], ["2"], ["..."]], [["97"], ["98"], ["99"]]]
+
+    # A single row in between is shown rather than replaced by ellipses
+    rows = list(body_rows(3))
+    assert list(paginate_rows(iter(rows), TableOptions(elide=1), 4)) == [rows]
+    pages = list(paginate_rows(body_rows(7), TableOptions(elide=3), 4))
+    assert [texts(page) for page in pages] == [[["0"], ["1"], ["2"], ["3"]], [["4"], ["5"], ["6"]]]
@@ -46,3 +46,17 @@ def test_to_element(namespaces, element_name, attributes, text):
 
     if text is not None:
         assert element.text == text
+
+
+def test_append_builds_tree(namespaces):
+    parent = Tag("test:page", namespaces, {"id": "1"}, nsmap=namespaces.data)
+    child = Tag("custom:frame", namespaces, {"test:x": "1in"})
+    parent.append(child)
+
+    child["test:y"] = "2in"
+
+    assert parent["id"] == "1"
+    assert parent.children == [child.to_element()]
+    assert child.to_element().get(namespaces("test:y")) == "2in"
+    with pytest.raises(KeyError):
+        parent["test:missing"]
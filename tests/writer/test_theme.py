@@ -1,6 +1,8 @@
 import pytest
+from pygments.token import Token
 
-from presentpy.writer.theme import convert_color
+from presentpy.namespaces import Namespaces, odf_namespaces
+from presentpy.writer.theme import Theme, convert_color
 
 
 @pytest.mark.parametrize(
@@ -14,3 +16,24 @@ from presentpy.writer.theme import convert_color
 )
 def test_convert_color(color, expected_output):
     assert convert_color(color) == expected_output
+
+
+@pytest.fixture
+def theme():
+    return Theme("default", Namespaces(odf_namespaces))
+
+
+@pytest.mark.parametrize(
+    "token, expected_style_name",
+    [
+        (Token.Keyword, "span__default__token_keyword"),
+        (Token.Name.Builtin, "span__default__token_name_builtin"),
+        # Not styled by the default theme, falls back to the closest styled parent
+        (Token.Name.Builtin.Pseudo, "span__default__token_name_builtin"),
+        (Token.Punctuation, "span__default__token"),
+        (Token.Keyword.Custom.Made.Up, "span__default__token_keyword"),
+    ],
+)
+def test_token_style_map(theme, token, expected_style_name):
+    assert theme.token_style_map[token] == expected_style_name
+    assert token in theme.token_style_map
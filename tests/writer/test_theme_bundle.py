@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from lxml import etree
+
+from presentpy.namespaces import Namespaces, odf_namespaces
+from presentpy.templates import Styles
+from presentpy.templates.xml_file import read_template
+from presentpy.writer.theme import COLOR_PROPERTIES, Theme
+from presentpy.writer.theme_bundle import ThemeBundle, load_theme
+
+
+@pytest.fixture
+def namespaces():
+    return Namespaces(odf_namespaces)
+
+
+def structure(element):
+    return element.tag, dict(element.attrib), element.text, [structure(child) for child in element]
+
+
+def styles_xml(theme, namespaces):
+    return etree.tostring(Styles(read_template("styles.xml"), namespaces, theme).xml, method="c14n")
+
+
+@pytest.mark.parametrize("style", ["default", "monokai"])
+def test_bundle_round_trip(namespaces, style):
+    theme = Theme(style, namespaces)
+    bundle = ThemeBundle.from_json(ThemeBundle.compile(theme).to_json())
+
+    loaded = Theme(style, namespaces, bundle=bundle)
+
+    for name in COLOR_PROPERTIES:
+        assert getattr(loaded, name) == getattr(theme, name)
+    assert loaded.token_styles == theme.token_styles
+    assert [structure(style.to_element()) for style in loaded.styles] == [
+        structure(style.to_element()) for style in theme.styles
+    ]
+    assert styles_xml(loaded, namespaces) == styles_xml(Theme(style, namespaces), namespaces)
+
+
+def test_load_theme_uses_cache(namespaces, cache_directory, monkeypatch):
+    theme = load_theme("default", namespaces, cache_directory=cache_directory)
+    [bundle_path] = (cache_directory / "themes").glob("default-*.json")
+
+    def fail(*args):
+        raise AssertionError("Theme rebuilt instead of loaded from the cache")
+
+    monkeypatch.setattr(Theme, "_build_token_styles", fail)
+    cached = load_theme("default", namespaces, cache_directory=cache_directory)
+
+    assert cached.token_styles == theme.token_styles
+    assert cached.master_pages is not None
+    assert bundle_path.exists()
+
+
+def test_load_theme_ignores_stale_bundle(namespaces, cache_directory):
+    load_theme("default", namespaces, cache_directory=cache_directory)
+    [bundle_path] = (cache_directory / "themes").glob("default-*.json")
+    stale = json.loads(bundle_path.read_bytes())
+    stale["key"] = "0000000000000000"
+    stale["colors"]["title_color"] = "#123456"
+    bundle_path.write_text(json.dumps(stale))
+
+    theme = load_theme("default", namespaces, cache_directory=cache_directory)
+
+    assert theme.title_color != "#123456"